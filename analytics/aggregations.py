@@ -0,0 +1,164 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Time series computed from the raw event logs with server-side aggregation
+pipelines.
+
+Unlike the rollups these answer any filter over the stored logs (e.g. with
+or without bot rows), at the cost of scanning the matching index range.
+Each pipeline matches on the ``(sql_mail_id, is_bot, created_time,
+event_type)`` index of MailEventLog and only projects indexed fields, so
+MongoDB never fetches a document; only one row per bucket leaves the
+server. Results are cached per (query, range).
+"""
+
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from analytics.buckets import truncate
+from analytics.mongodb_models import HOUR
+from mailer.mongodb_models import MailEvent, MailEventLog
+
+
+def _bucket_expression(granularity: str) -> dict:
+    # $dateTrunc needs MongoDB 5.0, docker-compose ships 4.4
+    parts = {
+        "year": {"$year": "$created_time"},
+        "month": {"$month": "$created_time"},
+        "day": {"$dayOfMonth": "$created_time"},
+    }
+    if granularity == HOUR:
+        parts["hour"] = {"$hour": "$created_time"}
+    return {"$dateFromParts": parts}
+
+
+def _count(event_type: str) -> dict:
+    return {"$sum": {"$cond": [{"$eq": ["$_id.event_type", event_type]}, "$n", 0]}}
+
+
+def event_series_pipeline(
+    mail_ids: list[int],
+    granularity: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    include_bots: bool = False,
+) -> list[dict]:
+    match = {
+        "sql_mail_id": mail_ids[0] if len(mail_ids) == 1 else {"$in": mail_ids},
+        "is_bot": {"$in": [False, True]} if include_bots else False,
+        "created_time": {"$gte": truncate(start, granularity), "$lte": end},
+    }
+    return [
+        {"$match": match},
+        {"$project": {"_id": 0, "created_time": 1, "event_type": 1}},
+        {
+            "$group": {
+                "_id": {
+                    "bucket": _bucket_expression(granularity),
+                    "event_type": "$event_type",
+                },
+                "n": {"$sum": 1},
+            }
+        },
+        {
+            "$group": {
+                "_id": "$_id.bucket",
+                "opens": _count(MailEvent.OPEN),
+                "clicks": _count(MailEvent.LINK_CLICK),
+            }
+        },
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "bucket": "$_id", "opens": 1, "clicks": 1}},
+    ]
+
+
+def _cache_key(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return f"analytics:series:{digest}"
+
+
+def event_series(
+    mail_ids: list[int],
+    granularity: str,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    include_bots: bool = False,
+) -> list[dict]:
+    """
+    Opens and clicks per bucket of the given mails between ``start`` and
+    ``end``, as ``[{"bucket", "opens", "clicks"}, ...]``. Buckets without
+    hits are omitted.
+
+    Ranges that ended more than ``ANALYTICS_SERIES_INGEST_LAG`` seconds ago
+    can no longer change and are cached for ``ANALYTICS_SERIES_CACHE_TTL``;
+    more recent ones, whose hits may still be on their way from the tracking
+    stream, only for ``ANALYTICS_SERIES_LIVE_CACHE_TTL``.
+    """
+    mail_ids = sorted(set(mail_ids))
+    if not mail_ids:
+        return []
+    cache = caches[settings.ANALYTICS_CACHE_ALIAS]
+    key = _cache_key(mail_ids, granularity, start, end, include_bots)
+    series = cache.get(key)
+    if series is None:
+        series = list(
+            MailEventLog._get_collection().aggregate(
+                event_series_pipeline(mail_ids, granularity, start, end, include_bots)
+            )
+        )
+        closed = end < datetime.datetime.now(datetime.UTC) - datetime.timedelta(
+            seconds=settings.ANALYTICS_SERIES_INGEST_LAG
+        )
+        cache.set(
+            key,
+            series,
+            (
+                settings.ANALYTICS_SERIES_CACHE_TTL
+                if closed
+                else settings.ANALYTICS_SERIES_LIVE_CACHE_TTL
+            ),
+        )
+    return series
+
+
+def backfill_event_log_fields() -> None:
+    """
+    Copy ``sql_mail_id`` and ``event_type`` from the referenced MailEvent onto
+    logs stored before they were denormalized, entirely server side.
+    """
+    MailEventLog._get_collection().aggregate(
+        [
+            {"$match": {"sql_mail_id": {"$exists": False}}},
+            {
+                "$lookup": {
+                    "from": MailEvent._get_collection_name(),
+                    "localField": "event",
+                    "foreignField": "_id",
+                    "as": "source",
+                }
+            },
+            {"$unwind": "$source"},
+            {
+                "$project": {
+                    "sql_mail_id": "$source.sql_mail_id",
+                    "event_type": "$source.event_type",
+                }
+            },
+            {
+                "$merge": {
+                    "into": MailEventLog._get_collection_name(),
+                    "on": "_id",
+                    "whenMatched": "merge",
+                    "whenNotMatched": "discard",
+                }
+            },
+        ]
+    )
@@ -0,0 +1,23 @@
+import datetime
+
+from analytics.mongodb_models import DAY, HOUR
+
+STEP = {HOUR: datetime.timedelta(hours=1), DAY: datetime.timedelta(days=1)}
+
+
+def truncate(moment: datetime.datetime, granularity: str) -> datetime.datetime:
+    """Start of the bucket ``moment`` falls in, as a naive UTC datetime."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.UTC).replace(tzinfo=None)
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == DAY else moment
+
+
+def buckets(start, end, granularity: str) -> list[datetime.datetime]:
+    """Every bucket start from the one holding ``start`` to the one holding ``end``."""
+    bucket, last = truncate(start, granularity), truncate(end, granularity)
+    result = []
+    while bucket <= last:
+        result.append(bucket)
+        bucket += STEP[granularity]
+    return result
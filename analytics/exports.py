@@ -0,0 +1,164 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Raw tracking logs of a mail, badge tracker or redirect tracker, as row
+iterators for common_library.export.
+
+Tracker logs are read through ``.iterator(chunk_size=...)``, a server-side
+cursor on PostgreSQL, along the (tracker, created_time) index: rows come in
+time order without a sort, and a time range only touches its partitions.
+Mail event logs come from a MongoDB cursor fetching ``chunk_size``
+documents per batch along the (sql_mail_id, is_bot, created_time) index.
+Nothing is read before the first chunk is requested.
+"""
+
+import datetime
+from collections.abc import Iterator
+
+from django.conf import settings
+
+from analytics.mongodb_models import USER
+from mailer.models import BadgePixelTrackerLogs, RedirectLinkTrackerLog
+from mailer.mongodb_models import MailEventLog
+
+EXPORT_SCOPES = ("mail", "badge", "redirect")
+MAIL_COLUMNS = (
+    "created_time",
+    "event_type",
+    "ip_address",
+    "user_agent",
+    "browser",
+    "os",
+    "device_type",
+    "country",
+    "city",
+    "referrer",
+    "is_bot",
+)
+TRACKER_COLUMNS = ("created_time", "ip", "os", "user_agent", "is_bot")
+# log model and its tracker foreign key, per scope
+TRACKER_LOGS = {
+    "badge": (BadgePixelTrackerLogs, "badge"),
+    "redirect": (RedirectLinkTrackerLog, "redirect"),
+}
+
+
+def mail_event_rows(
+    mail_id: int,
+    start: datetime.datetime = None,
+    end: datetime.datetime = None,
+    include_bots: bool = False,
+    chunk_size: int = None,
+) -> Iterator[tuple]:
+    created_time = {}
+    if start:
+        created_time["$gte"] = start
+    if end:
+        created_time["$lt"] = end
+    match = {
+        "sql_mail_id": mail_id,
+        # both values keep is_bot an equality on the index, the two ranges
+        # are merged in created_time order
+        "is_bot": {"$in": [False, True]} if include_bots else False,
+    }
+    if created_time:
+        match["created_time"] = created_time
+
+    # the raw collection, like tracking.archive: _get_collection() would
+    # first (re)create the model's indexes
+    collection = MailEventLog._get_db()[MailEventLog._get_collection_name()]
+    cursor = collection.find(
+        match,
+        projection={"_id": 0, "event": 0, "sql_mail_id": 0, "modified_time": 0},
+        sort=[("created_time", 1)],
+        batch_size=chunk_size or settings.ANALYTICS_EXPORT_CHUNK_SIZE,
+    )
+    try:
+        for document in cursor:
+            geo_location = document.get("geo_location") or {}
+            yield (
+                # pymongo returns naive UTC datetimes
+                document["created_time"].replace(tzinfo=datetime.UTC),
+                document.get("event_type"),
+                document.get("ip_address"),
+                document.get("user_agent"),
+                document.get("browser"),
+                document.get("os"),
+                document.get("device_type"),
+                geo_location.get("country"),
+                geo_location.get("city"),
+                document.get("referrer"),
+                document.get("is_bot", False),
+            )
+    finally:
+        cursor.close()
+
+
+def can_export(user, scope: str, scope_id: int) -> bool:
+    """
+    Whether ``user`` may export the logs of ``scope_id``: staff may export
+    any, other users only the trackers they own. Mails have no owner, so
+    their logs are for staff only.
+    """
+    if user.is_staff:
+        return True
+    if scope == "mail":
+        return False
+    model, tracker = TRACKER_LOGS[scope]
+    return (
+        model._meta.get_field(tracker)
+        .related_model.objects.filter(pk=scope_id, user=user)
+        .exists()
+    )
+
+
+def can_view(user, scope: str, scope_id: int) -> bool:
+    """
+    Whether ``user`` may read the analytics (rollups, series, unique
+    visitors) of ``scope_id``: like can_export, plus the ``user`` scope,
+    which users may only read for themselves.
+    """
+    if scope == USER:
+        return user.is_staff or scope_id == user.pk
+    return can_export(user, scope, scope_id)
+
+
+def tracker_log_rows(
+    scope: str,
+    tracker_id: int,
+    start: datetime.datetime = None,
+    end: datetime.datetime = None,
+    include_bots: bool = False,
+    chunk_size: int = None,
+) -> Iterator[tuple]:
+    model, tracker = TRACKER_LOGS[scope]
+    logs = model.objects.filter(**{tracker: tracker_id})
+    if not include_bots:
+        logs = logs.filter(is_bot=False)
+    if start:
+        logs = logs.filter(created_time__gte=start)
+    if end:
+        logs = logs.filter(created_time__lt=end)
+    return (
+        logs.order_by("created_time")
+        .values_list(*TRACKER_COLUMNS)
+        .iterator(chunk_size=chunk_size or settings.ANALYTICS_EXPORT_CHUNK_SIZE)
+    )
+
+
+def export_rows(
+    scope: str,
+    scope_id: int,
+    start: datetime.datetime = None,
+    end: datetime.datetime = None,
+    include_bots: bool = False,
+) -> tuple[tuple[str, ...], Iterator[tuple]]:
+    """(columns, rows) of the logs of a mail, badge or redirect tracker."""
+    if scope == "mail":
+        return MAIL_COLUMNS, mail_event_rows(scope_id, start, end, include_bots)
+    return TRACKER_COLUMNS, tracker_log_rows(scope, scope_id, start, end, include_bots)
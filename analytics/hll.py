@@ -0,0 +1,92 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Unique visitor estimation with Redis HyperLogLogs.
+
+Every rollup bucket has a sketch of the distinct ``ip + user agent`` pairs
+that hit it. A sketch takes at most 12 KB whatever the number of visitors,
+and the number of distinct visitors over a range of buckets is the
+cardinality of their union (``PFCOUNT`` over all keys), so a query costs
+O(buckets) regardless of how many events the range holds.
+
+Redis HyperLogLogs have a standard error of 0.81%: about 68% of estimates
+fall within 0.81% of the true count and about 99.7% within 2.43%.
+"""
+
+import datetime
+
+from django.conf import settings
+
+from analytics.buckets import STEP, buckets, truncate
+from analytics.mongodb_models import DAY, HOUR
+from common_library.redis import get_redis
+
+STANDARD_ERROR = 0.0081
+MAX_BUCKETS = 2_000
+# PFCOUNT merges every key it is given on each call: hourly unique visitor
+# queries are limited to a week, longer ranges have to use daily sketches
+MAX_HOURLY_SKETCHES = 7 * 24
+
+
+def sketch_key(scope: str, scope_id: int, granularity: str, bucket) -> str:
+    return f"analytics:hll:{scope}:{scope_id}:{granularity}:{bucket:%Y%m%d%H}"
+
+
+def sketch_ttl(granularity: str) -> int:
+    return {
+        HOUR: settings.ANALYTICS_HLL_HOURLY_TTL,
+        DAY: settings.ANALYTICS_HLL_DAILY_TTL,
+    }[granularity]
+
+
+def oldest_sketch(granularity: str) -> datetime.datetime:
+    """
+    Start of the oldest bucket whose sketch is certainly still stored: a
+    sketch expires ``sketch_ttl`` seconds after its last hit, so anything
+    older may be gone and would silently be counted as no visitors.
+    """
+    return (
+        truncate(
+            datetime.datetime.now(datetime.UTC)
+            - datetime.timedelta(seconds=sketch_ttl(granularity)),
+            granularity,
+        )
+        + STEP[granularity]
+    )
+
+
+def add_visitors(sketches: dict[tuple, set[str]]) -> None:
+    """
+    Add visitors to their sketches in one pipelined round trip.
+
+    ``sketches`` maps ``(scope, scope_id, granularity, bucket)`` to the set of
+    visitor identifiers seen in that bucket.
+    """
+    if not sketches:
+        return
+    pipe = get_redis().pipeline(transaction=False)
+    for (scope, scope_id, granularity, bucket), visitors in sketches.items():
+        key = sketch_key(scope, scope_id, granularity, bucket)
+        pipe.pfadd(key, *visitors)
+        pipe.expire(key, sketch_ttl(granularity))
+    pipe.execute()
+
+
+def count_unique(scope, scope_id, granularity, start, end) -> int:
+    """
+    Estimated number of distinct visitors between ``start`` and ``end``.
+
+    Callers bound the range, see UniqueVisitorsQuerySerializer: buckets
+    before ``oldest_sketch`` undercount, and every bucket is a key PFCOUNT
+    merges.
+    """
+    keys = [
+        sketch_key(scope, scope_id, granularity, bucket)
+        for bucket in buckets(start, end, granularity)
+    ]
+    return get_redis().pfcount(*keys) if keys else 0
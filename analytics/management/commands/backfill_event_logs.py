@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from analytics.aggregations import backfill_event_log_fields
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy sql_mail_id and event_type onto MailEventLog documents stored "
+        "before they were denormalized, so the event series endpoints see them."
+    )
+
+    def handle(self, *args, **options):
+        backfill_event_log_fields()
+        self.stdout.write(self.style.SUCCESS("Backfilled mail event logs"))
@@ -0,0 +1,96 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+from mongoengine import DateTimeField, Document, IntField, StringField
+
+MAIL = "mail"
+BADGE = "badge"
+REDIRECT = "redirect"
+USER = "user"
+SCOPES = [MAIL, BADGE, REDIRECT, USER]
+
+HOUR = "hour"
+DAY = "day"
+GRANULARITIES = [HOUR, DAY]
+
+
+class EventRollup(Document):
+    """
+    Pre-aggregated counters for one time bucket of a mail, badge tracker,
+    redirect tracker or user. Maintained incrementally with ``$inc`` upserts
+    from the tracking ingest path, so reads cost one document per bucket.
+    """
+
+    meta = {
+        "db_alias": "default",
+        "indexes": [
+            {
+                "fields": ["scope", "scope_id", "granularity", "bucket"],
+                "unique": True,
+            },
+        ],
+    }
+
+    scope = StringField(required=True, choices=SCOPES)
+    scope_id = IntField(required=True)
+    granularity = StringField(required=True, choices=GRANULARITIES)
+    bucket = DateTimeField(required=True)  # start of the hour/day, UTC
+
+    opens = IntField(default=0)
+    clicks = IntField(default=0)
+    unique_ips = IntField(default=0)
+    bot_hits = IntField(default=0)
+
+
+class RollupVisitor(Document):
+    """
+    IPs already counted towards ``EventRollup.unique_ips`` of a bucket.
+
+    Only needed while a bucket can still receive hits, so documents expire
+    a while after their bucket closed.
+    """
+
+    meta = {
+        "db_alias": "default",
+        "indexes": [
+            {
+                "fields": ["scope", "scope_id", "granularity", "bucket", "ip"],
+                "unique": True,
+            },
+            {"fields": ["bucket"], "expireAfterSeconds": 3 * 24 * 60 * 60},
+        ],
+    }
+
+    scope = StringField(required=True, choices=SCOPES)
+    scope_id = IntField(required=True)
+    granularity = StringField(required=True, choices=GRANULARITIES)
+    bucket = DateTimeField(required=True)
+    ip = StringField(required=True)
+    first_seen = DateTimeField()
+
+
+class CountedEntry(Document):
+    """
+    Tracking stream entries whose hits are already counted in EventRollup.
+
+    The stream delivers at least once: an entry whose rollups were written
+    but that was not acknowledged is delivered again, and must not be
+    counted twice. Only needed while an entry can still be redelivered, so
+    documents expire a while after they were written.
+    """
+
+    meta = {
+        "db_alias": "default",
+        "indexes": [
+            {"fields": ["counted_time"], "expireAfterSeconds": 3 * 24 * 60 * 60},
+        ],
+    }
+
+    id = StringField(primary_key=True)  # stream entry id
+    counted_time = DateTimeField(required=True)
@@ -0,0 +1,163 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import collections
+import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from analytics.buckets import truncate
+from analytics.hll import add_visitors
+from analytics.mongodb_models import (
+    DAY,
+    HOUR,
+    CountedEntry,
+    EventRollup,
+    RollupVisitor,
+)
+
+OPENS = "opens"
+CLICKS = "clicks"
+BOT_HITS = "bot_hits"
+
+ROLLUP_FIELDS = ("scope", "scope_id", "granularity", "bucket")
+VISITOR_FIELDS = (*ROLLUP_FIELDS, "ip")
+
+
+class RollupBatch:
+    """
+    Collects the rollup increments of one ingest batch and applies them in
+    two bulk writes: one upserting the batch's (bucket, ip) visitors, one
+    ``$inc`` upsert per touched rollup document. Distinct ip + user agent
+    pairs are also added to the bucket's HyperLogLog, see analytics.hll.
+
+    Increments added with the ``entry_id`` of the tracking stream entry
+    they come from are counted once per entry, however often it is
+    delivered: the entry ids are upserted into CountedEntry first and only
+    the increments of entries that were new are applied. Visitors and
+    sketches are idempotent already. An entry whose id was recorded but
+    whose ``$inc`` then failed is not counted on redelivery, so a failed
+    write undercounts rather than overcounts. ``count_entries`` records them
+    ahead of ``write`` for callers with other per-entry counters.
+
+    Usage::
+
+        batch = RollupBatch()
+        batch.add(MAIL, mail_id, hit.created_time, OPENS, ip=ip, user_agent=ua)
+        batch.write()
+    """
+
+    def __init__(self):
+        self.counts = collections.defaultdict(collections.Counter)
+        # stream entry id -> its increments, applied once the id is recorded
+        self.entry_counts = collections.defaultdict(
+            lambda: collections.defaultdict(collections.Counter)
+        )
+        self.visitors = set()
+        self.sketches = collections.defaultdict(set)
+        self.counted: set[str] | None = None
+
+    def add(
+        self,
+        scope: str,
+        scope_id: int,
+        moment,
+        field: str,
+        ip: str = None,
+        user_agent: str = "",
+        entry_id: str = None,
+    ):
+        counts = self.entry_counts[entry_id] if entry_id else self.counts
+        for granularity in (HOUR, DAY):
+            key = (scope, scope_id, granularity, truncate(moment, granularity))
+            counts[key][field] += 1
+            if ip:
+                self.visitors.add((*key, ip))
+                self.sketches[key].add(f"{ip}|{user_agent}")
+
+    def __bool__(self):
+        return bool(self.counts or self.entry_counts)
+
+    @staticmethod
+    def _record_entries(entry_ids: list[str]) -> list[int]:
+        """Record stream entries, returning the indexes of the ones that were new."""
+        now = datetime.datetime.now(datetime.UTC)
+        operations = [
+            UpdateOne(
+                {"_id": entry_id}, {"$setOnInsert": {"counted_time": now}}, upsert=True
+            )
+            for entry_id in entry_ids
+        ]
+        try:
+            result = CountedEntry._get_collection().bulk_write(
+                operations, ordered=False
+            )
+        except BulkWriteError as exc:
+            # a concurrent consumer recorded some of them first
+            return [upsert["index"] for upsert in exc.details.get("upserted", [])]
+        return list(result.upserted_ids)
+
+    @staticmethod
+    def _upsert_visitors(visitors: list) -> list[int]:
+        """Upsert visitors, returning the indexes of the ones that were new."""
+        now = datetime.datetime.now(datetime.UTC)
+        operations = [
+            UpdateOne(
+                dict(zip(VISITOR_FIELDS, visitor)),
+                {"$setOnInsert": {"first_seen": now}},
+                upsert=True,
+            )
+            for visitor in visitors
+        ]
+        try:
+            result = RollupVisitor._get_collection().bulk_write(
+                operations, ordered=False
+            )
+        except BulkWriteError as exc:
+            # a concurrent consumer inserted some of them first
+            return [upsert["index"] for upsert in exc.details.get("upserted", [])]
+        return list(result.upserted_ids)
+
+    def count_entries(self) -> set[str]:
+        """
+        Record the stream entries added so far in CountedEntry and fold the
+        increments of the new ones into the batch, once. Returns the ids of
+        the new entries: those not counted by an earlier delivery.
+        """
+        if self.counted is None:
+            entry_ids = list(self.entry_counts)
+            new = self._record_entries(entry_ids) if entry_ids else []
+            self.counted = {entry_ids[index] for index in new}
+            for entry_id in self.counted:
+                for key, counts in self.entry_counts[entry_id].items():
+                    self.counts[key].update(counts)
+        return self.counted
+
+    def write(self) -> None:
+        self.count_entries()
+        if not self.counts:
+            return
+
+        if self.visitors:
+            visitors = sorted(self.visitors)
+            # only visitors this batch inserted are new to their bucket
+            for index in self._upsert_visitors(visitors):
+                self.counts[visitors[index][:4]]["unique_ips"] += 1
+
+        EventRollup._get_collection().bulk_write(
+            [
+                UpdateOne(
+                    dict(zip(ROLLUP_FIELDS, key)), {"$inc": dict(counts)}, upsert=True
+                )
+                for key, counts in self.counts.items()
+            ],
+            ordered=False,
+        )
+        add_visitors(self.sketches)
@@ -0,0 +1,108 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+from rest_framework import serializers
+
+from analytics.buckets import buckets, truncate
+from common_library.export import FORMATS, NDJSON
+from analytics.hll import MAX_BUCKETS, MAX_HOURLY_SKETCHES, oldest_sketch
+from analytics.mongodb_models import GRANULARITIES, HOUR
+
+
+class RollupQuerySerializer(serializers.Serializer):
+    """Validates the query string of the rollup endpoints."""
+
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default=HOUR)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get("start") and attrs.get("end") and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must be before end.")
+        return attrs
+
+
+class EventRollupSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField()
+    opens = serializers.IntegerField()
+    clicks = serializers.IntegerField()
+    unique_ips = serializers.IntegerField()
+    bot_hits = serializers.IntegerField()
+
+
+class BoundedRangeQuerySerializer(RollupQuerySerializer):
+    """Like RollupQuerySerializer, but the range is required and bounded."""
+
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if (
+            len(buckets(attrs["start"], attrs["end"], attrs["granularity"]))
+            > MAX_BUCKETS
+        ):
+            raise serializers.ValidationError(
+                f"range spans more than {MAX_BUCKETS} buckets, use a coarser granularity."
+            )
+        return attrs
+
+
+class UniqueVisitorsQuerySerializer(BoundedRangeQuerySerializer):
+    """
+    Like BoundedRangeQuerySerializer, but the range must lie within the
+    lifetime of the HyperLogLog sketches and hourly ranges within a week,
+    see analytics.hll.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        granularity = attrs["granularity"]
+        if truncate(attrs["start"], granularity) < oldest_sketch(granularity):
+            raise serializers.ValidationError(
+                f"{granularity} unique visitors are only kept since "
+                f"{oldest_sketch(granularity):%Y-%m-%dT%H:00Z}."
+            )
+        if (
+            granularity == HOUR
+            and len(buckets(attrs["start"], attrs["end"], granularity))
+            > MAX_HOURLY_SKETCHES
+        ):
+            raise serializers.ValidationError(
+                f"hourly ranges span at most {MAX_HOURLY_SKETCHES} hours, "
+                "use the day granularity."
+            )
+        return attrs
+
+
+class EventSeriesQuerySerializer(BoundedRangeQuerySerializer):
+    include_bots = serializers.BooleanField(default=False)
+
+
+class EventSeriesSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField()
+    opens = serializers.IntegerField()
+    clicks = serializers.IntegerField()
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """
+    Validates the query string of the log exports. The format is called
+    ``output``: DRF reserves ``format`` for its own content negotiation.
+    """
+
+    output = serializers.ChoiceField(choices=FORMATS, default=NDJSON)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    include_bots = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs.get("start") and attrs.get("end") and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must be before end.")
+        return attrs
@@ -0,0 +1,26 @@
+from django.urls import path
+
+from analytics import views
+
+urlpatterns = [
+    path(
+        "rollups/<str:scope>/<int:scope_id>/",
+        views.RollupAPIView.as_view(),
+        name="rollups",
+    ),
+    path(
+        "uniques/<str:scope>/<int:scope_id>/",
+        views.UniqueVisitorsAPIView.as_view(),
+        name="unique-visitors",
+    ),
+    path(
+        "events/mail/<int:mail_id>/",
+        views.MailEventSeriesAPIView.as_view(),
+        name="mail-event-series",
+    ),
+    path(
+        "exports/<str:scope>/<int:scope_id>/",
+        views.LogExportAPIView.as_view(),
+        name="log-export",
+    ),
+]
@@ -1,3 +1,174 @@
-from django.shortcuts import render
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
 
-# Create your views here.
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from analytics.mongodb_models import SCOPES, EventRollup
+from analytics.buckets import truncate
+from analytics.hll import STANDARD_ERROR, count_unique
+from analytics.aggregations import event_series
+from analytics.exports import EXPORT_SCOPES, can_export, can_view, export_rows
+from analytics.serializers import (
+    BoundedRangeQuerySerializer,
+    EventRollupSerializer,
+    EventSeriesQuerySerializer,
+    EventSeriesSerializer,
+    ExportQuerySerializer,
+    UniqueVisitorsQuerySerializer,
+)
+from common_library.export import CONTENT_TYPES, stream_rows
+
+
+class RollupAPIView(APIView):
+    """
+    Hourly or daily opens, clicks, unique IPs and bot hits of a mail, badge
+    tracker, redirect tracker or user, read from the pre-aggregated rollups:
+    the cost is one document per bucket no matter how many events it holds.
+    Only for the owner of the tracker, the user themselves or staff, see
+    analytics.exports.can_view.
+
+    Query params: ``granularity`` (hour/day), ``start``, ``end`` (ISO 8601,
+    required, at most ``MAX_BUCKETS`` buckets apart).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, scope: str, scope_id: int):
+        if scope not in SCOPES or not can_view(request.user, scope, scope_id):
+            raise Http404
+        query = BoundedRangeQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        rollups = EventRollup.objects(
+            scope=scope,
+            scope_id=scope_id,
+            granularity=params["granularity"],
+            bucket__gte=truncate(params["start"], params["granularity"]),
+            bucket__lte=params["end"],
+        ).order_by("bucket")
+        return Response(EventRollupSerializer(rollups, many=True).data)
+
+
+class UniqueVisitorsAPIView(APIView):
+    """
+    Estimated number of distinct visitors (ip + user agent) of a mail,
+    badge tracker, redirect tracker or user between ``start`` and ``end``.
+
+    The estimate comes from the union of the per-bucket HyperLogLogs, with
+    a standard error of 0.81% (``standard_error`` in the response); see
+    analytics.hll. Bot hits are never counted. Ranges must start after the
+    sketches' TTL, and hourly ones span at most a week. Only for the owner
+    of the tracker, the user themselves or staff, see
+    analytics.exports.can_view.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, scope: str, scope_id: int):
+        if scope not in SCOPES or not can_view(request.user, scope, scope_id):
+            raise Http404
+        query = UniqueVisitorsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        return Response(
+            {
+                "unique_visitors": count_unique(
+                    scope,
+                    scope_id,
+                    params["granularity"],
+                    params["start"],
+                    params["end"],
+                ),
+                "standard_error": STANDARD_ERROR,
+            }
+        )
+
+
+class MailEventSeriesAPIView(APIView):
+    """
+    Hourly or daily opens and clicks of a mail computed from the raw event
+    logs by an aggregation pipeline, see analytics.aggregations. Bot rows
+    (TRACKING_BOT_POLICY "store") are excluded unless ``include_bots`` is set.
+    Mails have no owner, so like their log exports the series are for staff
+    only, see analytics.exports.can_view.
+
+    Query params: ``granularity`` (hour/day), ``start``, ``end`` (ISO 8601,
+    required), ``include_bots``.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, mail_id: int):
+        if not can_view(request.user, "mail", mail_id):
+            raise Http404
+        query = EventSeriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        series = event_series(
+            [mail_id],
+            params["granularity"],
+            params["start"],
+            params["end"],
+            include_bots=params["include_bots"],
+        )
+        return Response(EventSeriesSerializer(series, many=True).data)
+
+
+class LogExportAPIView(APIView):
+    """
+    Every raw log of a mail (MongoDB event logs), badge tracker or redirect
+    tracker, oldest first, streamed as NDJSON or CSV with a header line.
+    Rows are read, encoded and sent ``ANALYTICS_EXPORT_CHUNK_SIZE`` at a
+    time, so memory stays flat whatever the size of the export; see
+    analytics.exports and common_library.export.
+
+    The logs hold visitors' IP addresses and user agents: users may only
+    export the trackers they own, staff anything, see
+    analytics.exports.can_export. Bot rows (TRACKING_BOT_POLICY "store")
+    are left out unless ``include_bots`` is set, and flagged ``is_bot``.
+
+    Query params: ``output`` (ndjson/csv), ``start``, ``end`` (ISO 8601),
+    ``include_bots``.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, scope: str, scope_id: int):
+        # no hint whether a tracker someone else owns exists
+        if scope not in EXPORT_SCOPES or not can_export(request.user, scope, scope_id):
+            raise Http404
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        columns, rows = export_rows(
+            scope,
+            scope_id,
+            params.get("start"),
+            params.get("end"),
+            include_bots=params["include_bots"],
+        )
+        output = params["output"]
+        response = StreamingHttpResponse(
+            stream_rows(rows, columns, output, settings.ANALYTICS_EXPORT_CHUNK_SIZE),
+            content_type=CONTENT_TYPES[output],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{scope}-{scope_id}-logs.{output}"'
+        )
+        # let nginx pass the chunks through instead of buffering the export
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -0,0 +1,101 @@
+"""
+Benchmark of the streaming log exports (common_library.export): encoding
+throughput and peak memory of NDJSON and CSV for growing row counts.
+
+    python benchmarks/bench_exports.py [--rows N ...] [--chunk-size N]
+
+Rows are generated in process, shaped like MailEventLog export rows, so the
+numbers are the cost of the export itself, without a database. The body is
+consumed chunk by chunk like an ASGI server does, once for throughput and
+once under tracemalloc for the peak memory, which should not grow with the
+number of rows.
+"""
+
+import argparse
+import asyncio
+import datetime
+import pathlib
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from common_library.export import FORMATS, stream_rows  # noqa: E402
+
+COLUMNS = (
+    "created_time",
+    "event_type",
+    "ip_address",
+    "user_agent",
+    "browser",
+    "os",
+    "device_type",
+    "country",
+    "city",
+    "referrer",
+    "is_bot",
+)
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+)
+
+
+def rows(count: int):
+    start = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+    for i in range(count):
+        yield (
+            start + datetime.timedelta(seconds=i),
+            "open" if i % 3 else "click",
+            f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+            USER_AGENT,
+            "Chrome",
+            "Windows",
+            "desktop",
+            "IR",
+            "Tehran",
+            None,
+            i % 50 == 0,
+        )
+
+
+async def consume(count: int, output: str, chunk_size: int) -> int:
+    size = 0
+    async for chunk in stream_rows(rows(count), COLUMNS, output, chunk_size):
+        size += len(chunk)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--chunk-size", type=int, default=2_000)
+    args = parser.parse_args()
+
+    print(f"chunks of {args.chunk_size} rows")
+    print(
+        f"{'format':>7} {'rows':>9} {'rows/s':>10} {'MB/s':>7} "
+        f"{'MB out':>8} {'peak MB':>8}"
+    )
+    for output in FORMATS:
+        for count in args.rows:
+            start = time.perf_counter()
+            size = asyncio.run(consume(count, output, args.chunk_size))
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            asyncio.run(consume(count, output, args.chunk_size))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{output:>7} {count:9d} {count / elapsed:10.0f} "
+                f"{size / elapsed / 2**20:7.1f} {size / 2**20:8.1f} "
+                f"{peak / 2**20:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
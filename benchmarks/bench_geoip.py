@@ -0,0 +1,83 @@
+"""
+Benchmark for tracking.geoip lookups.
+
+    python benchmarks/bench_geoip.py [--ranges N] [--lookups N]
+
+Builds a synthetic dataset of N IPv4 and IPv6 ranges, compiles it and
+measures lookups per second with the hot-IP cache disabled (every lookup
+binary-searches the mapped file) and enabled (a realistic repeat mix).
+"""
+
+import argparse
+import ipaddress
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from tracking.geoip import GeoIPDatabase, compile_database  # noqa: E402
+
+COUNTRIES = ["IR", "DE", "US", "GB", "FR", "NL", "TR", "AE", "CA", "JP"]
+
+
+def build_csv(path: str, ranges: int) -> None:
+    step_v4 = (2**32) // ranges
+    step_v6 = (2**64) // ranges
+    with open(path, "w") as fp:
+        fp.write("start_ip,end_ip,country,city\n")
+        for i in range(ranges):
+            country = COUNTRIES[i % len(COUNTRIES)]
+            start = ipaddress.IPv4Address(i * step_v4)
+            end = ipaddress.IPv4Address(i * step_v4 + step_v4 - 1)
+            fp.write(f"{start},{end},{country},City{i % 500}\n")
+            start = ipaddress.IPv6Address((0x2001 << 112) + i * step_v6)
+            end = ipaddress.IPv6Address((0x2001 << 112) + i * step_v6 + step_v6 - 1)
+            fp.write(f"{start},{end},{country}\n")
+
+
+def run(label: str, lookup, addresses: list[str]) -> None:
+    started = time.perf_counter()
+    for address in addresses:
+        lookup(address)
+    elapsed = time.perf_counter() - started
+    print(f"{label:>10}: {len(addresses) / elapsed:>12,.0f} lookups/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ranges", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "ranges.csv")
+        output = os.path.join(directory, "geoip.bin")
+        build_csv(source, args.ranges)
+
+        started = time.perf_counter()
+        count = compile_database(source, output)
+        print(
+            f"compiled {count:,} ranges in {time.perf_counter() - started:.1f}s "
+            f"({os.path.getsize(output) / 2**20:.1f} MiB)"
+        )
+
+        started = time.perf_counter()
+        database = GeoIPDatabase(output)
+        print(f"opened in {(time.perf_counter() - started) * 1e3:.2f}ms")
+
+        rng = random.Random(0)
+        unique = [
+            str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(args.lookups)
+        ]
+        hot = [unique[rng.randrange(2_000)] for _ in range(args.lookups)]
+        run("uncached", database._lookup, unique)
+        run("cached", database.lookup, hot)
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark of mailer.rewriter.rewrite_html on large HTML bodies.
+
+    python benchmarks/bench_rewriter.py [--max-mb N]
+
+The body is generated chunk by chunk and the output only measured, never
+joined, so the peak memory reported (tracemalloc) is the rewriter's own
+working set. Time per MB should stay flat as the body grows (linear time)
+and the peak should not grow with it (bounded memory).
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from mailer.rewriter import CHUNK_SIZE, rewrite_html  # noqa: E402
+
+BLOCK = (
+    '<tr><td style="padding:8px"><!-- item --><p>Lorem ipsum dolor sit amet, '
+    "consectetur adipiscing elit &amp; more, 1 < 2.</p>"
+    '<a class="btn" href="https://shop.example.com/product/{i}?utm_source=mail">'
+    'View product {i}</a> <a href="mailto:support@example.com">Support</a>'
+    '<img src="https://cdn.example.com/{i}.png" alt=""></td></tr>\n'
+)
+
+
+def generate(size: int):
+    """Chunks of an HTML document of about ``size`` characters."""
+    yield "<html><head><style>td{color:#333}</style></head><body><table>"
+    produced, i, chunk = 0, 0, []
+    while produced < size:
+        block = BLOCK.format(i=i)
+        chunk.append(block)
+        produced += len(block)
+        i += 1
+        if len(chunk) * len(block) >= CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+    yield "".join(chunk) + "</table></body></html>"
+
+
+def link_url(href: str) -> str:
+    return "https://track.example.com/hocks/click/01HZXJ8Q2C4W6ZK3T5M7N9P1R3"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-mb", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'seconds':>9} {'ms/MB':>8} {'peak KB':>9}")
+    size = 256 * 1024
+    while size <= args.max_mb * 1024 * 1024:
+        tracemalloc.start()
+        start = time.perf_counter()
+        written = sum(
+            len(piece) for piece in rewrite_html(generate(size), link_url, "<img>")
+        )
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert written > size
+        megabytes = size / (1024 * 1024)
+        print(
+            f"{megabytes:>6.2f}MB {elapsed:>9.3f} {elapsed * 1000 / megabytes:>8.1f}"
+            f" {peak / 1024:>9.0f}"
+        )
+        size *= 4
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark of mailer.smtp.SMTPConnectionPool against a local aiosmtpd server.
+
+    python benchmarks/bench_smtp.py [--messages N] [--tls]
+
+"unpooled" opens and closes an SMTP session per message, as
+``django.core.mail.send_mail`` does; "pooled" sends every message through
+the pool. With ``--tls`` the session is upgraded with STARTTLS (self-signed
+certificate), which is where most of the per-connection cost lies.
+"""
+
+import argparse
+import pathlib
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from aiosmtpd.handlers import Sink  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+settings.configure(
+    EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+    DEFAULT_FROM_EMAIL="bench@example.com",
+)
+
+from django.core.mail import EmailMessage, get_connection  # noqa: E402
+from django.core.mail.backends.smtp import EmailBackend  # noqa: E402
+
+from mailer.smtp import SMTPConnectionPool  # noqa: E402
+
+
+def tls_context(directory: str) -> ssl.SSLContext:
+    cert, key = f"{directory}/cert.pem", f"{directory}/key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1"]
+        + ["-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+class SelfSignedEmailBackend(EmailBackend):
+    """Accepts the benchmark server's self-signed certificate."""
+
+    ssl_context = ssl._create_unverified_context()
+
+
+BACKEND = f"{__name__}.SelfSignedEmailBackend"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def message(i: int) -> EmailMessage:
+    return EmailMessage(f"subject {i}", "body", to=[f"user{i}@example.com"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        context = tls_context(directory) if args.tls else None
+        port = free_port()
+        controller = Controller(
+            Sink(), hostname="127.0.0.1", port=port, tls_context=context
+        )
+        controller.start()
+        options = {
+            "backend": BACKEND,
+            "host": "127.0.0.1",
+            "port": port,
+            "use_tls": args.tls,
+        }
+
+        start = time.perf_counter()
+        for i in range(args.messages):
+            get_connection(fail_silently=False, **options).send_messages([message(i)])
+        unpooled = time.perf_counter() - start
+
+        pool = SMTPConnectionPool(max_size=1, idle_timeout=60, **options)
+        start = time.perf_counter()
+        for i in range(args.messages):
+            pool.send_messages([message(i)])
+        pooled = time.perf_counter() - start
+        pool.close()
+        controller.stop()
+
+    for name, elapsed in (("unpooled", unpooled), ("pooled", pooled)):
+        print(f"{name:>9}: {args.messages / elapsed:10,.0f} messages/s")
+    print(f"  speedup: {unpooled / pooled:10.1f}x  {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark of ULID storage: 26-character text (UlidField) against 16-byte
+uuid (BinaryUlidField), with random and monotonic generation.
+
+    DATABASE_NAME=... DATABASE_USERNAME=... python benchmarks/bench_ulid.py \
+        [--rows N] [--batch N]
+
+Needs PostgreSQL, connected with the same DATABASE_* variables as the
+project. Every variant inserts ``--rows`` ids in batches into a temporary
+table with a unique index, like the tracker tables, and reports the insert
+rate and the final table and index sizes. The generation rate of each
+generator is measured first, without a database.
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import django  # noqa: E402
+import ulid  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+settings.configure(
+    DATABASES={
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DATABASE_NAME", "postgres"),
+            "USER": os.environ.get("DATABASE_USERNAME", "postgres"),
+            "PASSWORD": os.environ.get("DATABASE_PASSWORD", ""),
+            "HOST": os.environ.get("DATABASE_HOST", "localhost"),
+            "PORT": os.environ.get("DATABASE_PORT", "5432"),
+        }
+    }
+)
+django.setup()
+
+# ulid.new as UlidField used to, ulid.monotonic as common_library's new_ulid
+GENERATORS = {"random": ulid.new, "monotonic": ulid.monotonic.new}
+# column type, value written
+STORAGE = {
+    "text": ("varchar(26)", lambda value: value.str),
+    "uuid": ("uuid", lambda value: value.uuid),
+}
+
+
+def generation_rate(generate, rows: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rows):
+        generate()
+    return rows / (time.perf_counter() - start)
+
+
+def insert(cursor, storage: str, generator: str, rows: int, batch: int) -> dict:
+    column_type, value = STORAGE[storage]
+    generate = GENERATORS[generator]
+    table = f"bench_ulid_{storage}_{generator}"
+    cursor.execute(
+        f"CREATE TEMPORARY TABLE {table} "
+        f"(id bigserial PRIMARY KEY, uid {column_type} NOT NULL UNIQUE)"
+    )
+    elapsed = 0.0
+    for offset in range(0, rows, batch):
+        values = [(value(generate()),) for _ in range(min(batch, rows - offset))]
+        start = time.perf_counter()
+        cursor.executemany(f"INSERT INTO {table} (uid) VALUES (%s)", values)
+        elapsed += time.perf_counter() - start
+    cursor.execute(
+        "SELECT pg_relation_size(%s::regclass), pg_relation_size(indexrelid) "
+        "FROM pg_index WHERE indrelid = %s::regclass AND NOT indisprimary",
+        [table, table],
+    )
+    table_size, index_size = cursor.fetchone()
+    return {
+        "rate": rows / elapsed,
+        "table_mb": table_size / 2**20,
+        "index_mb": index_size / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=1_000)
+    args = parser.parse_args()
+
+    print(f"{'generator':>10} {'ids/s':>10}")
+    for name, generate in GENERATORS.items():
+        print(f"{name:>10} {generation_rate(generate, args.rows):10.0f}")
+
+    from django.db import connection
+
+    print(f"\n{args.rows} rows, batches of {args.batch}")
+    print(
+        f"{'storage':>8} {'generator':>10} {'rows/s':>10} "
+        f"{'table MB':>9} {'index MB':>9}"
+    )
+    with connection.cursor() as cursor:
+        for storage in STORAGE:
+            for generator in GENERATORS:
+                result = insert(cursor, storage, generator, args.rows, args.batch)
+                print(
+                    f"{storage:>8} {generator:>10} {result['rate']:10.0f} "
+                    f"{result['table_mb']:9.1f} {result['index_mb']:9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
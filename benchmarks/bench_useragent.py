@@ -0,0 +1,65 @@
+"""
+Micro-benchmark for tracking.useragent.parse_user_agent.
+
+    python benchmarks/bench_useragent.py [--iterations N]
+
+"cold" parses strings the cache has never seen (every call runs the
+matchers), "warm" replays a realistic mail-client mix against a filled cache.
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from tracking.useragent import parse_user_agent  # noqa: E402
+
+SAMPLES = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.2478.51",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko)",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/24.0 Chrome/117.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Thunderbird/125.0",
+    "Microsoft Office/16.0 (Windows NT 10.0; Microsoft Outlook 16.0.17531; Pro)",
+    "Mozilla/5.0 (Windows NT 5.1; rv:11.0) Gecko Firefox/11.0 (via ggpht.com GoogleImageProxy)",
+    "YahooMailProxy; https://help.yahoo.com/kb/yahoo-mail-proxy-SLN28749.html",
+    "python-requests/2.31.0",
+]
+
+
+def run(label: str, user_agents: list[str]) -> None:
+    started = time.perf_counter()
+    for user_agent in user_agents:
+        parse_user_agent(user_agent)
+    elapsed = time.perf_counter() - started
+    info = parse_user_agent.cache_info()
+    print(
+        f"{label:>5}: {len(user_agents) / elapsed:>12,.0f} parses/s "
+        f"(hits={info.hits}, misses={info.misses})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # unique strings so none of them can be served from the cache
+    cold = [
+        f"{SAMPLES[i % len(SAMPLES)]} build/{i}"
+        for i in range(min(args.iterations, 50_000))
+    ]
+    warm = [SAMPLES[i % len(SAMPLES)] for i in range(args.iterations)]
+
+    parse_user_agent.cache_clear()
+    run("cold", cold)
+    parse_user_agent.cache_clear()
+    run("warm", warm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import asyncio
+import atexit
+import collections
+import logging
+import os
+import threading
+import time
+import typing
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Bounded in-process buffer that collects items and hands them to ``flush``
+    in batches from a background thread.
+
+    A batch is flushed as soon as ``batch_size`` items are pending or
+    ``flush_interval`` seconds have passed since the last flush, whichever
+    comes first. When ``max_size`` items are pending, ``put`` applies
+    backpressure according to ``overflow``:
+
+        * ``"drop"``: reject the item immediately.
+        * ``"block"``: wait up to ``block_timeout`` seconds for room, then drop.
+
+    Async callers use ``aput``, which waits by yielding to the event loop
+    instead of blocking the thread that runs it.
+
+    Counters:
+        flushed (int): items handed to ``flush`` successfully.
+        dropped (int): items rejected because the buffer was full.
+        failed (int): items lost because ``flush`` raised.
+    """
+
+    DROP = "drop"
+    BLOCK = "block"
+
+    def __init__(
+        self,
+        flush: typing.Callable[[list], typing.Any],
+        name: str = "buffer",
+        max_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = DROP,
+        block_timeout: float = 0.05,
+    ):
+        if overflow not in (self.DROP, self.BLOCK):
+            raise ValueError(f"unknown overflow policy {overflow!r}")
+        self.flush_batch = flush
+        self.name = name
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._items: collections.deque = collections.deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._closing = False
+        atexit.register(self.close)
+
+    def put(self, item) -> bool:
+        """Add an item to the buffer. Returns False if it was dropped."""
+        if self._pid != os.getpid():
+            self._start()
+        with self._cond:
+            if len(self._items) >= self.max_size:
+                if self.overflow == self.DROP or not self._cond.wait_for(
+                    lambda: len(self._items) < self.max_size, self.block_timeout
+                ):
+                    self.dropped += 1
+                    return False
+            self._append(item)
+        return True
+
+    async def aput(self, item) -> bool:
+        """Like ``put``, for coroutines: never blocks the event loop."""
+        if self._pid != os.getpid():
+            self._start()
+        deadline = time.monotonic() + self.block_timeout
+        while True:
+            with self._cond:
+                if len(self._items) < self.max_size:
+                    self._append(item)
+                    return True
+                if self.overflow == self.DROP or time.monotonic() >= deadline:
+                    self.dropped += 1
+                    return False
+            await asyncio.sleep(self.block_timeout / 10)
+
+    def flush(self) -> None:
+        """Synchronously flush everything that is pending."""
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self) -> None:
+        """Stop the background thread and flush what is left."""
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(self.flush_interval * 2 + 5)
+        self._thread = None
+        self._pid = None
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._items),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def _start(self) -> None:
+        # Threads do not survive a fork, so every worker process starts its own
+        # and drops whatever the parent had buffered.
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._items.clear()
+            self._closing = False
+            self._thread = threading.Thread(
+                target=self._run, name=f"write-behind-{self.name}", daemon=True
+            )
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _append(self, item) -> None:
+        # callers hold self._cond
+        self._items.append(item)
+        if len(self._items) >= self.batch_size:
+            self._cond.notify_all()
+
+    def _take(self) -> list:
+        with self._cond:
+            count = min(len(self._items), self.batch_size)
+            batch = [self._items.popleft() for _ in range(count)]
+            self._cond.notify_all()
+        return batch
+
+    def _write(self, batch: list) -> None:
+        try:
+            self.flush_batch(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("%s: failed to flush %d items", self.name, len(batch))
+        else:
+            self.flushed += len(batch)
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closing or len(self._items) >= self.batch_size,
+                    max(deadline - time.monotonic(), 0),
+                )
+                if self._closing:
+                    return
+            if time.monotonic() >= deadline or len(self._items) >= self.batch_size:
+                batch = self._take()
+                if batch:
+                    self._write(batch)
+                deadline = time.monotonic() + self.flush_interval
+
+
+def mongo_bulk_insert(document_cls) -> typing.Callable[[list], int]:
+    """
+    Build a flush callable that writes mongoengine documents with a single
+    unordered ``insert_many``, so one bad document does not abort the batch.
+    Documents whose ``_id`` is already stored (e.g. written by an earlier
+    delivery of the same batch) are skipped silently.
+    """
+    from pymongo.errors import BulkWriteError
+
+    duplicate_key = 11000
+
+    def insert(documents: list) -> int:
+        collection = document_cls._get_collection()
+        try:
+            result = collection.insert_many(
+                [document.to_mongo() for document in documents], ordered=False
+            )
+        except BulkWriteError as exc:
+            inserted = exc.details.get("nInserted", 0)
+            rejected = [
+                error
+                for error in exc.details.get("writeErrors", [])
+                if error.get("code") != duplicate_key
+            ]
+            if rejected:
+                logger.warning(
+                    "%s: %d of %d documents rejected",
+                    document_cls.__name__,
+                    len(rejected),
+                    len(documents),
+                )
+            return inserted
+        return len(result.inserted_ids)
+
+    return insert
+
+
+def django_bulk_create(model, batch_size: int | None = None):
+    """Build a flush callable that writes model instances with ``bulk_create``."""
+
+    def create(instances: list) -> int:
+        return len(model.objects.bulk_create(instances, batch_size=batch_size))
+
+    return create
@@ -0,0 +1,28 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import ulid
+
+from common_library.db.fields import ULID_PATTERN
+
+
+class UlidConverter:
+    """
+    ``<ulid:uid>`` path segment, matched case-insensitively and passed to
+    the view in canonical (upper case) form, the one UlidField stores.
+    Malformed ids never reach a lookup, which a BinaryUlidField would reject.
+    """
+
+    regex = ULID_PATTERN
+
+    def to_python(self, value: str) -> str:
+        return ulid.from_str(value).str
+
+    def to_url(self, value: str) -> str:
+        return value
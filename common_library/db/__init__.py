@@ -1,4 +1,9 @@
-from common_library.db.fields import UlidField
+from common_library.db.fields import BinaryUlidField, UlidField
 from common_library.db.model import TimestampedULIDBaseModel, TimestampedBaseModel
 
-__all__ = ("UlidField", "TimestampedULIDBaseModel", "TimestampedBaseModel")
+__all__ = (
+    "BinaryUlidField",
+    "UlidField",
+    "TimestampedULIDBaseModel",
+    "TimestampedBaseModel",
+)
@@ -1,7 +1,22 @@
+import uuid
+
 import ulid
+from django.core import exceptions
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+# Crockford base32, the first character is at most 7 (128 bits)
+ULID_PATTERN = r"[0-7][0-9A-HJKMNP-TV-Za-hjkmnp-tv-z]{25}"
+
+
+def new_ulid() -> str:
+    """
+    A new ULID string. Ids generated in the same millisecond by this process
+    increase monotonically (the random part is incremented), so they are
+    inserted at the right edge of the index like auto-increment keys.
+    """
+    return ulid.monotonic.new().str
+
 
 class UlidField(models.CharField):
     description = _("Universally Unique Lexicographically Sortable Identifier")
@@ -16,7 +31,7 @@ class UlidField(models.CharField):
     def pre_save(self, model_instance, add):
         value = getattr(model_instance, self.attname)
         if not value:
-            value = ulid.new().str
+            value = new_ulid()
             setattr(model_instance, self.attname, value)
         return value
 
@@ -32,3 +47,72 @@ class UlidField(models.CharField):
         if kwargs.get("blank", None) is True:
             del kwargs["blank"]
         return name, path, args, kwargs
+
+
+class BinaryUlidField(models.UUIDField):
+    """
+    ULID stored in its 16-byte binary form: a native ``uuid`` column on
+    PostgreSQL (``char(32)`` elsewhere), instead of the 26-character text of
+    UlidField. In Python, querysets and the API it is the usual ULID string;
+    lookups accept ULID strings or UUIDs.
+
+    Converting an existing UlidField column: see ConvertUlidToBinary in
+    common_library.db.operations.
+    """
+
+    description = _("Universally Unique Lexicographically Sortable Identifier")
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("editable", False)
+        kwargs.setdefault("unique", True)
+        kwargs.setdefault("blank", True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get("editable", None) is False:
+            del kwargs["editable"]
+        if kwargs.get("unique", None) is True:
+            del kwargs["unique"]
+        if kwargs.get("blank", None) is True:
+            del kwargs["blank"]
+        return name, path, args, kwargs
+
+    def _to_ulid(self, value) -> ulid.ULID:
+        try:
+            if isinstance(value, uuid.UUID):
+                return ulid.from_uuid(value)
+            if isinstance(value, str) and len(value) == 26:
+                return ulid.from_str(value)
+            return ulid.from_uuid(uuid.UUID(value))
+        except (ValueError, TypeError, AttributeError):
+            raise exceptions.ValidationError(
+                self.error_messages["invalid"],
+                code="invalid",
+                params={"value": value},
+            )
+
+    def to_python(self, value):
+        if value is None or value == "":
+            return None
+        return self._to_ulid(value).str
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return ulid.from_uuid(value).str
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None or value == "":
+            return None
+        value = self._to_ulid(value).uuid
+        if connection.features.has_native_uuid_field:
+            return value
+        return value.hex
+
+    def pre_save(self, model_instance, add):
+        value = getattr(model_instance, self.attname)
+        if not value:
+            value = new_ulid()
+            setattr(model_instance, self.attname, value)
+        return value
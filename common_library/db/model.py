@@ -11,7 +11,7 @@ import uuid
 from django.db import models, transaction, IntegrityError
 from django.utils.translation import gettext_lazy as _
 
-from common_library.fields import UlidField
+from common_library.db.fields import UlidField
 
 
 # Separation of Concerns
@@ -40,7 +40,7 @@ class TimestampedULIDBaseModel(TimestampedBaseModel):
     unique public_key for external/public identification.
 
     Fields:
-        public_key (str): A unique, externally usable identifier (UUID-based).
+        uid (str): A unique, externally usable ULID.
 
     Methods:
         get_by_public_key(key): Retrieve an instance by its public_key.
@@ -0,0 +1,134 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import uuid
+
+import ulid
+from django.db import migrations
+
+# ULID text <-> uuid, used in the USING clause of ALTER COLUMN ... TYPE
+ULID_FUNCTIONS_SQL = """
+CREATE OR REPLACE FUNCTION ulid_to_uuid(value text) RETURNS uuid
+LANGUAGE plpgsql IMMUTABLE STRICT AS $$
+DECLARE
+    alphabet constant text := '0123456789ABCDEFGHJKMNPQRSTVWXYZ';
+    bits varbit := B'';
+    digit int;
+    hex text := '';
+BEGIN
+    IF length(value) <> 26 THEN
+        RAISE EXCEPTION 'invalid ULID: %', value;
+    END IF;
+    FOR i IN 1..26 LOOP
+        digit := strpos(alphabet, upper(substr(value, i, 1))) - 1;
+        IF digit < 0 THEN
+            RAISE EXCEPTION 'invalid ULID: %', value;
+        END IF;
+        bits := bits || digit::bit(5);
+    END LOOP;
+    -- 26 * 5 = 130 bits, the ULID is the low 128
+    FOR i IN 0..31 LOOP
+        hex := hex || to_hex(substring(bits FROM i * 4 + 3 FOR 4)::bit(4)::int);
+    END LOOP;
+    RETURN hex::uuid;
+END $$;
+
+CREATE OR REPLACE FUNCTION uuid_to_ulid(value uuid) RETURNS text
+LANGUAGE plpgsql IMMUTABLE STRICT AS $$
+DECLARE
+    alphabet constant text := '0123456789ABCDEFGHJKMNPQRSTVWXYZ';
+    bits varbit := B'00' || ('x' || replace(value::text, '-', ''))::bit(128);
+    result text := '';
+BEGIN
+    FOR i IN 0..25 LOOP
+        result := result
+            || substr(alphabet, substring(bits FROM i * 5 + 1 FOR 5)::bit(5)::int + 1, 1);
+    END LOOP;
+    RETURN result;
+END $$;
+"""
+
+
+class ConvertUlidToBinary(migrations.AlterField):
+    """
+    AlterField from a UlidField (26-character text) to a BinaryUlidField
+    (16 bytes) that converts the stored ids in place, and back when
+    unapplied::
+
+        ConvertUlidToBinary("campaign", "uid", BinaryUlidField())
+
+    On PostgreSQL the column is rewritten by a single ``ALTER COLUMN ...
+    TYPE uuid USING ulid_to_uuid(...)``, which also rebuilds its unique
+    index (and drops the text-only ``_like`` index). The table is locked
+    for the rewrite, run it in a maintenance window on large tables. Other
+    databases convert the values row by row after the column is altered.
+    """
+
+    reduces_to_sql = False
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._convert(
+            app_label,
+            schema_editor,
+            from_state,
+            to_state,
+            "ulid_to_uuid",
+            lambda value: ulid.from_str(value).uuid.hex,
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._convert(
+            app_label,
+            schema_editor,
+            from_state,
+            to_state,
+            "uuid_to_ulid",
+            lambda value: ulid.from_uuid(uuid.UUID(value)).str,
+        )
+
+    def _convert(
+        self, app_label, schema_editor, from_state, to_state, function, convert
+    ):
+        # AlterField.database_backwards runs database_forwards with the
+        # states swapped, which alters the column either way
+        def alter():
+            super(ConvertUlidToBinary, self).database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+        if schema_editor.connection.vendor == "postgresql":
+            # no params: the functions contain literal "%"
+            schema_editor.execute(ULID_FUNCTIONS_SQL, params=None)
+            # Django casts with "column::type", which cannot parse a ULID
+            schema_editor._using_sql = lambda new_field, old_field: (
+                f" USING {function}(%(column)s)"
+            )
+            try:
+                alter()
+            finally:
+                del schema_editor._using_sql
+            return
+
+        alter()
+        model = to_state.apps.get_model(app_label, self.model_name)
+        quote = schema_editor.quote_name
+        table = quote(model._meta.db_table)
+        column = quote(model._meta.get_field(self.name).column)
+        pk = quote(model._meta.pk.column)
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {pk}, {column} FROM {table} WHERE {column} IS NOT NULL"
+            )
+            rows = [(convert(value), key) for key, value in cursor.fetchall()]
+            cursor.executemany(
+                f"UPDATE {table} SET {column} = %s WHERE {pk} = %s", rows
+            )
+
+    def describe(self):
+        return f"Convert {self.model_name}.{self.name} to a binary ULID"
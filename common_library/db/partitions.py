@@ -0,0 +1,213 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+PostgreSQL declarative range partitioning of append-only log tables by a
+timestamp column.
+
+A partitioned table is split into one partition per day, week or month.
+Queries filtering on the column only scan the partitions of their range,
+the current partition stays small and in cache, and retention detaches or
+drops whole partitions instead of DELETEing rows: no bloat, no vacuum.
+Partitions are created ahead of time by ``create_ahead`` (there is no
+default partition, an insert past the last one fails), so run it well
+within the lead time it gives, e.g. from beat. After a pause it first
+fills the periods missed since the last partition, so late rows of those
+periods still have somewhere to go.
+"""
+
+import datetime
+import re
+
+from django.db import connection, transaction
+
+INTERVALS = ("day", "week", "month")
+
+
+class RangePartitioner:
+    def __init__(self, table: str, column: str = "created_time", interval="month"):
+        if interval not in INTERVALS:
+            raise ValueError(f"interval must be one of {INTERVALS}, not {interval!r}")
+        self.table = table
+        self.column = column
+        self.interval = interval
+
+    def period(self, moment: datetime.datetime) -> tuple:
+        """(start, end) of the partition period containing ``moment``, UTC."""
+        moment = moment.astimezone(datetime.UTC)
+        start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.interval == "day":
+            return start, start + datetime.timedelta(days=1)
+        if self.interval == "week":
+            start -= datetime.timedelta(days=start.weekday())
+            return start, start + datetime.timedelta(weeks=1)
+        start = start.replace(day=1)
+        return start, (start + datetime.timedelta(days=32)).replace(day=1)
+
+    def partition_name(self, start: datetime.datetime) -> str:
+        return f"{self.table}_p{start:%Y%m%d}"
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return connection.ops.quote_name(name)
+
+    @staticmethod
+    def _literal(moment: datetime.datetime) -> str:
+        # generated datetimes only, DDL takes no parameters
+        return f"'{moment.isoformat()}'"
+
+    def is_partitioned(self) -> bool:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+                [self._quote(self.table)],
+            )
+            row = cursor.fetchone()
+        return row is not None and row[0] == "p"
+
+    def partitions(self) -> list[tuple[str, datetime.datetime]]:
+        """(name, end) of every partition, oldest first."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname, (regexp_match("
+                "pg_get_expr(child.relpartbound, child.oid), 'TO \\(''([^'']+)''\\)'"
+                "))[1]::timestamptz AS partition_end "
+                "FROM pg_inherits JOIN pg_class child ON child.oid = inhrelid "
+                "WHERE inhparent = %s::regclass ORDER BY partition_end",
+                [self._quote(self.table)],
+            )
+            return cursor.fetchall()
+
+    def create_ahead(self, periods: int, now: datetime.datetime = None) -> list[str]:
+        """
+        Create the partitions from the end of the last one, or the current
+        period if there is none, up to the end of the ``periods``-th period
+        after the current one. Returns the names created.
+        """
+        now = now or datetime.datetime.now(datetime.UTC)
+        existing = self.partitions()
+        start, until = self.period(now)
+        for _ in range(periods):
+            _, until = self.period(until)
+        if existing:
+            # no gap after downtime: continue where the partitions end
+            start = existing[-1][1]
+        created = []
+        with connection.cursor() as cursor:
+            while start < until:
+                _, end = self.period(start)
+                name = self.partition_name(start)
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self._quote(name)} "
+                    f"PARTITION OF {self._quote(self.table)} FOR VALUES "
+                    f"FROM ({self._literal(start)}) TO ({self._literal(end)})"
+                )
+                created.append(name)
+                start = end
+        return created
+
+    def expire(
+        self,
+        retention: datetime.timedelta,
+        drop: bool = True,
+        now: datetime.datetime = None,
+    ) -> list[str]:
+        """
+        Detach the partitions holding only rows older than ``retention``,
+        and drop them unless ``drop`` is False (e.g. to archive them first).
+        Returns their names.
+        """
+        now = now or datetime.datetime.now(datetime.UTC)
+        expired = [name for name, end in self.partitions() if end <= now - retention]
+        with connection.cursor() as cursor:
+            for name in expired:
+                with transaction.atomic():
+                    cursor.execute(
+                        f"ALTER TABLE {self._quote(self.table)} "
+                        f"DETACH PARTITION {self._quote(name)}"
+                    )
+                    if drop:
+                        cursor.execute(f"DROP TABLE {self._quote(name)}")
+        return expired
+
+    @transaction.atomic
+    def convert(self, now: datetime.datetime = None) -> bool:
+        """
+        Turn the existing, ordinary table into a partitioned one, keeping
+        its rows: the old table becomes a ``<table>_legacy`` partition for
+        everything up to the end of the current period, expired like any
+        other partition once all of it is past retention.
+
+        The table is locked for the duration and its rows are scanned to
+        validate the partition bound and build the (id, column) primary
+        key, so run it in a maintenance window. Returns False if the table
+        is already partitioned.
+        """
+        if self.is_partitioned():
+            return False
+        now = now or datetime.datetime.now(datetime.UTC)
+        _, boundary = self.period(now)
+        table, column = self._quote(self.table), self._quote(self.column)
+        legacy = self._quote(f"{self.table}_legacy")
+        sequence = self._quote(f"{self.table}_row_seq")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+            cursor.execute(
+                f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS "
+                f"INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS) "
+                f"PARTITION BY RANGE ({column})"
+            )
+            # the id identity stays with the old table, continue it in a
+            # sequence of the partitioned one
+            cursor.execute(f"CREATE SEQUENCE {sequence}")
+            cursor.execute(
+                f"SELECT setval(%s, COALESCE(max(id), 0) + 1, false) FROM {legacy}",
+                [sequence],
+            )
+            cursor.execute(
+                f"ALTER TABLE {table} ALTER COLUMN id "
+                f"SET DEFAULT nextval('{sequence}'::regclass)"
+            )
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+            # unique keys of a partitioned table must include the column
+            cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {column})")
+
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'",
+                [legacy],
+            )
+            for name, definition in cursor.fetchall():
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT "
+                    f"{self._quote(name)} {definition}"
+                )
+            # unique indexes other than the primary key (e.g. on uid) are
+            # recreated as plain ones
+            cursor.execute(
+                "SELECT idx.relname, pg_get_indexdef(indexrelid) FROM pg_index "
+                "JOIN pg_class idx ON idx.oid = indexrelid "
+                "WHERE indrelid = %s::regclass AND NOT indisprimary",
+                [legacy],
+            )
+            for name, definition in cursor.fetchall():
+                method = re.search(r" USING .*$", definition).group(0)
+                cursor.execute(
+                    f"CREATE INDEX {self._quote(name[:59] + '_part')} "
+                    f"ON {table}{method}"
+                )
+
+            cursor.execute(
+                f"ALTER TABLE {legacy} ALTER COLUMN id DROP IDENTITY IF EXISTS"
+            )
+            cursor.execute(
+                f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+                f"FOR VALUES FROM (MINVALUE) TO ({self._literal(boundary)})"
+            )
+        return True
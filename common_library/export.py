@@ -0,0 +1,80 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Streaming NDJSON/CSV encoding of row iterators, for StreamingHttpResponse.
+
+Rows are pulled from a synchronous iterator (a queryset ``.iterator()`` or
+a MongoDB cursor) ``chunk_size`` at a time in the request's sync thread,
+encoded and sent before the next chunk is read: memory stays at one chunk
+whatever the number of rows. The body is an async iterator, so under ASGI
+Django streams it as it is produced instead of collecting a sync iterator
+into a list first.
+"""
+
+import csv
+import datetime
+import io
+import itertools
+import json
+from collections.abc import AsyncIterator, Iterator, Sequence
+
+from asgiref.sync import sync_to_async
+
+NDJSON = "ndjson"
+CSV = "csv"
+FORMATS = (NDJSON, CSV)
+CONTENT_TYPES = {NDJSON: "application/x-ndjson", CSV: "text/csv; charset=utf-8"}
+
+
+def _value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_ndjson(columns: Sequence[str], rows: list[tuple]) -> bytes:
+    dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+    return "".join(
+        dumps({column: _value(value) for column, value in zip(columns, row)}) + "\n"
+        for row in rows
+    ).encode()
+
+
+def encode_csv(columns: Sequence[str], rows: list[tuple]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([[_value(value) for value in row] for row in rows])
+    return buffer.getvalue().encode()
+
+
+ENCODERS = {NDJSON: encode_ndjson, CSV: encode_csv}
+
+
+async def stream_rows(
+    rows: Iterator[tuple],
+    columns: Sequence[str],
+    output: str,
+    chunk_size: int,
+) -> AsyncIterator[bytes]:
+    """
+    Encoded chunks of ``rows`` (tuples in ``columns`` order), preceded by a
+    header line for CSV. ``rows`` is only advanced in the thread-sensitive
+    sync thread, where its database cursor lives, and closed at the end or
+    when the client goes away.
+    """
+    encode = ENCODERS[output]
+    if output == CSV:
+        yield encode_csv(columns, [columns])
+    next_chunk = sync_to_async(
+        lambda: list(itertools.islice(rows, chunk_size)), thread_sensitive=True
+    )
+    try:
+        while chunk := await next_chunk():
+            yield encode(columns, chunk)
+    finally:
+        if hasattr(rows, "close"):
+            await sync_to_async(rows.close, thread_sensitive=True)()
@@ -1,7 +1,145 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class GlobalPageNumberPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks straight to the first row after the cursor
+    (``WHERE (uid, created_time) < (...) ORDER BY ... LIMIT n``) instead of
+    counting and skipping rows, so every page costs the same as the first.
+
+    Rows are ordered by ``ordering``, overridable per view with a
+    ``cursor_ordering`` attribute; the last field must make the order total.
+    Cursors are opaque base64 tokens holding the ordering values of the
+    boundary row of the page they came from.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering = ("-uid", "-created_time")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = getattr(view, "cursor_ordering", self.ordering)
+        self.fields = [
+            queryset.model._meta.get_field(f.lstrip("-")) for f in self.ordering
+        ]
+
+        cursor = self.decode_cursor(request)
+        backwards = bool(cursor and cursor[0])
+        ordering = [_flip(f) for f in self.ordering] if backwards else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(_seek(ordering, cursor[1]))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if backwards:
+            rows.reverse()
+
+        # a backwards page was reached from the page after it
+        has_next = True if backwards else has_more
+        has_previous = has_more if backwards else cursor is not None
+        self.next = self.values(rows[-1]) if rows and has_next else None
+        self.previous = self.values(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def values(self, row) -> list:
+        return [getattr(row, field.attname) for field in self.fields]
+
+    def encode_cursor(self, backwards: bool, values: list) -> str:
+        # DjangoJSONEncoder truncates datetimes to milliseconds, which would
+        # land the cursor between rows
+        values = [
+            v.isoformat() if isinstance(v, datetime.datetime) else v for v in values
+        ]
+        payload = json.dumps([int(backwards), values], cls=DjangoJSONEncoder)
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            backwards, values = json.loads(payload)
+            if len(values) != len(self.fields):
+                raise ValueError
+            values = [field.to_python(v) for field, v in zip(self.fields, values)]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return bool(backwards), values
+
+    def get_next_link(self):
+        if self.next is None:
+            return None
+        return self.encode_cursor(False, self.next)
+
+    def get_previous_link(self):
+        if self.previous is None:
+            return None
+        return self.encode_cursor(True, self.previous)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        link = {"type": "string", "nullable": True, "format": "uri"}
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {"next": link, "previous": link, "results": schema},
+        }
+
+
+def _flip(field: str) -> str:
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _seek(ordering, values) -> Q:
+    """Rows strictly after ``values`` in ``ordering`` (row value comparison)."""
+    after = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        clause = Q(**{f"{name}__{lookup}": values[index]})
+        for previous, value in zip(ordering[:index], values[:index]):
+            clause &= Q(**{previous.lstrip("-"): value})
+        after |= clause
+    return after
@@ -0,0 +1,21 @@
+import os
+
+import redis
+from django.conf import settings
+
+_client: redis.Redis | None = None
+_client_pid: int | None = None
+
+
+def get_redis() -> redis.Redis:
+    """
+    Return the process-wide Redis client for ``settings.REDIS_URL``.
+
+    The client (and its connection pool) is rebuilt after a fork so worker
+    processes never share sockets with their parent.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+        _client_pid = os.getpid()
+    return _client
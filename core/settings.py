@@ -157,6 +157,23 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
     },
+    # cold archive of MailEventLog, see tracking.archive. Local directory by
+    # default, or e.g. storages.backends.s3boto3.S3Boto3Storage with a key
+    # prefix as location.
+    "event-archive": {
+        "BACKEND": config(
+            "TRACKING_ARCHIVE_STORAGE",
+            cast=str,
+            default="django.core.files.storage.FileSystemStorage",
+        ),
+        "OPTIONS": {
+            "location": config(
+                "TRACKING_ARCHIVE_LOCATION",
+                cast=str,
+                default=str(BASE_DIR / "data" / "archive"),
+            ),
+        },
+    },
 }
 
 # Email Config
@@ -175,9 +192,72 @@ EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", cast=str)
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", cast=str)
 
 
+# Mailer
+MAILER_BULK_MAX_MAILS = config("MAILER_BULK_MAX_MAILS", cast=int, default=10_000)
+MAILER_BULK_BATCH_SIZE = 1_000  # rows per INSERT of a bulk mail request
+# scheduled mails claimed per transaction by dispatch_due_mails, and how
+# long one sweep may run
+MAILER_SCHEDULE_SWEEP_BATCH_SIZE = config(
+    "MAILER_SCHEDULE_SWEEP_BATCH_SIZE", cast=int, default=1_000
+)
+MAILER_SCHEDULE_SWEEP_BUDGET = config(
+    "MAILER_SCHEDULE_SWEEP_BUDGET", cast=float, default=30.0
+)
+# seconds after which the sweep dispatches an immediate mail still PENDING
+# (its dispatch on commit failed), and recovers a QUEUED mail whose task
+# never ran (lost publish or task); the latter must exceed how long a task
+# can wait in the broker, or a mail still waiting is sent twice
+MAILER_DISPATCH_GRACE = config("MAILER_DISPATCH_GRACE", cast=int, default=60)
+MAILER_QUEUED_TIMEOUT = config("MAILER_QUEUED_TIMEOUT", cast=int, default=60 * 60)
+# mails sent by one send_email_batch task, over one SMTP connection
+MAILER_SEND_BATCH_SIZE = config("MAILER_SEND_BATCH_SIZE", cast=int, default=100)
+# sent/failed statuses are committed every this many mails of a batch, so a
+# worker lost mid-batch resends at most this many once the batch is retried
+MAILER_SEND_STATUS_SLICE = config("MAILER_SEND_STATUS_SLICE", cast=int, default=10)
+# sends per second and burst allowed per recipient domain, as
+# "domain=rate:burst,..." (e.g. "gmail.com=20:40,outlook.com=10:20"); other
+# domains get the default. See mailer.throttle.
+MAILER_DOMAIN_RATES = config(
+    "MAILER_DOMAIN_RATES",
+    cast=lambda v: {
+        domain.strip().lower(): (
+            float(limits.partition(":")[0]),
+            int(limits.partition(":")[2]),
+        )
+        for domain, limits in (item.split("=", 1) for item in v.split(",") if item)
+    },
+    default="",
+)
+MAILER_DEFAULT_DOMAIN_RATE = config(
+    "MAILER_DEFAULT_DOMAIN_RATE", cast=float, default=10.0
+)
+MAILER_DEFAULT_DOMAIN_BURST = config(
+    "MAILER_DEFAULT_DOMAIN_BURST", cast=int, default=20
+)
+# send_email_batch tasks published per celery group
+MAILER_DISPATCH_CHUNK_SIZE = config("MAILER_DISPATCH_CHUNK_SIZE", cast=int, default=100)
+# batches rate limited further ahead than this (seconds) wait in Redis and
+# are published by dispatch_due_mails, see mailer.dispatch; keep it well
+# below CELERY_BROKER_TRANSPORT_OPTIONS["visibility_timeout"]
+MAILER_DISPATCH_MAX_ETA = config("MAILER_DISPATCH_MAX_ETA", cast=int, default=300)
+# SMTP connections kept open per worker process, shared by its
+# send_email_batch tasks (size it to the worker concurrency, e.g. gevent greenlets)
+MAILER_SMTP_POOL_SIZE = config("MAILER_SMTP_POOL_SIZE", cast=int, default=10)
+MAILER_SMTP_IDLE_TIMEOUT = config("MAILER_SMTP_IDLE_TIMEOUT", cast=float, default=60.0)
+# reconnect after this many messages, many servers cap a session (0: never)
+MAILER_SMTP_MAX_MESSAGES = config("MAILER_SMTP_MAX_MESSAGES", cast=int, default=100)
+# compiled campaign templates kept per worker process, see mailer.templating
+MAILER_TEMPLATE_CACHE_SIZE = config("MAILER_TEMPLATE_CACHE_SIZE", cast=int, default=256)
+
 # DRF CONFIG
+# "cursor" pages by keyset (no COUNT(*), no OFFSET), "page-number" by
+# ?page=n; views pick their cursor ordering with ``cursor_ordering``.
+API_PAGINATION = config("API_PAGINATION", cast=str, default="cursor")
 REST_FRAMEWORK = {
-    "DEFAULT_PAGINATION_CLASS": "common_library.pagination.GlobalPageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": {
+        "cursor": "common_library.pagination.KeysetPagination",
+        "page-number": "common_library.pagination.GlobalPageNumberPagination",
+    }[API_PAGINATION],
 }
 APPEND_SLASH = False
 
@@ -211,3 +291,187 @@ CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+# Redis delivers a task again when it is not acknowledged within the
+# visibility timeout, ETA tasks included: it must exceed the longest ETA,
+# MAILER_DISPATCH_MAX_ETA, by a wide margin or they run twice
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "visibility_timeout": MAILER_DISPATCH_MAX_ETA + 60 * 60,
+}
+CELERY_BEAT_SCHEDULE = {
+    "consume-tracking-stream": {
+        "task": "tracking.tasks.consume_tracking_stream",
+        "schedule": config("TRACKING_STREAM_CONSUME_INTERVAL", cast=float, default=5.0),
+    },
+    "dispatch-due-mails": {
+        "task": "mailer.tasks.dispatch_due_mails",
+        "schedule": config("MAILER_SCHEDULE_SWEEP_INTERVAL", cast=float, default=10.0),
+    },
+    "archive-event-logs": {
+        "task": "tracking.tasks.archive_event_logs",
+        "schedule": 60 * 60,
+    },
+    "maintain-tracker-log-partitions": {
+        "task": "tracking.tasks.maintain_log_partitions",
+        "schedule": 60 * 60,
+    },
+}
+
+# Redis, used directly (outside of celery) by the tracking ingest pipeline
+REDIS_URL = config("REDIS_URL", cast=str, default="redis://localhost:6379/2")
+
+# Cache
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("CACHE_URL", cast=str, default="redis://localhost:6379/3"),
+    },
+}
+
+# Analytics
+# lifetime of the per-bucket unique visitor HyperLogLogs, see analytics.hll
+ANALYTICS_HLL_HOURLY_TTL = config(
+    "ANALYTICS_HLL_HOURLY_TTL", cast=int, default=35 * 24 * 60 * 60
+)
+ANALYTICS_HLL_DAILY_TTL = config(
+    "ANALYTICS_HLL_DAILY_TTL", cast=int, default=400 * 24 * 60 * 60
+)
+ANALYTICS_CACHE_ALIAS = "default"
+# event series whose range ended more than ANALYTICS_SERIES_INGEST_LAG ago
+# never change
+ANALYTICS_SERIES_CACHE_TTL = config(
+    "ANALYTICS_SERIES_CACHE_TTL", cast=int, default=24 * 60 * 60
+)
+# seconds a hit may take from the request to MailEventLog: buffered, then
+# consumed from the stream and redelivered when a write fails
+ANALYTICS_SERIES_INGEST_LAG = config(
+    "ANALYTICS_SERIES_INGEST_LAG", cast=int, default=10 * 60
+)
+ANALYTICS_SERIES_LIVE_CACHE_TTL = config(
+    "ANALYTICS_SERIES_LIVE_CACHE_TTL", cast=int, default=60
+)
+# rows fetched per cursor round trip and encoded per response chunk by the
+# log exports
+ANALYTICS_EXPORT_CHUNK_SIZE = config(
+    "ANALYTICS_EXPORT_CHUNK_SIZE", cast=int, default=2_000
+)
+
+# Tracking
+# public origin of the tracking endpoints, used in the links and pixel
+# written into sent mails
+TRACKING_BASE_URL = config(
+    "TRACKING_BASE_URL", cast=str, default="http://localhost:8000"
+)
+# "stream": web workers publish hits to a Redis stream consumed by celery,
+# "direct": web workers write hits to MongoDB themselves.
+TRACKING_INGEST_BACKEND = config("TRACKING_INGEST_BACKEND", cast=str, default="stream")
+TRACKING_STREAM_NAME = "tracking:hits"
+TRACKING_STREAM_GROUP = "tracking-ingest"
+TRACKING_STREAM_MAX_LENGTH = config(
+    "TRACKING_STREAM_MAX_LENGTH", cast=int, default=1_000_000
+)
+TRACKING_STREAM_BATCH_SIZE = config("TRACKING_STREAM_BATCH_SIZE", cast=int, default=500)
+# entries left unacknowledged this long are reclaimed by another consumer
+TRACKING_STREAM_CLAIM_IDLE_MS = config(
+    "TRACKING_STREAM_CLAIM_IDLE_MS", cast=int, default=60_000
+)
+# seconds a single consume_tracking_stream run may spend draining the stream
+TRACKING_STREAM_CONSUME_BUDGET = config(
+    "TRACKING_STREAM_CONSUME_BUDGET", cast=float, default=5.0
+)
+# entries that cannot be decoded, or still fail to persist after this many
+# deliveries, are moved to the dead-letter stream, see tracking.tasks
+TRACKING_STREAM_DEAD_LETTER_NAME = "tracking:hits:dead"
+TRACKING_STREAM_MAX_DELIVERIES = config(
+    "TRACKING_STREAM_MAX_DELIVERIES", cast=int, default=5
+)
+# signing keys for event keys, see tracking.tokens. format: "<id>:<secret>,...".
+# Rotate by adding a new id and pointing TRACKING_SIGNING_KEY_ID at it, old
+# keys keep verifying until they are removed from the list.
+TRACKING_SIGNING_KEYS = config(
+    "TRACKING_SIGNING_KEYS",
+    cast=lambda v: {
+        int(key_id): secret
+        for key_id, secret in (item.split(":", 1) for item in v.split(",") if item)
+    },
+    default=f"0:{SECRET_KEY}",
+)
+TRACKING_SIGNING_KEY_ID = config(
+    "TRACKING_SIGNING_KEY_ID", cast=int, default=max(TRACKING_SIGNING_KEYS)
+)
+# RedirectLinkTracker.uid -> redirect_to cache, see tracking.redirects
+TRACKING_REDIRECT_CACHE_ALIAS = "default"
+TRACKING_REDIRECT_CACHE_SIZE = config(
+    "TRACKING_REDIRECT_CACHE_SIZE", cast=int, default=50_000
+)
+# bounds how long other processes may serve a redirect after it changed
+TRACKING_REDIRECT_CACHE_LOCAL_TTL = config(
+    "TRACKING_REDIRECT_CACHE_LOCAL_TTL", cast=float, default=30.0
+)
+TRACKING_REDIRECT_CACHE_SHARED_TTL = config(
+    "TRACKING_REDIRECT_CACHE_SHARED_TTL", cast=int, default=24 * 60 * 60
+)
+# compiled GeoIP range table, rebuild with `manage.py build_geoip <csv>`
+GEOIP_DATABASE_PATH = config(
+    "GEOIP_DATABASE_PATH", cast=str, default=str(BASE_DIR / "data" / "geoip.bin")
+)
+# what to do with hits from image proxies, scanners and bots, see
+# tracking.botfilter: "store" full rows flagged is_bot, "aggregate" them into
+# MailEvent.bot_hits only, or "drop" them.
+TRACKING_BOT_POLICY = config("TRACKING_BOT_POLICY", cast=str, default="aggregate")
+# extra comma separated CIDR blocks / user agent regexes to treat as bots
+TRACKING_BOT_NETWORKS = config(
+    "TRACKING_BOT_NETWORKS",
+    cast=lambda v: [x.strip() for x in v.split(",") if x.strip()],
+    default="",
+)
+TRACKING_BOT_USER_AGENTS = config(
+    "TRACKING_BOT_USER_AGENTS",
+    cast=lambda v: [x.strip() for x in v.split(",") if x.strip()],
+    default="",
+)
+# request headers kept with tracker hits (case-insensitive), each distinct
+# set stored once, see tracking.headers
+TRACKING_HEADER_WHITELIST = config(
+    "TRACKING_HEADER_WHITELIST",
+    cast=lambda v: [x.strip() for x in v.split(",") if x.strip()],
+    default="Accept,Accept-Encoding,Accept-Language,DNT,Sec-CH-UA,"
+    "Sec-CH-UA-Mobile,Sec-CH-UA-Platform,Sec-Fetch-Dest,Sec-Fetch-Mode,"
+    "Sec-Fetch-Site,Via",
+)
+TRACKING_HEADER_SET_CACHE_SIZE = config(
+    "TRACKING_HEADER_SET_CACHE_SIZE", cast=int, default=10_000
+)
+# tracker log tables are range partitioned by created_time ("day", "week" or
+# "month"), partitions are created this many periods ahead and detached
+# (then dropped, unless the action is "detach") once older than the
+# retention, 0 keeps them forever. See common_library.db.partitions.
+TRACKING_LOG_PARTITION_INTERVAL = config(
+    "TRACKING_LOG_PARTITION_INTERVAL", cast=str, default="month"
+)
+TRACKING_LOG_PARTITIONS_AHEAD = config(
+    "TRACKING_LOG_PARTITIONS_AHEAD", cast=int, default=3
+)
+TRACKING_LOG_RETENTION_DAYS = config("TRACKING_LOG_RETENTION_DAYS", cast=int, default=0)
+TRACKING_LOG_RETENTION_ACTION = config(
+    "TRACKING_LOG_RETENTION_ACTION", cast=str, default="drop"
+)
+# MailEventLog documents expire this many days after created_time through a
+# TTL index (0: kept forever), after being archived once older than
+# TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS (0: no archive). Apply a TTL change
+# to an existing collection with `manage.py event_log_ttl`.
+TRACKING_EVENT_LOG_TTL_DAYS = config("TRACKING_EVENT_LOG_TTL_DAYS", cast=int, default=0)
+TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS = config(
+    "TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS", cast=int, default=0
+)
+# documents per archive file
+TRACKING_EVENT_LOG_ARCHIVE_CHUNK_SIZE = config(
+    "TRACKING_EVENT_LOG_ARCHIVE_CHUNK_SIZE", cast=int, default=100_000
+)
+# write-behind buffers for tracking hits, see common_library.buffer
+TRACKING_BUFFER_MAX_SIZE = config("TRACKING_BUFFER_MAX_SIZE", cast=int, default=10_000)
+TRACKING_BUFFER_BATCH_SIZE = config("TRACKING_BUFFER_BATCH_SIZE", cast=int, default=500)
+TRACKING_BUFFER_FLUSH_INTERVAL = config(
+    "TRACKING_BUFFER_FLUSH_INTERVAL", cast=float, default=1.0
+)
+# "drop" or "block"
+TRACKING_BUFFER_OVERFLOW = config("TRACKING_BUFFER_OVERFLOW", cast=str, default="drop")
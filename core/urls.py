@@ -23,4 +23,5 @@ urlpatterns = [
     path("mail/", include("mailer.urls")),
     path("attachment/", include("attachments.urls")),
     path("hocks/", include("tracking.urls")),
+    path("analytics/", include("analytics.urls")),
 ]
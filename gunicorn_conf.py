@@ -1,8 +1,20 @@
 import multiprocessing
 
 bind = "0.0.0.0:8000"
+# the tracking endpoints are async views, serve the ASGI app so they run
+# on the event loop instead of a thread per request.
+wsgi_app = "core.asgi:application"
+# uvicorn.workers is deprecated, the worker lives in the uvicorn-worker package
+worker_class = "uvicorn_worker.UvicornWorker"
 workers = multiprocessing.cpu_count() * 2 + 1
 timeout = 120
 keepalive = 30
 accesslog = "-"
 errorlog = "-"
+
+
+def worker_exit(server, worker):
+    # flush buffered tracking hits before the worker goes away
+    from tracking.recorder import shutdown
+
+    shutdown()
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from mailer.models import Mail, CarbonCopy
+from mailer.models import Campaign, Mail, CarbonCopy
 
 admin.site.register(Mail)
 admin.site.register(CarbonCopy)
+admin.site.register(Campaign)
@@ -0,0 +1,168 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Publishing of rate limited send_email_batch tasks.
+
+Every batch gets the send time its domain's budget allows, which can be
+hours away for a large campaign. Batches due within
+``MAILER_DISPATCH_MAX_ETA`` seconds are published as ETA tasks; the others
+wait in a Redis sorted set scored by their send time, and
+dispatch_due_mails releases them to the broker once they are that close.
+Workers never hold more than a few minutes of reserved tasks, and no ETA
+comes near the broker's visibility timeout, past which Redis would deliver
+an unacknowledged task a second time.
+"""
+
+import datetime
+import itertools
+import json
+import time
+
+from celery import group, signature
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from redis.commands.core import Script
+
+from common_library.redis import get_redis
+from mailer.models import Mail, MailStatus
+from mailer.tasks import send_email_batch
+from mailer.throttle import domain_limiter, recipient_domain
+
+DEFERRED_KEY = "mailer:dispatch:deferred"
+
+# KEYS[1]: deferred set
+# ARGV: latest score released, maximum number of batches
+# returns the released members and their scores, removed from the set in
+# the same step so concurrent sweepers never release a batch twice
+RELEASE_SCRIPT = """
+local released = redis.call(
+    'ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2]
+)
+for i = 1, #released, 2 do
+    redis.call('ZREM', KEYS[1], released[i])
+end
+return released
+"""
+_release = Script(None, RELEASE_SCRIPT.encode())
+
+
+def publish(batches) -> list:
+    """
+    Publish ``(signature, send_at)`` pairs, ``send_at`` in epoch seconds:
+    as ETA tasks in groups of ``MAILER_DISPATCH_CHUNK_SIZE`` over one broker
+    connection each, or into the deferred set when they are due later than
+    ``MAILER_DISPATCH_MAX_ETA`` from now. Returns the deferred pairs.
+    """
+    horizon = time.time() + settings.MAILER_DISPATCH_MAX_ETA
+    due, deferred = [], {}
+    for batch, send_at in batches:
+        if send_at <= horizon:
+            due.append(
+                batch.set(eta=datetime.datetime.fromtimestamp(send_at, datetime.UTC))
+            )
+        else:
+            deferred[json.dumps(dict(batch), sort_keys=True)] = (batch, send_at)
+    if deferred:
+        get_redis().zadd(
+            DEFERRED_KEY, {member: send_at for member, (_, send_at) in deferred.items()}
+        )
+    for chunk in itertools.batched(due, settings.MAILER_DISPATCH_CHUNK_SIZE):
+        group(chunk).apply_async()
+    return list(deferred.values())
+
+
+def release_deferred() -> int:
+    """
+    Publish the deferred batches due within ``MAILER_DISPATCH_MAX_ETA``,
+    oldest first. Returns the number released.
+    """
+    horizon = time.time() + settings.MAILER_DISPATCH_MAX_ETA
+    released = 0
+    while True:
+        members = _release(
+            keys=[DEFERRED_KEY],
+            args=[horizon, settings.MAILER_DISPATCH_CHUNK_SIZE],
+            client=get_redis(),
+        )
+        if not members:
+            return released
+        publish(
+            (signature(json.loads(member)), float(send_at))
+            for member, send_at in itertools.batched(members, 2)
+        )
+        released += len(members) // 2
+
+
+def claim_mails(mails, limit: int = None) -> list:
+    """
+    Mark the ``mails`` queryset QUEUED, at most ``limit`` of them, skipping
+    rows another transaction is claiming, and return them. The claim is
+    committed before anything is published: a publish that fails half way
+    leaves QUEUED mails that dispatch_due_mails recovers once their
+    ``queued_time`` is ``MAILER_QUEUED_TIMEOUT`` old, rather than PENDING
+    mails the next sweep would publish a second time.
+    """
+    with transaction.atomic():
+        claimed = list(
+            mails.select_for_update(skip_locked=True).only(
+                "id", "recipient", "scheduled_time"
+            )[:limit]
+        )
+        Mail.objects.filter(id__in=[mail.id for mail in claimed]).update(
+            status=MailStatus.QUEUED, queued_time=timezone.now()
+        )
+    return claimed
+
+
+def queue_mails(mails) -> None:
+    """
+    Queue delivery of claimed ``mails`` as ``send_email_batch`` tasks, one
+    batch of mail ids per recipient domain and at most
+    ``MAILER_SEND_BATCH_SIZE`` (or the domain's burst) mails. Every batch is
+    published for the time the domain's rate limit allows it, see
+    mailer.throttle, which becomes the ``queued_time`` of its mails.
+    """
+    batches = {}
+    for mail in mails:
+        batches.setdefault(recipient_domain(mail.recipient), []).append(mail.id)
+
+    reserved = []
+    for domain, mail_ids in batches.items():
+        _, burst = domain_limiter.limits(domain)
+        for batch in itertools.batched(
+            mail_ids, max(min(settings.MAILER_SEND_BATCH_SIZE, burst), 1)
+        ):
+            send_at = domain_limiter.reserve(domain, len(batch))
+            reserved.append((send_email_batch.s(list(batch), domain=domain), send_at))
+        domain_limiter.add_queued(domain, len(mail_ids))
+    for batch, send_at in publish(reserved):
+        # not stale until MAILER_QUEUED_TIMEOUT after they are published
+        Mail.objects.filter(id__in=batch.args[0]).update(
+            queued_time=datetime.datetime.fromtimestamp(send_at, datetime.UTC)
+        )
+
+
+def dispatch_mails(mails) -> None:
+    """
+    Claim and queue the due ``mails``, e.g. right after they are created.
+
+    Mails scheduled for later are skipped: dispatch_due_mails picks them up
+    from the database once they are due, like any mail whose dispatch here
+    failed.
+    """
+    now = timezone.now()
+    due = [
+        mail.id
+        for mail in mails
+        if not (mail.scheduled_time and mail.scheduled_time > now)
+    ]
+    if due:
+        queue_mails(
+            claim_mails(Mail.objects.filter(id__in=due, status=MailStatus.PENDING))
+        )
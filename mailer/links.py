@@ -0,0 +1,117 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import html
+import itertools
+from collections.abc import Iterable
+
+from bson import ObjectId
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+
+from common_library.db.fields import new_ulid
+from mailer.models import RedirectLinkTracker
+from mailer.mongodb_models import MailEvent
+from mailer.rewriter import iter_chunks, rewrite_html
+from tracking.redirects import redirect_cache
+from tracking.tokens import sign_event
+
+
+class LinkTracking:
+    """
+    Rewrites the bodies of a batch of mails and creates what their tracked
+    links need in bulk.
+
+    Every tracked link of a mail is one RedirectLinkTracker, keyed by the
+    mail and the link's position in the body. The trackers the mails already
+    have, from an earlier attempt at the batch, are loaded up front and
+    reused, so a retried batch creates no new ones; the uids of new ones are
+    generated up front so the signed click URLs can be written during the
+    single rewrite pass. ``save()`` then inserts all new trackers and any
+    missing link-click events at once. Call it before sending.
+    """
+
+    def __init__(self, events: Iterable[MailEvent], mail_ids: Iterable[int] = ()):
+        self.events = {}
+        for event in events:
+            self.events.setdefault((event.sql_mail_id, event.event_type), event)
+        self.existing: dict[tuple[int, int], RedirectLinkTracker] = {
+            (tracker.mail_id, tracker.position): tracker
+            for tracker in RedirectLinkTracker.objects.filter(mail_id__in=mail_ids)
+        }
+        self.trackers: list[RedirectLinkTracker] = []
+        self.changed: list[RedirectLinkTracker] = []
+        self.new_events: list[MailEvent] = []
+        self.base_url = settings.TRACKING_BASE_URL.rstrip("/")
+        self.url_max_length = RedirectLinkTracker._meta.get_field(
+            "redirect_to"
+        ).max_length
+
+    def _event(self, mail_id: int, event_type: str) -> MailEvent:
+        event = self.events.get((mail_id, event_type))
+        if event is None:
+            event = MailEvent(id=ObjectId(), sql_mail_id=mail_id, event_type=event_type)
+            self.events[(mail_id, event_type)] = event
+            self.new_events.append(event)
+        return event
+
+    def _tracker(self, mail_id: int, position: int, href: str) -> RedirectLinkTracker:
+        tracker = self.existing.get((mail_id, position))
+        if tracker is None:
+            tracker = RedirectLinkTracker(
+                uid=new_ulid(),
+                redirect_to=href,
+                title=href[:256],
+                mail_id=mail_id,
+                position=position,
+            )
+            self.trackers.append(tracker)
+        elif tracker.redirect_to != href:
+            # the body changed since the tracker was created, e.g. the
+            # campaign template was edited; the old link was never sent
+            tracker.redirect_to, tracker.title = href, href[:256]
+            self.changed.append(tracker)
+        return tracker
+
+    def url(self, view_name: str, event: MailEvent, redirect_uid=None) -> str:
+        key = sign_event(event, redirect_uid)
+        return f"{self.base_url}{reverse(view_name, args=(key,))}"
+
+    def rewrite(self, mail) -> str:
+        """Tracked HTML body of ``mail``."""
+
+        positions = itertools.count()
+
+        def link_url(href: str) -> str | None:
+            if len(href) > self.url_max_length:
+                return None
+            tracker = self._tracker(mail.id, next(positions), href)
+            event = self._event(mail.id, MailEvent.LINK_CLICK)
+            return self.url("link-click", event, tracker.uid)
+
+        pixel = '<img src="{}" width="1" height="1" alt="" style="border:0">'.format(
+            html.escape(self.url("web-hock", self._event(mail.id, MailEvent.OPEN)))
+        )
+        return "".join(rewrite_html(iter_chunks(mail.body), link_url, pixel))
+
+    def save(self) -> None:
+        trackers = []
+        if self.trackers:
+            trackers += RedirectLinkTracker.objects.bulk_create(self.trackers)
+        if self.changed:
+            RedirectLinkTracker.objects.bulk_update(
+                self.changed, ["redirect_to", "title"]
+            )
+            trackers += self.changed
+        if trackers:
+            # bulk writes send no post_save, warm the redirect cache here
+            transaction.on_commit(lambda: redirect_cache.warm(*trackers))
+        if self.new_events:
+            MailEvent.objects.insert(self.new_events, load_bulk=False)
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailer", "0001_initial"),
+    ]
+
+    operations = [
+        # keyset pagination of the mail list, see ListCreateMailView
+        migrations.AddIndex(
+            model_name="mail",
+            index=models.Index(
+                fields=["-created_time", "-id"], name="mail_created_time_id_idx"
+            ),
+        ),
+    ]
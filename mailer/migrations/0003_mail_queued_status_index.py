@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailer", "0002_mail_created_time_id_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="mail",
+            name="status",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (1, "Pending"),
+                    (2, "Sent"),
+                    (3, "Failed"),
+                    (4, "Unknown"),
+                    (5, "Queued"),
+                ],
+                default=1,
+            ),
+        ),
+        # due mail lookups of dispatch_due_mails
+        migrations.AddIndex(
+            model_name="mail",
+            index=models.Index(
+                fields=["status", "scheduled_time"], name="mail_status_scheduled_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,98 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import common_library.db.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailer", "0003_mail_queued_status_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Campaign",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_time",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="created time"
+                    ),
+                ),
+                (
+                    "modified_time",
+                    models.DateTimeField(auto_now=True, verbose_name="modified time"),
+                ),
+                ("uid", common_library.db.fields.UlidField()),
+                (
+                    "title",
+                    models.CharField(
+                        help_text="Descriptive title of the campaign.", max_length=256
+                    ),
+                ),
+                (
+                    "subject",
+                    models.CharField(
+                        help_text="Template of the subject of every mail.",
+                        max_length=256,
+                    ),
+                ),
+                (
+                    "body",
+                    models.TextField(
+                        help_text="Template of the HTML body of every mail."
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "campaign",
+                "verbose_name_plural": "campaigns",
+                "db_table": "mail-campaign",
+            },
+        ),
+        # mails of a campaign store their template variables only, subject
+        # and body stay empty
+        migrations.AddField(
+            model_name="mail",
+            name="campaign",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="mails",
+                to="mailer.campaign",
+                verbose_name="campaign",
+            ),
+        ),
+        migrations.AddField(
+            model_name="mail",
+            name="context",
+            field=models.JSONField(
+                blank=True, default=dict, verbose_name="template variables"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="mail",
+            name="subject",
+            field=models.CharField(
+                blank=True, default="", max_length=256, verbose_name="subject"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="mail",
+            name="body",
+            field=models.CharField(
+                blank=True, default="", max_length=8096, verbose_name="body"
+            ),
+        ),
+    ]
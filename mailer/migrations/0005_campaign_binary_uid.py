@@ -0,0 +1,19 @@
+from django.db import migrations
+
+import common_library.db.fields
+import common_library.db.operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailer", "0004_campaign"),
+    ]
+
+    operations = [
+        common_library.db.operations.ConvertUlidToBinary(
+            model_name="campaign",
+            name="uid",
+            field=common_library.db.fields.BinaryUlidField(),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailer", "0005_campaign_binary_uid"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mail",
+            name="queued_time",
+            field=models.DateTimeField(
+                blank=True,
+                null=True,
+                help_text="When the mail was, or is due to be, handed to the broker.",
+                verbose_name="queued time",
+            ),
+        ),
+        # stale claim lookups of dispatch_due_mails
+        migrations.AddIndex(
+            model_name="mail",
+            index=models.Index(
+                fields=["status", "queued_time"], name="mail_status_queued_idx"
+            ),
+        ),
+    ]
@@ -13,12 +13,52 @@ from django.contrib.auth import get_user_model
 
 
 from taggit.managers import TaggableManager
-from common_library.db import TimestampedULIDBaseModel, UlidField
+from common_library.db import BinaryUlidField, TimestampedULIDBaseModel, UlidField
 
 
 User = get_user_model()
 
 
+class MailStatus(models.IntegerChoices):
+    """Delivery status of a Mail, stored in ``Mail.status``."""
+
+    PENDING = 1, _("Pending")
+    SENT = 2, _("Sent")
+    FAILED = 3, _("Failed")
+    UNKNOWN = 4, _("Unknown")
+    # claimed by dispatch_due_mails and handed to send_email_batch
+    QUEUED = 5, _("Queued")
+
+
+class Campaign(TimestampedULIDBaseModel):
+    """
+    Subject and body templates shared by the mails of a campaign.
+
+    The templates use the Django template language; each mail of the
+    campaign only stores its own variables (``Mail.context``) and is
+    rendered when it is sent, see mailer.templating.
+    """
+
+    title = models.CharField(
+        max_length=256, help_text="Descriptive title of the campaign."
+    )
+    subject = models.CharField(
+        max_length=256, help_text="Template of the subject of every mail."
+    )
+    body = models.TextField(help_text="Template of the HTML body of every mail.")
+    # 16 bytes instead of 26 characters, converted by migration 0005
+    uid = BinaryUlidField()
+
+    class Meta:
+        db_table = "mail-campaign"
+        verbose_name = _("campaign")
+        verbose_name_plural = _("campaigns")
+        app_label = "mailer"
+
+    def __str__(self):
+        return f"Campaign {self.pk} - {self.title}"
+
+
 class BadgePixelTracker(TimestampedULIDBaseModel):
     """
     Tracks a badge pixel associated with a user.
@@ -50,26 +90,71 @@ class BadgePixelTracker(TimestampedULIDBaseModel):
         return f"Badge Pixel Tracker {self.pk} - {self.title or 'Untitled'}"
 
 
+class HeaderSet(models.Model):
+    """
+    A distinct set of whitelisted request headers, stored once and shared by
+    every tracker log row whose request sent the same headers. The primary
+    key is the digest of the normalized set, see tracking.headers.
+    """
+
+    digest = models.UUIDField(
+        primary_key=True, help_text="128-bit digest of the normalized headers."
+    )
+    headers = models.JSONField(help_text="Normalized whitelisted request headers.")
+    created_time = models.DateTimeField(
+        verbose_name=_("created time"), auto_now_add=True
+    )
+
+    class Meta:
+        db_table = "header-set"
+        verbose_name = _("header set")
+        verbose_name_plural = _("header sets")
+        app_label = "mailer"
+
+    def __str__(self):
+        return f"Header Set {self.digest}"
+
+
 class BadgePixelTrackerLogs(TimestampedULIDBaseModel):
     """
     Stores logs for interactions with a badge pixel.
-    Captures metadata such as IP address, operating system, and request headers.
+    Captures metadata such as IP address, operating system, and request headers
+    (deduplicated in HeaderSet).
     """
 
     badge = models.ForeignKey(
         BadgePixelTracker,
         on_delete=models.CASCADE,
+        db_index=False,  # leads the (badge, created_time) index
         help_text="Reference to the associated badge tracker.",
     )
     os = models.CharField(max_length=256, help_text="Operating system of the client.")
     ip = models.GenericIPAddressField(help_text="IP address of the client.")
-    headers = models.JSONField(help_text="Full request headers from the client.")
+    # header sets are never deleted, the log table needs no index on it
+    header_set = models.ForeignKey(
+        HeaderSet,
+        on_delete=models.PROTECT,
+        db_index=False,
+        related_name="+",
+        help_text="Whitelisted request headers from the client.",
+    )
     user_agent = models.CharField(
         max_length=256, help_text="User agent string of the client's browser."
     )
+    # only ever True with TRACKING_BOT_POLICY "store", see tracking.recorder
+    is_bot = models.BooleanField(
+        default=False, help_text="Whether the hit was classified as a bot."
+    )
+
+    # partitioned by created_time (see tracking.tasks): a unique index
+    # would have to include it, ULIDs are unique anyway; uid lookups still
+    # get a plain index
+    uid = UlidField(unique=False, db_index=True)
 
     class Meta:
         db_table = "badge-pixel-tracker-logs"
+        # logs of a tracker in time order, see analytics.exports
+        indexes = [models.Index(fields=["badge", "created_time"])]
         verbose_name = _("badge pixel tracker log")
         verbose_name_plural = _("badge pixel tracker logs")
         app_label = "mailer"
@@ -93,7 +178,25 @@ class RedirectLinkTracker(TimestampedULIDBaseModel):
     )
     uid = UlidField(verbose_name=_("uid"))
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE, help_text="Owner of the redirect link."
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        help_text="Owner of the redirect link, empty for links of sent mails.",
+    )
+    mail = models.ForeignKey(
+        "mailer.Mail",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="redirect_trackers",
+        db_index=False,  # leads the (mail, position) constraint
+        help_text="Mail whose body links here, empty for user-created links.",
+    )
+    position = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Index of the link among the tracked links of the mail body.",
     )
 
     class Meta:
@@ -101,6 +204,12 @@ class RedirectLinkTracker(TimestampedULIDBaseModel):
         verbose_name = _("redirect link tracker")
         verbose_name_plural = _("redirects tracker")
         app_label = "mailer"
+        constraints = [
+            # one tracker per link of a mail, however often it is rewritten
+            models.UniqueConstraint(
+                fields=["mail", "position"], name="redirect_tracker_mail_position"
+            ),
+        ]
 
     def __str__(self):
         return f"Redirect Tracker {self.pk} - {self.title or 'No Title'}"
@@ -116,6 +225,7 @@ class RedirectLinkTrackerLog(TimestampedULIDBaseModel):
         RedirectLinkTracker,
         on_delete=models.CASCADE,
         related_name="logs",
+        db_index=False,  # leads the (redirect, created_time) index
         help_text="Reference to the redirect link being accessed.",
     )
     ip = models.GenericIPAddressField(
@@ -125,10 +235,23 @@ class RedirectLinkTrackerLog(TimestampedULIDBaseModel):
     user_agent = models.CharField(
         max_length=512, help_text="User agent string of the client."
     )
-    headers = models.JSONField(help_text="Complete request headers from the client.")
+    # only ever True with TRACKING_BOT_POLICY "store", see tracking.recorder
+    is_bot = models.BooleanField(
+        default=False, help_text="Whether the hit was classified as a bot."
+    )
+    header_set = models.ForeignKey(
+        HeaderSet,
+        on_delete=models.PROTECT,
+        db_index=False,
+        related_name="+",
+        help_text="Whitelisted request headers from the client.",
+    )
+
+    uid = UlidField(unique=False, db_index=True)  # see BadgePixelTrackerLogs.uid
 
     class Meta:
         db_table = "redirect-link-tracker-logs"
+        indexes = [models.Index(fields=["redirect", "created_time"])]
         verbose_name = _("redirect link tracker log")
         verbose_name_plural = _("redirect link tracker logs")
         app_label = "mailer"
@@ -8,6 +8,8 @@
 """
 
 import datetime
+
+from django.conf import settings
 from mongoengine import (
     Document,
     ObjectIdField,
@@ -24,7 +26,10 @@ from mongoengine import (
 class MailEvent(Document):
     """MongoDB Collection definition for Mail Events"""
 
-    meta = {"db_alias": "default"}
+    meta = {
+        "db_alias": "default",
+        "indexes": [("sql_mail_id", "event_type")],
+    }
 
     LINK_CLICK = "link-click"
     OPEN = "open"
@@ -33,6 +38,9 @@ class MailEvent(Document):
     event_type = StringField(required=True, choices=event_type_choices)
     sql_mail_id = IntField(required=True)
     redirect_to = URLField(required=False)
+    # hits from image proxies/scanners counted instead of logged, see
+    # TRACKING_BOT_POLICY
+    bot_hits = IntField(default=0)
     created_time = DateTimeField(default=lambda: datetime.datetime.now(datetime.UTC))
     modified_time = DateTimeField(default=lambda: datetime.datetime.now(datetime.UTC))
 
@@ -45,6 +53,10 @@ class MailEvent(Document):
         super()._save_update(*args, **kwargs)
 
 
+# seconds MailEventLog documents are kept, 0 for ever
+EVENT_LOG_TTL = settings.TRACKING_EVENT_LOG_TTL_DAYS * 24 * 60 * 60
+
+
 class MailEventLog(Document):
     """MongoDB Collection definition for Mail Events"""
 
@@ -53,12 +65,24 @@ class MailEventLog(Document):
         "indexes": [
             "event",
             "ip_address",
-            "created_time",
+            # expires the logs when a TTL is set, see tracking.archive
+            (
+                {"fields": ["created_time"], "expireAfterSeconds": EVENT_LOG_TTL}
+                if EVENT_LOG_TTL
+                else "created_time"
+            ),
             "is_bot",
+            # time series of a mail, see analytics.aggregations: equality
+            # fields first, then the range, then event_type so the pipeline
+            # is answered from the index alone.
+            ("sql_mail_id", "is_bot", "created_time", "event_type"),
         ],
     }
 
     event = ReferenceField(MailEvent, required=True)
+    # copied from the event at ingest so time series need no $lookup
+    sql_mail_id = IntField()
+    event_type = StringField(choices=MailEvent.event_type_choices)
 
     user_agent = StringField(required=True)
     browser = StringField()
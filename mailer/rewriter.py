@@ -0,0 +1,173 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Send-time HTML rewriting: tracked links and the open pixel, see
+mailer.links for where the URLs come from.
+
+``rewrite_html`` is a single left-to-right scan over the body, fed in chunks
+and yielding output as it goes. It only looks at tag boundaries (no DOM, no
+tree building): text is copied through, comments and script/style blocks
+are copied untouched, ``<a>`` start tags get their ``href`` replaced, and
+the pixel goes before ``</body>`` (or at the end). Work is linear in the
+body size; memory is bounded by the chunk size plus the longest single tag,
+comment or script block, at most ``MAX_CARRY``: one left open longer than
+that (an unterminated quote or comment) is copied through unchanged.
+"""
+
+import html
+import re
+from collections.abc import Callable, Iterable, Iterator
+
+CHUNK_SIZE = 64 * 1024
+# longest unfinished tag, comment or script block carried over to the next
+# chunk; past it the construct is copied through as is
+MAX_CARRY = 16 * CHUNK_SIZE
+
+TAG_OPEN = re.compile(r"<[a-zA-Z/!?]")
+RAW_TEXT_START = re.compile(r"<(script|style)\b", re.IGNORECASE)
+RAW_TEXT_END = {
+    name: re.compile(rf"</{name}\s*>", re.IGNORECASE) for name in ("script", "style")
+}
+ANCHOR = re.compile(r"<a\s", re.IGNORECASE)
+BODY_END = re.compile(r"</body\s*>", re.IGNORECASE)
+HREF = re.compile(
+    r"""(\shref\s*=\s*)(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE
+)
+TRACKABLE_SCHEMES = ("http://", "https://")
+# a quoted attribute value, which may hold a ">", or the end of the tag
+TAG_PART = re.compile(r"""=\s*(["'])|>""")
+
+
+def iter_chunks(text: str, size: int = CHUNK_SIZE) -> Iterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start : start + size]
+
+
+def _tag_end(buffer: str, start: int) -> int:
+    """
+    Index past the ``>`` closing the tag at ``start``, skipping quoted
+    attribute values, or -1 if the tag continues past the buffer.
+    """
+    position = start + 1
+    while match := TAG_PART.search(buffer, position):
+        if match.group(1) is None:
+            return match.end()
+        closing = buffer.find(match.group(1), match.end())
+        if closing < 0:
+            break
+        position = closing + 1
+    return -1
+
+
+def _tag_start(buffer: str, position: int) -> int:
+    """
+    Index of the next ``<`` from ``position`` that opens a tag, comment or
+    declaration, or of a trailing ``<`` the next chunk may complete; -1 if
+    there is none.
+    """
+    while (start := buffer.find("<", position)) >= 0:
+        if start + 1 == len(buffer) or TAG_OPEN.match(buffer, start):
+            return start
+        # a "<" that opens no tag is text (e.g. "1 < 2")
+        position = start + 1
+    return -1
+
+
+def _construct_end(buffer: str, start: int) -> int:
+    """
+    Index past the comment, script/style block or tag at ``start``, or -1
+    if it continues past the buffer.
+    """
+    if buffer.startswith("<!--", start):
+        end = buffer.find("-->", start + 4)
+        return end + 3 if end >= 0 else -1
+    if raw_text := RAW_TEXT_START.match(buffer, start):
+        closing = RAW_TEXT_END[raw_text.group(1).lower()]
+        found = closing.search(buffer, raw_text.end())
+        return found.end() if found else -1
+    return _tag_end(buffer, start)
+
+
+def _carry_start(buffer: str, start: int, final: bool) -> int:
+    """
+    Where the part of ``buffer`` to carry over to the next chunk begins:
+    the unfinished construct at ``start``, or nothing if there is none,
+    the document ended or the construct is longer than ``MAX_CARRY``.
+    """
+    if start < 0 or final or len(buffer) - start > MAX_CARRY:
+        return len(buffer)
+    return start
+
+
+def _rewrite_anchor(tag: str, link_url: Callable[[str], str | None]) -> str:
+    match = HREF.search(tag)
+    if match is None:
+        return tag
+    raw = next(group for group in match.groups()[1:] if group is not None)
+    href = html.unescape(raw).strip()
+    if not href.lower().startswith(TRACKABLE_SCHEMES):
+        return tag
+    tracked = link_url(href)
+    if tracked is None:
+        return tag
+    return (
+        f'{tag[: match.start()]}{match.group(1)}"{html.escape(tracked)}"'
+        f"{tag[match.end():]}"
+    )
+
+
+def rewrite_html(
+    chunks: Iterable[str],
+    link_url: Callable[[str], str | None],
+    pixel: str = "",
+) -> Iterator[str]:
+    """
+    Rewrite the HTML document made of ``chunks`` in one pass.
+
+    ``link_url(href)`` returns the tracked URL of an absolute http(s) link,
+    or None to leave it as is. ``pixel`` is inserted before ``</body>``, or
+    appended if the document has none. Untouched spans are yielded as whole
+    slices, not tag by tag.
+    """
+    buffer = ""
+    pixel_pending = bool(pixel)
+    chunks = iter(chunks)
+    final = False
+    while not final:
+        chunk = next(chunks, None)
+        final = chunk is None
+        buffer += chunk or ""
+        # buffer[:flushed] is yielded, buffer[flushed:position] needs no change
+        flushed = position = 0
+        while True:
+            start = _tag_start(buffer, position)
+            end = -1 if start < 0 else _construct_end(buffer, start)
+            if end < 0:
+                # no tag left, or one that continues in the next chunk
+                position = _carry_start(buffer, start, final)
+                break
+
+            if ANCHOR.match(buffer, start):
+                tag = buffer[start:end]
+                rewritten = _rewrite_anchor(tag, link_url)
+                if rewritten is not tag:
+                    yield buffer[flushed:start]
+                    yield rewritten
+                    flushed = end
+            elif pixel_pending and BODY_END.match(buffer, start):
+                yield buffer[flushed:start]
+                yield pixel
+                flushed = start
+                pixel_pending = False
+            position = end
+        if position > flushed:
+            yield buffer[flushed:position]
+        buffer = buffer[position:]
+
+    if pixel_pending:
+        yield pixel
@@ -7,13 +7,19 @@
 * https://github.com/alisharify7/mail-tracker-drf
 """
 
-from random import choices
+import uuid
 
+from django.conf import settings
+from django.db import models, transaction
+from django.template import TemplateSyntaxError
 from rest_framework import serializers
+from taggit.models import TaggedItem
 
-from mailer.models import Mail, CarbonCopy
+from mailer.models import Campaign, Mail, CarbonCopy
 from mailer.mongodb_models import MailEvent
 from attachments.serializers import Attachment, AttachmentSerializer
+from mailer.templating import compile_campaign
+from tracking.tokens import sign_event
 
 
 class MailEventSerializer(serializers.Serializer):
@@ -27,11 +33,16 @@ class MailEventSerializer(serializers.Serializer):
         required=True, source="event_type", choices=MailEvent.event_type_choices
     )
     redirect_to = serializers.URLField(required=False)
+    key = serializers.SerializerMethodField()
 
     class Meta:
         fields = ("type",)
         read_only_fields = ("type",)
 
+    def get_key(self, event):
+        """Signed event key used in the tracking pixel and link-click URLs."""
+        return sign_event(event) if event.id else None
+
     def to_representation(self, instance):
         ret = super().to_representation(instance)
         if ret.get("type") != MailEvent.LINK_CLICK:
@@ -49,6 +60,132 @@ class CarbonCopySerializer(serializers.Serializer):
     email_address = serializers.EmailField()
 
 
+class CampaignSerializer(serializers.ModelSerializer):
+    """
+    Campaign subject and body templates, checked to compile on write. Mails
+    of the campaign are created with ``campaign`` and their ``context``.
+    """
+
+    class Meta:
+        model = Campaign
+        fields = "__all__"
+        read_only_fields = ["created_time", "modified_time", "uid", "id"]
+
+    def validate(self, attrs):
+        campaign = Campaign(
+            subject=attrs.get("subject", getattr(self.instance, "subject", "")),
+            body=attrs.get("body", getattr(self.instance, "body", "")),
+        )
+        try:
+            compile_campaign(campaign)
+        except TemplateSyntaxError as exc:
+            raise serializers.ValidationError({"template": str(exc)})
+        return attrs
+
+
+def build_events(mail, events_data) -> list[MailEvent]:
+    """
+    Unsaved MailEvent documents of ``mail``. If no events are provided, a
+    default 'open' event is created.
+    """
+    events_data = events_data if len(events_data) > 0 else [{"event_type": "open"}]
+    event_list = []
+    for event in events_data:
+        event_type = event["event_type"]
+        payload = {"event_type": event_type, "sql_mail_id": mail.id}
+        # links of the body are tracked at send time, see mailer.rewriter
+        if event_type == MailEvent.LINK_CLICK and event.get("redirect_to"):
+            payload["redirect_to"] = event["redirect_to"]
+
+        event_list.append(MailEvent(**payload))
+    return event_list
+
+
+def attach_events(mails) -> None:
+    """
+    Set ``mail.events`` on every mail that has not got them yet, loading the
+    events of all of them with a single ``sql_mail_id__in`` query.
+    """
+    missing = {mail.id: mail for mail in mails if not hasattr(mail, "events")}
+    if not missing:
+        return
+    for mail in missing.values():
+        mail.events = []
+    for event in MailEvent.objects(sql_mail_id__in=list(missing)):
+        missing[event.sql_mail_id].events.append(event)
+
+
+class MailListSerializer(serializers.ListSerializer):
+    """
+    Creates many mails at once: mails, carbon copies and many-to-many rows
+    with one ``bulk_create`` per table inside a single transaction, and the
+    events of every mail with one ``insert_many``.
+
+    When listing, the events of all mails are loaded with one query; pass
+    mails with their relations prefetched (see ListCreateMailView) to keep
+    the number of SQL queries constant as well.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # checked before any child is validated, a request over the limit
+        # costs no per-mail work
+        kwargs.setdefault("max_length", settings.MAILER_BULK_MAX_MAILS)
+        super().__init__(*args, **kwargs)
+
+    def to_representation(self, data):
+        mails = list(
+            data.all() if isinstance(data, models.manager.BaseManager) else data
+        )
+        attach_events(mails)
+        return super().to_representation(mails)
+
+    @transaction.atomic
+    def create(self, validated_data):
+        related = []
+        mails = []
+        for data in validated_data:
+            data = dict(data)
+            related.append(
+                (
+                    data.pop("events", []),
+                    data.pop("carbon_copies", []),
+                    data.pop("attachments", []),
+                    data.pop("tags", []),
+                )
+            )
+            # save() is bypassed by bulk_create, set what it would have
+            data.setdefault("public_key", uuid.uuid4().hex)
+            mails.append(Mail(**data))
+        Mail.objects.bulk_create(mails, batch_size=settings.MAILER_BULK_BATCH_SIZE)
+
+        carbon_copies = []
+        attachments = []
+        tags = []
+        events = []
+        Attachments = Mail.attachments.through
+        for mail, (events_data, carbons, mail_attachments, mail_tags) in zip(
+            mails, related
+        ):
+            carbon_copies += [
+                CarbonCopy(mail=mail, email_address=carbon["email_address"])
+                for carbon in carbons
+            ]
+            attachments += [
+                Attachments(mail_id=mail.id, attachment_id=attachment.pk)
+                for attachment in mail_attachments
+            ]
+            tags += [TaggedItem(content_object=mail, tag=tag) for tag in mail_tags]
+            mail.events = build_events(mail, events_data)
+            events += mail.events
+
+        batch_size = settings.MAILER_BULK_BATCH_SIZE
+        CarbonCopy.objects.bulk_create(carbon_copies, batch_size=batch_size)
+        Attachments.objects.bulk_create(attachments, batch_size=batch_size)
+        TaggedItem.objects.bulk_create(tags, batch_size=batch_size)
+        MailEvent.objects.insert(events, load_bulk=False)
+        return mails
+
+
 class MailSerializer(serializers.ModelSerializer):
     """
     Serializer for handling Mail model instances, including serialization and deserialization
@@ -70,6 +207,20 @@ class MailSerializer(serializers.ModelSerializer):
         model = Mail
         fields = "__all__"
         read_only_fields = ["created_time", "modified_time", "public_key", "id"]
+        list_serializer_class = MailListSerializer
+
+    def validate(self, attrs):
+        """A mail either belongs to a campaign or has its own subject and body."""
+        if attrs.get("campaign"):
+            if attrs.get("subject") or attrs.get("body"):
+                raise serializers.ValidationError(
+                    "campaign mails take their subject and body from the campaign."
+                )
+        elif not attrs.get("subject") or not attrs.get("body"):
+            raise serializers.ValidationError(
+                "subject and body are required for mails without a campaign."
+            )
+        return attrs
 
     def get_status(self, obj):
         """
@@ -104,19 +255,7 @@ class MailSerializer(serializers.ModelSerializer):
                 mail=mail, email_address=carbon["email_address"]
             )
 
-        # If no events are provided, default to an 'open' event
-        events_data = events_data if len(events_data) > 0 else [{"event_type": "open"}]
-        event_list = []
-        for event in events_data:
-            event_type = event["event_type"]
-            payload = {"event_type": event_type, "sql_mail_id": mail.id}
-            if event_type == MailEvent.LINK_CLICK:
-                payload["redirect_to"] = (
-                    "https://fake.ir"  # Example URL for link-click events
-                )
-
-            event_list.append(MailEvent(**payload))
-
-        r = MailEvent.objects.insert(event_list)
+        event_list = build_events(mail, events_data)
+        MailEvent.objects.insert(event_list)
         mail.events = event_list
         return mail
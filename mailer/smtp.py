@@ -0,0 +1,193 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import contextlib
+import os
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+
+class SMTPConnectionPool:
+    """
+    Pool of open, authenticated mail backend connections shared by the tasks
+    of one worker process, so the TCP/TLS handshake and AUTH happen once per
+    connection instead of once per message.
+
+    Connections are handed out most recently used first, so the ones left
+    idle longer than ``idle_timeout`` are closed on the next checkout rather
+    than reused after the server dropped them. A connection that raised, or
+    that has sent ``max_messages``, is closed instead of being returned.
+    Callers wait on a ``threading.Condition`` for a free connection or slot;
+    gevent monkey-patches it, so the pool also works under
+    ``celery worker -P gevent``.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        idle_timeout: float,
+        max_messages: int = 0,
+        backend: str = None,
+        **backend_kwargs,
+    ):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.backend = backend
+        self.backend_kwargs = backend_kwargs
+        # (connection, last used, messages sent), most recently used last;
+        # it and _size are guarded by _available, which is notified whenever
+        # a connection comes back or a slot frees up
+        self._idle = []
+        self._available = threading.Condition()
+        self._size = 0
+        self._stats = {"opened": 0, "reused": 0, "recycled": 0}
+
+    def _open(self):
+        connection = get_connection(
+            self.backend, fail_silently=False, **self.backend_kwargs
+        )
+        try:
+            connection.open()
+        except BaseException:
+            with self._available:
+                self._size -= 1
+                self._available.notify()
+            raise
+        self._stats["opened"] += 1
+        return connection, 0
+
+    def _close(self, connection) -> None:
+        with self._available:
+            self._size -= 1
+            self._stats["recycled"] += 1
+            self._available.notify()
+        with contextlib.suppress(Exception):
+            connection.close()
+
+    def _acquire(self):
+        stale = []
+        try:
+            with self._available:
+                while True:
+                    while self._idle:
+                        connection, last_used, sent = self._idle.pop()
+                        if time.monotonic() - last_used <= self.idle_timeout:
+                            self._stats["reused"] += 1
+                            return connection, sent
+                        # closed below, outside the lock
+                        stale.append(connection)
+                        self._size -= 1
+                        self._stats["recycled"] += 1
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    # every connection is busy, wait for one to come back or
+                    # to be closed
+                    self._available.wait()
+        finally:
+            for connection in stale:
+                with contextlib.suppress(Exception):
+                    connection.close()
+        return self._open()
+
+    def _release(self, connection, sent: int) -> None:
+        if self.max_messages and sent >= self.max_messages:
+            self._close(connection)
+            return
+        with self._available:
+            self._idle.append((connection, time.monotonic(), sent))
+            self._available.notify()
+
+    @contextlib.contextmanager
+    def lease(self):
+        """
+        Check out a connection for several sends, e.g. a batch of messages::
+
+            with pool.lease() as connection:
+                connection.send_messages([message])
+
+        Errors the caller lets escape close the connection; catch errors
+        about a single message (e.g. a refused recipient) inside the block
+        to keep using it.
+        """
+        connection, sent = self._acquire()
+        lease = _Lease(connection, sent)
+        try:
+            yield lease
+        except BaseException:
+            self._close(connection)
+            raise
+        self._release(connection, lease.sent)
+
+    def send_messages(self, messages) -> int:
+        """
+        Send ``messages`` over a pooled connection. A connection the server
+        closed while idle is replaced and the send retried once; any other
+        error closes the connection and propagates.
+        """
+        for attempt in range(2):
+            try:
+                with self.lease() as connection:
+                    return connection.send_messages(messages)
+            except smtplib.SMTPServerDisconnected:
+                if attempt:
+                    raise
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._stats["recycled"] += len(idle)
+            self._available.notify_all()
+        for connection, _, _ in idle:
+            with contextlib.suppress(Exception):
+                connection.close()
+
+    def stats(self) -> dict:
+        return {**self._stats, "size": self._size, "idle": len(self._idle)}
+
+
+class _Lease:
+    __slots__ = ("connection", "sent")
+
+    def __init__(self, connection, sent: int):
+        self.connection = connection
+        self.sent = sent
+
+    def send_messages(self, messages) -> int:
+        self.sent += len(messages)
+        return self.connection.send_messages(messages)
+
+
+_pool: SMTPConnectionPool | None = None
+_pool_pid: int | None = None
+
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Return the pool of this worker process, rebuilt after a fork."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = SMTPConnectionPool(
+            max_size=settings.MAILER_SMTP_POOL_SIZE,
+            idle_timeout=settings.MAILER_SMTP_IDLE_TIMEOUT,
+            max_messages=settings.MAILER_SMTP_MAX_MESSAGES,
+        )
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def close_smtp_pool(**kwargs) -> None:
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.close()
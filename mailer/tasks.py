@@ -1,22 +1,258 @@
+import datetime
+import smtplib
+import time
+
 from celery import shared_task, Task
-from django.core.mail import send_mail
-from mailer.models import Mail
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.core.mail import EmailMultiAlternatives
+from django.db.models import Q
+from django.utils import timezone
+from mailer.models import Mail, MailStatus
+from mailer.mongodb_models import MailEvent
+from mailer.links import LinkTracking
+from mailer.smtp import close_smtp_pool, get_smtp_pool
+from mailer.templating import render_mails
+from mailer.throttle import domain_limiter
 from django.conf import settings
 
 
-@shared_task(bind=True, max_retries=5, default_retry_delay=10)
-def send_email(self: Task, message, object_id):
-    try:
-        obj = Mail.objects.get(id=object_id)
-    except Mail.DoesNotExist:
-        return None
+worker_process_shutdown.connect(close_smtp_pool)
+worker_shutdown.connect(close_smtp_pool)
 
-    result = send_mail(
+
+def build_email(
+    subject, body, recipient, cc=(), html_body=None
+) -> EmailMultiAlternatives:
+    email = EmailMultiAlternatives(
         from_email=settings.DEFAULT_FROM_EMAIL,
-        subject=message["subject"],
-        html_message=message["body"],
-        recipient_list=[message["recipient"]],
-        fail_silently=True,
-        message=message["body"],
+        subject=subject,
+        body=body,
+        to=[recipient],
+        cc=list(cc),
     )
-    print(f"Sending email {result} {message}")
+    email.attach_alternative(html_body or body, "text/html")
+    return email
+
+
+# failures of a single message after which the SMTP session is still usable
+MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+def is_permanent(exc: Exception) -> bool:
+    """Whether the server rejected the message for good (5xx replies)."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code >= 500
+    return False
+
+
+def write_statuses(statuses: dict[str, list[int]]) -> None:
+    """Write ``{status: mail ids}``, one UPDATE per status, and empty the lists."""
+    for status, mail_ids in statuses.items():
+        if mail_ids:
+            Mail.objects.filter(id__in=mail_ids).update(status=status)
+            mail_ids.clear()
+
+
+def flush_statuses(statuses: dict[str, list[int]]) -> None:
+    """Write ``statuses`` once they hold ``MAILER_SEND_STATUS_SLICE`` mails."""
+    if sum(map(len, statuses.values())) >= settings.MAILER_SEND_STATUS_SLICE:
+        write_statuses(statuses)
+
+
+def send_mail(connection, mail: Mail, html_body: str) -> str | None:
+    """
+    Send ``mail`` over a leased SMTP ``connection`` and return its new
+    status, or None if it hit a transient error and should be retried.
+    Errors that leave the session unusable are raised.
+    """
+    email = build_email(
+        mail.subject,
+        mail.body,
+        mail.recipient,
+        cc=[cc.email_address for cc in mail.carbon_copies.all()],
+        html_body=html_body,
+    )
+    try:
+        connection.send_messages([email])
+    except MESSAGE_ERRORS as exc:
+        # the session is still usable, only this message failed
+        return MailStatus.FAILED if is_permanent(exc) else None
+    return MailStatus.SENT
+
+
+def send_mails(mails: list[Mail], bodies: dict[int, str]) -> tuple[int, list[int]]:
+    """
+    Send ``mails`` with their rewritten html ``bodies`` over pooled SMTP
+    connections, writing their statuses as they go, see send_email_batch.
+    Returns the number sent and the ids of the mails to retry.
+    """
+    # outcomes not written yet, committed every MAILER_SEND_STATUS_SLICE mails
+    unwritten = {MailStatus.SENT: [], MailStatus.FAILED: []}
+    retry = []
+    sent = position = reconnects = 0
+    while position < len(mails):
+        try:
+            with get_smtp_pool().lease() as connection:
+                for mail in mails[position:]:
+                    status = send_mail(connection, mail, bodies[mail.id])
+                    if status is None:
+                        retry.append(mail.id)
+                    else:
+                        unwritten[status].append(mail.id)
+                    if status == MailStatus.SENT:
+                        sent += 1
+                        reconnects = 0
+                    position += 1
+                    flush_statuses(unwritten)
+        except (smtplib.SMTPException, OSError):
+            # the connection broke: retry the message being sent and carry
+            # on over a fresh connection, or retry them all if that broke too
+            reconnects += 1
+            broken = 1 if reconnects == 1 else len(mails) - position
+            retry += [mail.id for mail in mails[position : position + broken]]
+            position += broken
+
+    write_statuses(unwritten)
+    return sent, retry
+
+
+def schedule_retry(task: Task, mail_ids: list[int], domain: str = None) -> None:
+    """
+    Publish ``mail_ids`` as a new send_email_batch, ``default_retry_delay``
+    from now or later if ``domain``'s rate limit requires it.
+    """
+    from mailer.dispatch import publish
+
+    retry_at = time.time() + task.default_retry_delay
+    if domain:
+        retry_at = domain_limiter.reserve(domain, len(mail_ids), retry_at)
+        domain_limiter.add_queued(domain, len(mail_ids))
+    # still QUEUED, not stale before the retry is due
+    Mail.objects.filter(id__in=mail_ids).update(
+        queued_time=datetime.datetime.fromtimestamp(retry_at, datetime.UTC)
+    )
+    # published like any other batch: the domain's backlog can put
+    # retry_at hours away, too far for an ETA task
+    publish(
+        [
+            (
+                send_email_batch.s(mail_ids, domain=domain).set(
+                    retries=task.request.retries + 1
+                ),
+                retry_at,
+            )
+        ]
+    )
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=10)
+def send_email_batch(self: Task, mail_ids: list[int], domain: str = None):
+    """
+    Send a batch of mails, loaded with their carbon copies in two queries,
+    over one pooled SMTP connection. Campaign mails are rendered from their
+    templates first (see mailer.templating), those that fail to render are
+    marked FAILED, then bodies get tracked links and the open pixel on the
+    way out, see mailer.links.
+
+    Every message succeeds or fails on its own: sent mails are marked SENT
+    and rejected ones (5xx) FAILED as the batch goes, one UPDATE per status
+    every ``MAILER_SEND_STATUS_SLICE`` mails, so a worker lost mid-batch
+    sends at most that many mails again. Only the mails that hit a
+    transient error (4xx, dropped connection) are retried, as a new batch of
+    just their ids published by mailer.dispatch; they are marked FAILED once
+    the retries are exhausted. Mails already SENT are skipped, so a
+    redelivered batch does not send twice. Returns the number sent.
+
+    ``domain`` is the recipient domain the batch was rate limited for by
+    dispatch_mails; retries are scheduled within that domain's budget too.
+    """
+    if domain:
+        domain_limiter.add_queued(domain, -len(mail_ids))
+    mails = (
+        Mail.objects.filter(id__in=mail_ids)
+        .exclude(status=MailStatus.SENT)
+        .prefetch_related("carbon_copies")
+    )
+    pending = list(mails)
+    # campaign mails only store their variables, render them from the
+    # cached compiled templates; a template error only fails its own mail
+    if unrenderable := render_mails(pending):
+        write_statuses({MailStatus.FAILED: [mail.id for mail in unrenderable]})
+        pending = [mail for mail in pending if mail not in unrenderable]
+    # links and open pixel of every body, with the trackers and events they
+    # need created in one bulk write each before anything is sent; a retry
+    # reuses the trackers of the first attempt
+    mail_ids = [mail.id for mail in pending]
+    tracking = LinkTracking(
+        MailEvent.objects(sql_mail_id__in=mail_ids).only(
+            "id", "sql_mail_id", "event_type"
+        ),
+        mail_ids,
+    )
+    bodies = {mail.id: tracking.rewrite(mail) for mail in pending}
+    tracking.save()
+
+    sent, retry = send_mails(pending, bodies)
+    if retry:
+        if self.request.retries >= self.max_retries:
+            Mail.objects.filter(id__in=retry).update(status=MailStatus.FAILED)
+        else:
+            schedule_retry(self, retry, domain)
+    return sent
+
+
+@shared_task(ignore_result=True)
+def dispatch_due_mails():
+    """
+    Hand the mails that are due to the broker, run every
+    ``MAILER_SCHEDULE_SWEEP_INTERVAL`` by beat: the rate limited batches
+    deferred by mailer.dispatch, then, from the database,
+
+    * scheduled mails whose ``scheduled_time`` has passed,
+    * immediate mails still PENDING ``MAILER_DISPATCH_GRACE`` seconds after
+      they were created, whose dispatch on commit failed,
+    * QUEUED mails whose ``queued_time`` is ``MAILER_QUEUED_TIMEOUT`` old,
+      whose publish failed or whose task was lost.
+
+    Scheduled mails wait in the database rather than as ETA tasks held in
+    worker memory. Each round claims up to ``MAILER_SCHEDULE_SWEEP_BATCH_SIZE``
+    of them with ``SELECT ... FOR UPDATE SKIP LOCKED``, so concurrent
+    sweepers never claim the same mail, and commits the claim before
+    publishing them, see mailer.dispatch.claim_mails. Runs until no mail is
+    due or the time budget is spent; returns the number dispatched.
+    """
+    from mailer.dispatch import claim_mails, queue_mails, release_deferred
+
+    release_deferred()
+    deadline = time.monotonic() + settings.MAILER_SCHEDULE_SWEEP_BUDGET
+    dispatched = 0
+    while time.monotonic() < deadline:
+        now = timezone.now()
+        mails = claim_mails(
+            Mail.objects.filter(
+                Q(status=MailStatus.PENDING, scheduled_time__lte=now)
+                | Q(
+                    status=MailStatus.PENDING,
+                    scheduled_time__isnull=True,
+                    created_time__lte=now
+                    - datetime.timedelta(seconds=settings.MAILER_DISPATCH_GRACE),
+                )
+                | Q(
+                    status=MailStatus.QUEUED,
+                    queued_time__lte=now
+                    - datetime.timedelta(seconds=settings.MAILER_QUEUED_TIMEOUT),
+                )
+            ).order_by("scheduled_time"),
+            limit=settings.MAILER_SCHEDULE_SWEEP_BATCH_SIZE,
+        )
+        if not mails:
+            break
+        queue_mails(mails)
+        dispatched += len(mails)
+    return dispatched
@@ -0,0 +1,129 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Send-time rendering of campaign mails.
+
+A campaign's subject and body are compiled once per worker process and kept
+in a small LRU cache keyed by campaign id and ``modified_time``, so editing
+a campaign invalidates its entry and the mails of a batch (or of the next
+thousand batches) reuse the same compiled templates.
+
+Campaign templates are written through the API, so they are compiled by an
+engine that only knows the tags and filters below: no ``{% debug %}``,
+``{% load %}``, ``{% include %}`` or ``{% extends %}``, nothing that reads
+beyond the mail's own context.
+"""
+
+import collections
+import logging
+import threading
+
+from django.conf import settings
+from django.template import Context, Engine, Library, defaultfilters, defaulttags
+
+from mailer.models import Campaign
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_TAGS = ("comment", "firstof", "for", "if", "now", "with")
+ALLOWED_FILTERS = (
+    "capfirst",
+    "date",
+    "default",
+    "default_if_none",
+    "first",
+    "floatformat",
+    "join",
+    "last",
+    "length",
+    "linebreaksbr",
+    "lower",
+    "pluralize",
+    "time",
+    "title",
+    "truncatechars",
+    "truncatewords",
+    "upper",
+    "urlencode",
+    "yesno",
+)
+
+
+def _campaign_library() -> Library:
+    library = Library()
+    for name in ALLOWED_TAGS:
+        library.tags[name] = defaulttags.register.tags[name]
+    for name in ALLOWED_FILTERS:
+        library.filters[name] = defaultfilters.register.filters[name]
+    return library
+
+
+ENGINE = Engine()
+# in place of the default builtins, which cannot be left out otherwise
+ENGINE.template_builtins = [_campaign_library()]
+
+
+def compile_campaign(campaign: Campaign) -> tuple:
+    """(subject, body) templates of ``campaign``, raises TemplateSyntaxError."""
+    return ENGINE.from_string(campaign.subject), ENGINE.from_string(campaign.body)
+
+
+class TemplateCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._templates = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, campaign: Campaign) -> tuple:
+        key = (campaign.pk, campaign.modified_time)
+        with self._lock:
+            templates = self._templates.get(key)
+            if templates is not None:
+                self._templates.move_to_end(key)
+                return templates
+        templates = compile_campaign(campaign)
+        with self._lock:
+            self._templates[key] = templates
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return templates
+
+
+template_cache = TemplateCache(settings.MAILER_TEMPLATE_CACHE_SIZE)
+
+
+def render_mails(mails) -> list:
+    """
+    Fill in ``subject`` and ``body`` of the campaign mails among ``mails``
+    from their campaign and ``context``, loading the campaigns with one
+    query. The mails are not saved: only the variables are stored.
+
+    Returns the mails whose template failed to compile or render, left
+    as they were; the others are rendered regardless.
+    """
+    campaign_ids = {mail.campaign_id for mail in mails if mail.campaign_id}
+    if not campaign_ids:
+        return []
+    campaigns = Campaign.objects.in_bulk(campaign_ids)
+    failed = []
+    for mail in mails:
+        if not mail.campaign_id:
+            continue
+        try:
+            subject, body = template_cache.get(campaigns[mail.campaign_id])
+            context = mail.context or {}
+            # subjects are plain text and cannot span lines, bodies are HTML
+            subject = subject.render(Context(context, autoescape=False))
+            body = body.render(Context(context))
+        except Exception:
+            logger.exception("failed to render mail %s", mail.id)
+            failed.append(mail)
+            continue
+        mail.subject = " ".join(subject.split())
+        mail.body = body
+    return failed
@@ -1,3 +1,172 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from mailer.models import CarbonCopy, Mail
+from mailer.mongodb_models import MailEvent
+from mailer.rewriter import iter_chunks, rewrite_html
+from mailer.smtp import SMTPConnectionPool
+
+
+class MailListQueryCountTests(TestCase):
+    """The cost of listing mails must not grow with the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(20):
+            mail = Mail.objects.create(
+                subject=f"subject {i}",
+                body="<p>body</p>",
+                recipient=f"user{i}@example.com",
+            )
+            CarbonCopy.objects.create(mail=mail, email_address=f"cc{i}@example.com")
+            mail.tags.add("campaign", f"tag-{i}")
+
+    def list_mails(self, page_size: int) -> tuple[int, int]:
+        """Number of SQL and MongoDB queries made to list one page."""
+        with (
+            mock.patch.object(MailEvent, "objects") as events,
+            CaptureQueriesContext(connection) as queries,
+        ):
+            response = self.client.get(
+                reverse("list-create-mail"), {"page_size": page_size}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), page_size)
+        return len(queries), events.call_count
+
+    def test_query_count_is_constant(self):
+        sql_small, mongo_small = self.list_mails(page_size=2)
+        sql_large, mongo_large = self.list_mails(page_size=20)
+
+        self.assertEqual(sql_small, sql_large)
+        self.assertEqual(mongo_small, 1)
+        self.assertEqual(mongo_large, 1)
+
+
+class FakeSMTPBackend(BaseEmailBackend):
+    """
+    Counts the messages sent through any of its connections, each send
+    slow enough that the other senders are waiting for the connection.
+    """
+
+    sent = 0
+    lock = threading.Lock()
+
+    def send_messages(self, messages):
+        time.sleep(0.05)
+        with self.lock:
+            FakeSMTPBackend.sent += len(messages)
+        return len(messages)
+
+
+class SMTPConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        FakeSMTPBackend.sent = 0
+
+    def make_pool(self, **kwargs) -> SMTPConnectionPool:
+        return SMTPConnectionPool(
+            backend=f"{__name__}.FakeSMTPBackend", idle_timeout=60, **kwargs
+        )
+
+    def send_concurrently(self, pool: SMTPConnectionPool, senders: int) -> None:
+        threads = [
+            threading.Thread(
+                target=pool.send_messages,
+                args=([EmailMessage("subject", "body", to=["a@example.com"])],),
+                daemon=True,
+            )
+            for _ in range(senders)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+
+    def test_retired_connection_wakes_waiters(self):
+        # every connection is closed after one message: the waiters must be
+        # woken to open the next one
+        pool = self.make_pool(max_size=1, max_messages=1)
+        self.send_concurrently(pool, senders=3)
+
+        self.assertEqual(FakeSMTPBackend.sent, 3)
+        self.assertEqual(pool.stats()["size"], 0)
+        self.assertEqual(pool.stats()["opened"], 3)
+
+    def test_failed_send_wakes_waiters(self):
+        # the first send fails and closes its connection, the waiters must
+        # be woken to open another one
+        pool = self.make_pool(max_size=1)
+        send_messages = FakeSMTPBackend.send_messages
+        failures = [ConnectionError]
+
+        def fail_first(backend, messages):
+            if failures:
+                time.sleep(0.05)
+                raise failures.pop()
+            return send_messages(backend, messages)
+
+        with (
+            mock.patch.object(FakeSMTPBackend, "send_messages", fail_first),
+            mock.patch("threading.excepthook"),
+        ):
+            self.send_concurrently(pool, senders=3)
+
+        self.assertEqual(FakeSMTPBackend.sent, 2)
+        self.assertEqual(pool.stats()["opened"], 2)
+        self.assertEqual(pool.stats()["size"], 1)
+        self.assertEqual(pool.stats()["idle"], 1)
+
+    def test_connections_are_reused(self):
+        pool = self.make_pool(max_size=2)
+        self.send_concurrently(pool, senders=5)
+
+        self.assertEqual(FakeSMTPBackend.sent, 5)
+        self.assertLessEqual(pool.stats()["opened"], 2)
+        self.assertEqual(pool.stats()["size"], pool.stats()["idle"])
+
+
+class RewriteHTMLTests(SimpleTestCase):
+    def rewrite(self, body: str, chunk_size: int = 64 * 1024) -> str:
+        return "".join(
+            rewrite_html(iter_chunks(body, chunk_size), lambda href: "https://t/x")
+        )
+
+    def test_quoted_gt_before_href(self):
+        body = """<a title="a > b" data-x='>' href="https://example.com">x</a>"""
+        expected = """<a title="a > b" data-x='>' href="https://t/x">x</a>"""
+        for chunk_size in (len(body), 5, 1):
+            self.assertEqual(self.rewrite(body, chunk_size), expected)
+
+    def test_quoted_gt_in_other_tags(self):
+        body = '<img alt="1 > 0"><a href="https://example.com">x</a>'
+
+        self.assertEqual(
+            self.rewrite(body), '<img alt="1 > 0"><a href="https://t/x">x</a>'
+        )
+
+    def test_unterminated_quote_is_copied(self):
+        body = '<p><a title="oops>x</a><a href=https://example.com>y</a>'
+
+        self.assertEqual(self.rewrite(body, 4), body)
+
+    def test_carry_over_is_capped(self):
+        body = '<p title="oops>' + "x" * 100 + '<a href="https://example.com">y</a>'
+
+        with mock.patch("mailer.rewriter.MAX_CARRY", 40):
+            pieces = rewrite_html(iter_chunks(body, 4), lambda href: "https://t/x")
+            first = next(pieces)
+            output = first + "".join(pieces)
+
+        # flushed as is once past the cap, not held until the document ends
+        self.assertLessEqual(len(first), 40 + 4)
+        self.assertTrue(body.startswith(first))
+        self.assertEqual(output, body.replace("https://example.com", "https://t/x"))
@@ -0,0 +1,114 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Per recipient domain send rates, shared by every process through Redis.
+
+Each domain is a token bucket refilled at ``rate`` messages per second and
+holding up to ``burst`` tokens, implemented as a virtual schedule (GCRA):
+Redis keeps the time at which the domain's bucket will be full again and
+``reserve`` pushes it forward by one emission interval per message. Instead
+of rejecting sends over the limit, a reservation returns the earliest time
+its messages fit in the budget, and the dispatcher schedules their task for
+then (see mailer.dispatch): a campaign goes out at exactly the configured
+rate, without bursts the provider would throttle and the retries that
+follow.
+"""
+
+import time
+
+from django.conf import settings
+from redis.commands.core import Script
+
+from common_library.redis import get_redis
+
+KEY_PREFIX = "mailer:throttle"
+QUEUED_KEY = f"{KEY_PREFIX}:queued"
+
+# KEYS[1]: schedule key
+# ARGV: start (epoch s, 0 for now), seconds per message, burst, messages
+# returns the epoch time the messages may be sent at, as a string
+RESERVE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local start = math.max(now, tonumber(ARGV[1]))
+local interval = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local count = tonumber(ARGV[4])
+
+local full_at = math.max(tonumber(redis.call('GET', KEYS[1]) or 0), start)
+local next_full_at = full_at + count * interval
+local send_at = math.max(start, next_full_at - burst * interval)
+redis.call('SET', KEYS[1], next_full_at, 'PXAT', math.ceil(next_full_at * 1000))
+return tostring(send_at)
+"""
+# built once, bound to the client of the calling process on every call
+_reserve = Script(None, RESERVE_SCRIPT.encode())
+
+
+def recipient_domain(address: str) -> str:
+    return address.rpartition("@")[2].lower()
+
+
+class DomainRateLimiter:
+    def __init__(self, rates: dict, default_rate: float, default_burst: int):
+        self.rates = rates
+        self.default = (default_rate, default_burst)
+
+    def limits(self, domain: str) -> tuple[float, int]:
+        """(messages per second, burst) of ``domain``."""
+        return self.rates.get(domain, self.default)
+
+    def reserve(self, domain: str, count: int, start: float = 0) -> float:
+        """
+        Take ``count`` messages from the budget of ``domain``, returning the
+        epoch time at which they can all be sent without exceeding it, no
+        earlier than ``start``. ``count`` should not exceed the burst.
+        """
+        rate, burst = self.limits(domain)
+        send_at = _reserve(
+            keys=[f"{KEY_PREFIX}:schedule:{domain}"],
+            args=[start, 1 / rate, burst, count],
+            client=get_redis(),
+        )
+        return float(send_at)
+
+    def add_queued(self, domain: str, count: int) -> None:
+        """Track messages scheduled (count > 0) or picked up (count < 0)."""
+        get_redis().hincrby(QUEUED_KEY, domain, count)
+
+    def stats(self) -> dict:
+        """Queue depth, limits and schedule backlog of every active domain."""
+        client = get_redis()
+        queued = {
+            domain.decode(): int(count)
+            for domain, count in client.hgetall(QUEUED_KEY).items()
+            if int(count) > 0
+        }
+        if not queued:
+            return {}
+        domains = sorted(queued)
+        full_at = client.mget([f"{KEY_PREFIX}:schedule:{d}" for d in domains])
+        now = time.time()
+        stats = {}
+        for domain, full in zip(domains, full_at):
+            rate, burst = self.limits(domain)
+            stats[domain] = {
+                "queued": queued[domain],
+                "rate": rate,
+                "burst": burst,
+                # how far ahead of now the domain's sends are scheduled
+                "backlog_seconds": max(float(full or 0) - now, 0.0),
+            }
+        return stats
+
+
+domain_limiter = DomainRateLimiter(
+    rates=settings.MAILER_DOMAIN_RATES,
+    default_rate=settings.MAILER_DEFAULT_DOMAIN_RATE,
+    default_burst=settings.MAILER_DEFAULT_DOMAIN_BURST,
+)
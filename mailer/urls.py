@@ -12,6 +12,22 @@ from django.urls import path
 
 urlpatterns = [
     path("", views.ListCreateMailView.as_view(), name="list-create-mail"),
+    path("bulk/", views.BulkCreateMailView.as_view(), name="bulk-create-mail"),
+    path(
+        "campaigns/",
+        views.ListCreateCampaignView.as_view(),
+        name="list-create-campaign",
+    ),
+    path(
+        "campaigns/<int:pk>/",
+        views.RetrieveUpdateDestroyCampaignView.as_view(),
+        name="retrieve-update-delete-campaign",
+    ),
+    path(
+        "dispatch/metrics/",
+        views.DispatchMetricsAPIView.as_view(),
+        name="dispatch-metrics",
+    ),
     path(
         "<int:pk>/",
         views.RetrieveDestroyViewMailView.as_view(),
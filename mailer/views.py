@@ -9,36 +9,110 @@
 
 import datetime
 
+from django.db import transaction
 from django.http import HttpResponse
-from rest_framework.generics import ListCreateAPIView, RetrieveDestroyAPIView
+from rest_framework import status
+from rest_framework.generics import (
+    CreateAPIView,
+    ListCreateAPIView,
+    RetrieveDestroyAPIView,
+    RetrieveUpdateDestroyAPIView,
+)
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from mailer.models import Mail
-from mailer.serializers import MailSerializer
-from mailer.tasks import send_email
+from mailer.dispatch import dispatch_mails
+from mailer.models import Campaign, Mail
+from mailer.serializers import CampaignSerializer, MailSerializer
+from mailer.throttle import domain_limiter
 
 
 class ListCreateMailView(ListCreateAPIView):
     serializer_class = MailSerializer
-    queryset = Mail.objects.all()
+    # every relation MailSerializer renders, so a page costs the same fixed
+    # number of queries whatever its size; events come from MongoDB in one
+    # query per page, see MailListSerializer.
+    queryset = Mail.objects.prefetch_related(
+        "attachments", "carbon_copies", "tags"
+    ).order_by("-id")
+    # mails have no uid, page by creation time
+    cursor_ordering = ("-created_time", "-id")
 
     def perform_create(self, serializer):
         mail = serializer.save()
-        payload = {
-            "subject": mail.subject,
-            "body": mail.body,
-            "recipient": mail.recipient,
-        }
-        if mail.scheduled_time:
-            return send_email.apply_async(
-                args=(payload, mail.id),
-                eta=mail.scheduled_time,
-            )
-        return send_email.delay(
-            message=payload,
-            object_id=mail.id,
+        # logged rather than a 500 if the broker is down, dispatch_due_mails
+        # picks the mail up later, see BulkCreateMailView
+        transaction.on_commit(lambda: dispatch_mails([mail]), robust=True)
+
+
+class BulkCreateMailView(CreateAPIView):
+    """
+    Create up to ``MAILER_BULK_MAX_MAILS`` mails in one request, e.g. for a
+    campaign. Takes a list of mail objects, writes them in bulk (see
+    MailListSerializer) and queues their delivery once the transaction
+    commits. Responds with the id and public key of every created mail,
+    in request order.
+    """
+
+    serializer_class = MailSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs["many"] = True
+        return super().get_serializer(*args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            mails = serializer.save()
+            # the mails are committed whatever happens next: a broker outage
+            # is logged by Django rather than turned into a 500, and the
+            # PENDING mails are picked up by dispatch_due_mails once
+            # MAILER_DISPATCH_GRACE has passed
+            transaction.on_commit(lambda: dispatch_mails(mails), robust=True)
+        return Response(
+            {
+                "count": len(mails),
+                "mails": [
+                    {"id": mail.id, "public_key": mail.public_key} for mail in mails
+                ],
+            },
+            status=status.HTTP_201_CREATED,
         )
 
 
 class RetrieveDestroyViewMailView(RetrieveDestroyAPIView):
     serializer_class = MailSerializer
     queryset = Mail.objects.all()
+
+
+class ListCreateCampaignView(ListCreateAPIView):
+    serializer_class = CampaignSerializer
+    queryset = Campaign.objects.order_by("-id")
+    cursor_ordering = ("-created_time", "-id")
+
+
+class RetrieveUpdateDestroyCampaignView(RetrieveUpdateDestroyAPIView):
+    """Campaigns with mails cannot be deleted (``Mail.campaign`` protects)."""
+
+    serializer_class = CampaignSerializer
+    queryset = Campaign.objects.all()
+
+    def perform_destroy(self, instance):
+        if instance.mails.exists():
+            raise ValidationError("the campaign has mails.")
+        instance.delete()
+
+
+class DispatchMetricsAPIView(APIView):
+    """
+    Per recipient domain: mails waiting to be sent, the configured rate and
+    burst, and how many seconds ahead of now its sends are scheduled.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({"domains": domain_limiter.stats()})
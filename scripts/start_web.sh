@@ -12,10 +12,4 @@ python manage.py migrate --noinput
 python manage.py runserver 0.0.0.0:8000
 
 #echo "🚀 Starting Gunicorn..."
-#exec gunicorn core.wsgi:application \
-#    --bind 0.0.0.0:8000 \
-#    --workers 4 \
-#    --timeout 120 \
-#    --log-level info \
-#    --access-logfile - \
-#    --error-logfile -
+#exec gunicorn -c gunicorn_conf.py --log-level info
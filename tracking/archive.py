@@ -0,0 +1,286 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Cold archive of MailEventLog.
+
+Documents are exported in ``_id`` order, oldest first, to gzipped NDJSON
+files of ``TRACKING_EVENT_LOG_ARCHIVE_CHUNK_SIZE`` documents on the
+"event-archive" storage (local disk or S3). Every file holds one ``_id``
+range, named ``<first _id>-<last _id>``, and every line the same flat set
+of columns, so the files load as-is into DuckDB, Spark or BigQuery. The
+export streams from a single cursor through a temporary file: memory stays
+at one cursor batch whatever the size of the collection. The next run
+resumes after the last archived ``_id``; runs are serialized by a Redis
+lock, so an hourly run never overlaps a long backlog or a manual one.
+
+Archiving runs ``TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS`` after insertion and
+the TTL index deletes documents ``TRACKING_EVENT_LOG_TTL_DAYS`` after
+creation, so documents are archived before they expire. The TTL index
+deletes whether or not a document was archived: ``archive_lag`` tells how
+old the oldest document not archived yet is, and the archive task reports
+an error once it comes within ``LAG_ALERT_MARGIN`` of expiring. ``restore``
+re-imports an ``_id`` range, into a separate collection by default, where
+the TTL index would not delete it again.
+"""
+
+import datetime
+import gzip
+import itertools
+import json
+import re
+import tempfile
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import storages
+from pymongo.errors import BulkWriteError
+from redis.exceptions import LockError
+
+from common_library.redis import get_redis
+from mailer.mongodb_models import EVENT_LOG_TTL, MailEventLog
+
+if (
+    settings.TRACKING_EVENT_LOG_TTL_DAYS
+    and settings.TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS
+    >= settings.TRACKING_EVENT_LOG_TTL_DAYS
+):
+    raise ImproperlyConfigured(
+        "TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS must be less than "
+        "TRACKING_EVENT_LOG_TTL_DAYS, or logs expire before they are archived"
+    )
+
+STORAGE_ALIAS = "event-archive"
+DIRECTORY = "mail-event-logs"
+SUFFIX = ".ndjson.gz"
+# <first _id>-<last _id>.ndjson.gz; anything else in the directory, e.g. a
+# copy renamed by the storage, is not an archive file
+FILE_NAME = re.compile(r"([0-9a-f]{24})-([0-9a-f]{24})\.ndjson\.gz")
+LOCK_KEY = "tracking:archive:lock"
+# renewed after every file written
+LOCK_TIMEOUT = 15 * 60
+# how long before the TTL would delete unarchived documents to alert
+LAG_ALERT_MARGIN = datetime.timedelta(hours=12)
+# every file has all of them, in this order
+COLUMNS = (
+    "_id",
+    "event",
+    "sql_mail_id",
+    "event_type",
+    "user_agent",
+    "browser",
+    "os",
+    "device_type",
+    "ip_address",
+    "geo_location",
+    "is_bot",
+    "referrer",
+    "created_time",
+    "modified_time",
+)
+OBJECT_ID_COLUMNS = ("_id", "event")
+DATETIME_COLUMNS = ("created_time", "modified_time")
+CURSOR_BATCH_SIZE = 1_000
+RESTORE_BATCH_SIZE = 1_000
+DUPLICATE_KEY = 11000
+
+
+class ArchiveInProgress(Exception):
+    """Another archive run holds the lock."""
+
+
+def _collection():
+    # the raw collection: MailEventLog._get_collection() would first create
+    # the model's indexes, which conflict with a created_time index whose
+    # TTL is being changed
+    return MailEventLog._get_db()[MailEventLog._get_collection_name()]
+
+
+def encode(document: dict) -> str:
+    row = {}
+    for column in COLUMNS:
+        value = document.get(column)
+        if isinstance(value, ObjectId):
+            value = str(value)
+        elif isinstance(value, datetime.datetime):
+            # pymongo returns naive UTC datetimes
+            value = value.replace(tzinfo=datetime.UTC).isoformat()
+        row[column] = value
+    return json.dumps(row, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode(line: str) -> dict:
+    document = {k: v for k, v in json.loads(line).items() if v is not None}
+    for column in OBJECT_ID_COLUMNS:
+        if column in document:
+            document[column] = ObjectId(document[column])
+    for column in DATETIME_COLUMNS:
+        if column in document:
+            document[column] = datetime.datetime.fromisoformat(document[column])
+    return document
+
+
+def archived_files(storage=None) -> list[tuple[ObjectId, ObjectId, str]]:
+    """(first _id, last _id, name) of every archive file, oldest first."""
+    storage = storage or storages[STORAGE_ALIAS]
+    try:
+        _, files = storage.listdir(DIRECTORY)
+    except FileNotFoundError:
+        return []
+    archived = []
+    for file_name in files:
+        if match := FILE_NAME.fullmatch(file_name):
+            first, last = match.groups()
+            archived.append(
+                (ObjectId(first), ObjectId(last), f"{DIRECTORY}/{file_name}")
+            )
+    return sorted(archived)
+
+
+def archive(
+    before: datetime.datetime, chunk_size: int = None, storage=None
+) -> list[str]:
+    """
+    Export the documents inserted before ``before`` that are not archived
+    yet, one file per ``chunk_size`` documents. Returns the files written;
+    raises ArchiveInProgress if another run is going on.
+    """
+    lock = get_redis().lock(LOCK_KEY, timeout=LOCK_TIMEOUT, blocking=False)
+    if not lock.acquire():
+        raise ArchiveInProgress
+    try:
+        return _archive(before, chunk_size, storage, lock)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            # expired while the last file was written
+            pass
+
+
+def _archive(before, chunk_size, storage, lock) -> list[str]:
+    storage = storage or storages[STORAGE_ALIAS]
+    chunk_size = chunk_size or settings.TRACKING_EVENT_LOG_ARCHIVE_CHUNK_SIZE
+    # ObjectIds start with their creation time: nothing is inserted below
+    # this bound any more, so resuming after the last archived _id is exact
+    id_range = {"$lt": ObjectId.from_datetime(before)}
+    archived = archived_files(storage)
+    if archived:
+        id_range["$gt"] = archived[-1][1]
+    cursor = _collection().find(
+        {"_id": id_range}, sort=[("_id", 1)], batch_size=CURSOR_BATCH_SIZE
+    )
+
+    written = []
+    while True:
+        first = last = None
+        with tempfile.TemporaryFile() as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as out:
+                for document in itertools.islice(cursor, chunk_size):
+                    out.write(encode(document).encode() + b"\n")
+                    first = first or document["_id"]
+                    last = document["_id"]
+            if first is None:
+                return written
+            raw.seek(0)
+            written.append(
+                storage.save(f"{DIRECTORY}/{first}-{last}{SUFFIX}", File(raw))
+            )
+        lock.reacquire()
+
+
+def archive_lag(storage=None) -> datetime.timedelta | None:
+    """
+    Age of the oldest document not archived yet, by insertion time, or
+    None when every document is archived.
+    """
+    archived = archived_files(storage)
+    oldest = _collection().find_one(
+        {"_id": {"$gt": archived[-1][1]}} if archived else {},
+        projection={"_id": 1},
+        sort=[("_id", 1)],
+    )
+    if oldest is None:
+        return None
+    return datetime.datetime.now(datetime.UTC) - oldest["_id"].generation_time
+
+
+def restore(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    collection: str = None,
+    storage=None,
+) -> int:
+    """
+    Re-import the archived documents inserted in [start, end) into
+    ``collection`` (default ``<collection>_restored``), reading only the
+    files of that range, line by line. Documents already there are
+    skipped, so a range can be restored again. Returns the number inserted.
+    """
+    storage = storage or storages[STORAGE_ALIAS]
+    start_id, end_id = ObjectId.from_datetime(start), ObjectId.from_datetime(end)
+    target = MailEventLog._get_db()[
+        collection or f"{MailEventLog._get_collection_name()}_restored"
+    ]
+
+    def insert(documents) -> int:
+        try:
+            return len(target.insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as exc:
+            if any(e["code"] != DUPLICATE_KEY for e in exc.details["writeErrors"]):
+                raise
+            return exc.details["nInserted"]
+
+    restored = 0
+    for first, last, name in archived_files(storage):
+        if last < start_id or first >= end_id:
+            continue
+        with storage.open(name, "rb") as raw, gzip.open(raw, "rt") as lines:
+            documents = (
+                document
+                for document in map(decode, lines)
+                if start_id <= document["_id"] < end_id
+            )
+            while batch := list(itertools.islice(documents, RESTORE_BATCH_SIZE)):
+                restored += insert(batch)
+    return restored
+
+
+def ensure_ttl_index(ttl: int = EVENT_LOG_TTL) -> str:
+    """
+    Make the created_time index of the collection match ``ttl`` (seconds,
+    0 for no expiry): change the TTL of an existing TTL index in place, or
+    rebuild the index when TTL is turned on or off. Returns what was done.
+
+    Turning the TTL on deletes every document already past it within a
+    minute: archive them first.
+    """
+    collection = _collection()
+    name, index = next(
+        (
+            (name, index)
+            for name, index in collection.index_information().items()
+            if list(index["key"]) == [("created_time", 1)]
+        ),
+        (None, None),
+    )
+    current = index.get("expireAfterSeconds", 0) if index else None
+    if current == ttl:
+        return "unchanged"
+    if current and ttl:
+        collection.database.command(
+            "collMod", collection.name, index={"name": name, "expireAfterSeconds": ttl}
+        )
+        return "updated"
+    if name:
+        collection.drop_index(name)
+    collection.create_index(
+        [("created_time", 1)], **({"expireAfterSeconds": ttl} if ttl else {})
+    )
+    return "created" if name is None else "rebuilt"
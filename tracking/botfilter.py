@@ -0,0 +1,113 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Pre-ingest classification of machine traffic.
+
+Most pixel fetches that are not a person opening the mail come from image
+proxies (Gmail, Yahoo, Apple Mail Privacy Protection) and link/attachment
+scanners of mail security gateways. They are recognised by user agent (one
+combined regex, so a single scan covers every pattern) or by source network
+(a set of CIDR blocks, checked with one hash lookup per distinct prefix
+length).
+"""
+
+import ipaddress
+import re
+
+from tracking.useragent import UserAgent
+
+STORE = "store"
+AGGREGATE = "aggregate"
+DROP = "drop"
+POLICIES = (STORE, AGGREGATE, DROP)
+
+PROXY_USER_AGENT_PATTERNS = (
+    r"googleimageproxy",
+    r"via ggpht\.com",
+    r"yahoomailproxy",
+    r"\bproofpoint",
+    r"\bmimecast",
+    r"\bbarracuda",
+    r"\bsymantec",
+    r"\bmessagelabs",
+    r"\bforcepoint",
+    r"\bzscaler",
+    r"\btrend ?micro",
+    r"\bsophos",
+    r"\bfireeye",
+    r"\bironport",
+    r"safelinks",
+    r"microsoft office protection",
+    r"microsoft office existence discovery",
+    r"\bnetcraft",
+)
+
+# Networks whose requests are image proxies or scanners, never a reader.
+DEFAULT_NETWORKS = (
+    # Apple Mail Privacy Protection prefetches through Apple's own ranges.
+    "17.0.0.0/8",
+    # Google image proxy (ggpht.com).
+    "66.102.0.0/20",
+    "66.249.64.0/19",
+    "72.14.192.0/18",
+    "74.125.0.0/16",
+    # Microsoft / Exchange Online Protection.
+    "40.92.0.0/15",
+    "40.107.0.0/16",
+    "52.100.0.0/14",
+    "104.47.0.0/17",
+    # Yahoo mail proxy.
+    "98.136.0.0/14",
+    "2001:4998::/32",
+)
+
+
+class NetworkSet:
+    """Set of CIDR blocks with lookups in O(number of distinct prefix lengths)."""
+
+    def __init__(self, networks=()):
+        # {version: {prefixlen: {network address as int, ...}}}
+        self._prefixes: dict[int, dict[int, set[int]]] = {4: {}, 6: {}}
+        for network in networks:
+            self.add(network)
+
+    def add(self, network: str) -> None:
+        network = ipaddress.ip_network(network, strict=False)
+        shift = network.max_prefixlen - network.prefixlen
+        self._prefixes[network.version].setdefault(network.prefixlen, set()).add(
+            int(network.network_address) >> shift
+        )
+
+    def __contains__(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        value = int(ip)
+        for prefixlen, networks in self._prefixes[ip.version].items():
+            if value >> (ip.max_prefixlen - prefixlen) in networks:
+                return True
+        return False
+
+
+class BotFilter:
+    def __init__(self, networks=DEFAULT_NETWORKS, user_agent_patterns=()):
+        self.networks = NetworkSet(networks)
+        self.proxy_user_agents = re.compile(
+            "|".join(PROXY_USER_AGENT_PATTERNS + tuple(user_agent_patterns)),
+            re.IGNORECASE,
+        )
+
+    def is_bot(self, user_agent: UserAgent, raw_user_agent: str, ip: str) -> bool:
+        return (
+            user_agent.is_bot
+            or self.proxy_user_agents.search(raw_user_agent) is not None
+            or ip in self.networks
+        )
@@ -0,0 +1,146 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Offline GeoIP lookups against a compiled, memory-mapped range table.
+
+``compile_database`` turns a CSV of ``start_ip,end_ip,country[,city]`` rows
+(IPv4 and IPv6 mixed) into a binary file::
+
+    header      b"MTGEO1\\0\\0", record count (u32), strings offset (u32)
+    records     sorted by start: start (16 bytes), end (16 bytes),
+                location offset (u32)
+    strings     per distinct location: length (u16), "country\\tcity" utf-8
+
+IPv4 addresses are stored IPv4-mapped so both families share one table.
+Lookups ``mmap`` the file read-only and binary-search the records, so every
+worker process shares the same page-cache pages and opening the database
+costs nothing up front.
+"""
+
+import csv
+import functools
+import ipaddress
+import mmap
+import os
+import struct
+import tempfile
+import typing
+
+MAGIC = b"MTGEO1\0\0"
+HEADER = struct.Struct(">8sII")
+RECORD = struct.Struct(">16s16sI")
+STRING_LENGTH = struct.Struct(">H")
+CACHE_SIZE = 65_536
+
+
+def _packed(address: str) -> bytes:
+    ip = ipaddress.ip_address(address.strip())
+    if ip.version == 4:
+        ip = ipaddress.IPv6Address(b"\0" * 10 + b"\xff\xff" + ip.packed)
+    return ip.packed
+
+
+def compile_database(source: str, destination: str) -> int:
+    """
+    Compile a CSV range dataset into the binary format. The destination is
+    replaced atomically, so processes that still map the old file keep
+    working until they reopen it. Returns the number of ranges written.
+    """
+    locations: dict[tuple[str, str], int] = {}
+    strings = bytearray()
+    records = []
+
+    with open(source, newline="", encoding="utf-8") as fp:
+        for row in csv.reader(fp):
+            if not row or row[0].startswith("#"):
+                continue
+            try:
+                start, end = _packed(row[0]), _packed(row[1])
+            except ValueError:
+                continue  # header row or garbage
+            location = (row[2].strip(), row[3].strip() if len(row) > 3 else "")
+            if location not in locations:
+                locations[location] = len(strings)
+                encoded = "\t".join(location).encode()
+                strings += STRING_LENGTH.pack(len(encoded)) + encoded
+            records.append((start, end, locations[location]))
+
+    records.sort()
+    strings_offset = HEADER.size + RECORD.size * len(records)
+    directory = os.path.dirname(os.path.abspath(destination))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as out:
+        out.write(HEADER.pack(MAGIC, len(records), strings_offset))
+        for record in records:
+            out.write(RECORD.pack(*record))
+        out.write(strings)
+    os.replace(out.name, destination)
+    return len(records)
+
+
+class GeoIPDatabase:
+    def __init__(self, path: str, cache_size: int = CACHE_SIZE):
+        self.path = path
+        with open(path, "rb") as fp:
+            self.inode = os.fstat(fp.fileno()).st_ino
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self._strings = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled GeoIP database")
+        self.lookup = functools.lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _lookup(self, address: str) -> dict[str, str] | None:
+        """Return ``{"country": ..., "city": ...}`` for an IP, or None."""
+        try:
+            key = _packed(address)
+        except ValueError:
+            return None
+
+        data, low, high = self._map, 0, self.count
+        # rightmost record whose start is <= key
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            if data[offset : offset + 16] <= key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return None
+
+        _, end, location = RECORD.unpack_from(
+            data, HEADER.size + (low - 1) * RECORD.size
+        )
+        if key > end:
+            return None
+        offset = self._strings + location
+        (length,) = STRING_LENGTH.unpack_from(data, offset)
+        start = offset + STRING_LENGTH.size
+        country, _, city = data[start : start + length].decode().partition("\t")
+        return {"country": country, "city": city} if city else {"country": country}
+
+    def close(self) -> None:
+        self._map.close()
+
+
+_database: GeoIPDatabase | None = None
+
+
+def get_database(path: str) -> typing.Optional[GeoIPDatabase]:
+    """
+    Return the process-wide database for ``path``, reopening it when the file
+    was rebuilt since it was mapped. Returns None if no database exists.
+    """
+    global _database
+    try:
+        inode = os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+    if _database is None or _database.path != path or _database.inode != inode:
+        _database = GeoIPDatabase(path)
+    return _database
@@ -0,0 +1,77 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Deduplicated request headers of tracker log rows.
+
+Hits keep only the headers in ``TRACKING_HEADER_WHITELIST``, normalized
+(lower case names, collapsed whitespace), so the few clients behind most
+hits produce the same few sets. Each distinct set is stored once in
+HeaderSet under the 128-bit digest of its canonical JSON, and log rows only
+reference that digest. Digests already written are remembered per process,
+so a batch of hits normally costs no header query at all; unknown ones are
+inserted with ``ON CONFLICT DO NOTHING``, never looked up.
+"""
+
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+
+from common_library.cache import LRUCache
+from mailer.models import HeaderSet
+
+WHITELIST = frozenset(name.lower() for name in settings.TRACKING_HEADER_WHITELIST)
+
+
+def normalize_headers(headers) -> dict[str, str]:
+    """The whitelisted ``headers``, with lower case names and tidy values."""
+    return {
+        name.lower(): " ".join(str(value).split())
+        for name, value in headers.items()
+        if name.lower() in WHITELIST
+    }
+
+
+def header_digest(headers: dict[str, str]) -> uuid.UUID:
+    canonical = json.dumps(headers, sort_keys=True, separators=(",", ":"))
+    return uuid.UUID(bytes=hashlib.blake2b(canonical.encode(), digest_size=16).digest())
+
+
+class HeaderSetStore:
+    def __init__(self, cache_size: int):
+        # digests known to be in the database
+        self.known = LRUCache(maxsize=cache_size)
+
+    def resolve(self, header_sets: list[dict]) -> list[uuid.UUID]:
+        """
+        Digests of normalized ``header_sets``, in order, writing the sets
+        not stored yet with one INSERT. They are remembered as stored once
+        that commits: a rolled back batch must not leave digests that later
+        log rows would reference without writing them.
+        """
+        digests = [header_digest(headers) for headers in header_sets]
+        missing = {}
+        for digest, headers in zip(digests, header_sets):
+            if digest not in missing and self.known.get(digest) is None:
+                missing[digest] = HeaderSet(digest=digest, headers=headers)
+        if missing:
+            HeaderSet.objects.bulk_create(missing.values(), ignore_conflicts=True)
+            transaction.on_commit(lambda: self._remember(missing))
+        return digests
+
+    def _remember(self, digests) -> None:
+        for digest in digests:
+            self.known.set(digest, True)
+
+    def stats(self) -> dict:
+        return self.known.stats()
+
+
+header_sets = HeaderSetStore(settings.TRACKING_HEADER_SET_CACHE_SIZE)
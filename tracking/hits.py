@@ -0,0 +1,41 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import datetime
+import typing
+
+from tracking.headers import normalize_headers
+
+
+class Hit(typing.NamedTuple):
+    """A single tracking hit, captured in the request cycle and persisted later."""
+
+    event_key: str
+    ip_address: str
+    user_agent: str
+    referrer: str
+    headers: dict
+    created_time: datetime.datetime
+
+    @classmethod
+    def from_request(cls, request, event_key: str) -> "Hit":
+        meta = request.META
+        forwarded_for = meta.get("HTTP_X_FORWARDED_FOR")
+        return cls(
+            event_key=event_key,
+            ip_address=(
+                forwarded_for.split(",", 1)[0].strip()
+                if forwarded_for
+                else meta.get("REMOTE_ADDR", "")
+            ),
+            user_agent=meta.get("HTTP_USER_AGENT", ""),
+            referrer=meta.get("HTTP_REFERER", ""),
+            headers=normalize_headers(request.headers),
+            created_time=datetime.datetime.now(datetime.UTC),
+        )
@@ -0,0 +1,35 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tracking.archive import ArchiveInProgress, archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Export MailEventLog documents not archived yet to gzipped NDJSON "
+        "files on the event-archive storage, resuming after the last archive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            type=datetime.datetime.fromisoformat,
+            help="archive documents inserted before this ISO date (default: "
+            "TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS ago)",
+        )
+
+    def handle(self, *args, **options):
+        before = options["before"] or datetime.datetime.now(
+            datetime.UTC
+        ) - datetime.timedelta(days=settings.TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS)
+        if before.tzinfo is None:
+            before = before.replace(tzinfo=datetime.UTC)
+        try:
+            files = archive(before)
+        except ArchiveInProgress:
+            raise CommandError("Another archive run is in progress")
+        for name in files:
+            self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(files)} archive files"))
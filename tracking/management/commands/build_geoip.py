@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tracking.geoip import compile_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile a start_ip,end_ip,country[,city] CSV (IPv4 and IPv6) into the "
+        "memory-mapped GeoIP database used by the tracking ingest pipeline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="path of the CSV range dataset")
+        parser.add_argument(
+            "--output",
+            default=settings.GEOIP_DATABASE_PATH,
+            help="where to write the compiled database (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        count = compile_database(options["source"], options["output"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {count} ranges to {options['output']}")
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from mailer.mongodb_models import EVENT_LOG_TTL
+from tracking.archive import ensure_ttl_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply TRACKING_EVENT_LOG_TTL_DAYS to the created_time index of the "
+        "MailEventLog collection. Turning it on deletes the documents already "
+        "past it: run archive_event_logs first."
+    )
+
+    def handle(self, *args, **options):
+        result = ensure_ttl_index()
+        self.stdout.write(
+            self.style.SUCCESS(f"created_time index {result}, TTL {EVENT_LOG_TTL}s")
+        )
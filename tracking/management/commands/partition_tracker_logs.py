@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tracking.tasks import LOG_PARTITIONERS, maintain_log_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert the tracker log tables to tables range partitioned by "
+        "created_time, keeping their rows, then create the upcoming "
+        "partitions. Locks each table while it is converted."
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("partitioning needs PostgreSQL")
+        for partitioner in LOG_PARTITIONERS:
+            if partitioner.convert():
+                self.stdout.write(f"Partitioned {partitioner.table}")
+        for table, changes in maintain_log_partitions().items():
+            for name in changes["created"]:
+                self.stdout.write(f"Created {name}")
+            for name in changes["expired"]:
+                self.stdout.write(f"Expired {name}")
+        self.stdout.write(self.style.SUCCESS("Tracker log tables are partitioned"))
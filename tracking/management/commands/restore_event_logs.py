@@ -0,0 +1,30 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from tracking.archive import restore
+
+
+def utc_datetime(value: str) -> datetime.datetime:
+    moment = datetime.datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=datetime.UTC)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-import the archived MailEventLog documents inserted in "
+        "[start, end), into mail_event_log_restored unless --collection is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("start", type=utc_datetime, help="ISO date, inclusive")
+        parser.add_argument("end", type=utc_datetime, help="ISO date, exclusive")
+        parser.add_argument(
+            "--collection",
+            help="target collection; the TTL index of mail_event_log would "
+            "delete restored documents past it again",
+        )
+
+    def handle(self, *args, **options):
+        count = restore(options["start"], options["end"], options["collection"])
+        self.stdout.write(self.style.SUCCESS(f"Restored {count} documents"))
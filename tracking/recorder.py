@@ -0,0 +1,317 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import collections
+import itertools
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from pymongo import UpdateOne
+
+from analytics.mongodb_models import BADGE, MAIL, REDIRECT, USER
+from analytics.rollups import BOT_HITS, CLICKS, OPENS, RollupBatch
+from common_library.buffer import (
+    WriteBehindBuffer,
+    django_bulk_create,
+    mongo_bulk_insert,
+)
+from common_library.cache import LRUCache
+from mailer.models import (
+    BadgePixelTracker,
+    BadgePixelTrackerLogs,
+    RedirectLinkTracker,
+    RedirectLinkTrackerLog,
+)
+from mailer.mongodb_models import MailEvent, MailEventLog
+from tracking.botfilter import (
+    AGGREGATE,
+    DEFAULT_NETWORKS,
+    DROP,
+    POLICIES,
+    STORE,
+    BotFilter,
+)
+from tracking.geoip import get_database as get_geoip_database
+from tracking.headers import header_sets
+from tracking.hits import Hit
+from tracking.stream import entry_object_id, publish_hits
+from tracking.tokens import InvalidEventKey, read_event_key
+from tracking.useragent import parse_user_agent
+
+
+if settings.TRACKING_BOT_POLICY not in POLICIES:
+    raise ImproperlyConfigured(
+        f"TRACKING_BOT_POLICY must be one of {POLICIES}, "
+        f"not {settings.TRACKING_BOT_POLICY!r}"
+    )
+
+bot_filter = BotFilter(
+    networks=DEFAULT_NETWORKS + tuple(settings.TRACKING_BOT_NETWORKS),
+    user_agent_patterns=settings.TRACKING_BOT_USER_AGENTS,
+)
+
+
+def build_event_logs(
+    hits: list[Hit], rollups: RollupBatch, entry_ids: list[str] | None = None
+) -> tuple[list, collections.Counter]:
+    """
+    Turn queued hits into unsaved MailEventLog documents and add them to
+    the per-mail rollups, keyed by the stream ``entry_ids`` of the hits if
+    given, see RollupBatch.
+
+    Hits classified as bots are handled according to
+    ``settings.TRACKING_BOT_POLICY``: stored as full rows flagged with
+    ``is_bot`` ("store"), only counted per event and in the rollups
+    ("aggregate") or discarded ("drop"). Returns the documents and the
+    bot hit counts per ``(entry_id, event_id)``.
+
+    Documents of stream entries get an ``_id`` derived from the entry id,
+    so a redelivered entry is not stored twice, see persist_hits.
+    """
+    policy = settings.TRACKING_BOT_POLICY
+    geoip = get_geoip_database(settings.GEOIP_DATABASE_PATH)
+    documents = []
+    bot_hits = collections.Counter()
+    for hit, entry_id in zip(hits, entry_ids or itertools.repeat(None)):
+        try:
+            event_key = read_event_key(hit.event_key)
+        except InvalidEventKey:
+            continue
+        user_agent = parse_user_agent(hit.user_agent)
+        is_bot = bot_filter.is_bot(user_agent, hit.user_agent, hit.ip_address)
+        if is_bot:
+            if policy != DROP:
+                rollups.add(
+                    MAIL,
+                    event_key.mail_id,
+                    hit.created_time,
+                    BOT_HITS,
+                    entry_id=entry_id,
+                )
+            if policy == AGGREGATE:
+                bot_hits[entry_id, event_key.event_id] += 1
+            if policy != STORE:
+                continue
+        else:
+            rollups.add(
+                MAIL,
+                event_key.mail_id,
+                hit.created_time,
+                OPENS if event_key.event_type == MailEvent.OPEN else CLICKS,
+                ip=hit.ip_address,
+                user_agent=hit.user_agent,
+                entry_id=entry_id,
+            )
+        documents.append(
+            MailEventLog(
+                id=entry_object_id(entry_id) if entry_id else None,
+                event=MailEvent(id=event_key.event_id),
+                sql_mail_id=event_key.mail_id,
+                event_type=event_key.event_type,
+                user_agent=hit.user_agent,
+                browser=user_agent.browser,
+                os=user_agent.os,
+                device_type=user_agent.device_type,
+                is_bot=is_bot,
+                ip_address=hit.ip_address,
+                geo_location=(geoip.lookup(hit.ip_address) if geoip else None) or {},
+                referrer=hit.referrer,
+                created_time=hit.created_time,
+            )
+        )
+    return documents, bot_hits
+
+
+insert_event_logs = mongo_bulk_insert(MailEventLog)
+
+
+def increment_bot_hits(bot_hits: collections.Counter, counted: set[str]) -> None:
+    """
+    Add ``(entry_id, event_id)`` bot hit counts to their events, leaving out
+    stream entries not in ``counted``: an earlier delivery counted them.
+    """
+    totals = collections.Counter()
+    for (entry_id, event_id), count in bot_hits.items():
+        if entry_id is None or entry_id in counted:
+            totals[event_id] += count
+    if totals:
+        MailEvent._get_collection().bulk_write(
+            [
+                UpdateOne({"_id": event_id}, {"$inc": {"bot_hits": count}})
+                for event_id, count in totals.items()
+            ],
+            ordered=False,
+        )
+
+
+def persist_hits(hits: list[Hit], entry_ids: list[str] | None = None) -> None:
+    """
+    Store a batch of mail event hits and update their rollups.
+
+    Hits read from the tracking stream pass their ``entry_ids``, which makes
+    a redelivered batch, or one retried entry by entry, harmless: its logs
+    keep the ``_id`` of their entry and are not inserted twice, and its bot
+    hits and rollups are only counted for entries no earlier delivery
+    counted, see RollupBatch.
+    """
+    rollups = RollupBatch()
+    documents, bot_hits = build_event_logs(hits, rollups, entry_ids)
+    if documents:
+        insert_event_logs(documents)
+    # every entry with bot hits has a bot_hits rollup increment too
+    counted = rollups.count_entries()
+    if bot_hits:
+        increment_bot_hits(bot_hits, counted)
+    rollups.write()
+
+
+# tracker id -> owner id, per tracker model; owners never change.
+_tracker_owners = {
+    BadgePixelTracker: LRUCache(maxsize=50_000),
+    RedirectLinkTracker: LRUCache(maxsize=50_000),
+}
+
+
+def tracker_owners(model, tracker_ids) -> dict[int, int | None]:
+    cache = _tracker_owners[model]
+    owners = {pk: cache.get(pk) for pk in set(tracker_ids)}
+    missing = [pk for pk, owner in owners.items() if owner is None]
+    if missing:
+        for pk, user_id in model.objects.filter(pk__in=missing).values_list(
+            "pk", "user_id"
+        ):
+            owners[pk] = user_id
+            # 0: no owner (links of sent mails), known not to need a lookup
+            cache.set(pk, user_id or 0)
+    return {pk: owner or None for pk, owner in owners.items()}
+
+
+def build_tracker_logs(
+    log_model, tracker_field: str, scope: str, field: str, items, owners, rollups
+) -> list:
+    """
+    Turn queued ``(tracker_id, hit)`` pairs into unsaved log rows of
+    ``log_model`` and add them to the tracker and owner rollups, applying
+    the same bot policy as mail event hits (stored bot rows are flagged
+    ``is_bot``). Request headers are stored as
+    references to their deduplicated HeaderSet, see tracking.headers.
+    """
+    policy = settings.TRACKING_BOT_POLICY
+    user_agent_length = log_model._meta.get_field("user_agent").max_length
+    rows = []
+    headers = []
+    for tracker_id, hit in items:
+        user_agent = parse_user_agent(hit.user_agent)
+        is_bot = bot_filter.is_bot(user_agent, hit.user_agent, hit.ip_address)
+        counted, ip = (BOT_HITS, None) if is_bot else (field, hit.ip_address)
+        if not is_bot or policy != DROP:
+            for rollup_scope, rollup_id in (
+                (scope, tracker_id),
+                (USER, owners.get(tracker_id)),
+            ):
+                if rollup_id is not None:
+                    rollups.add(
+                        rollup_scope,
+                        rollup_id,
+                        hit.created_time,
+                        counted,
+                        ip=ip,
+                        user_agent=hit.user_agent,
+                    )
+        if is_bot and policy != STORE:
+            continue
+        rows.append(
+            log_model(
+                **{tracker_field: tracker_id},
+                ip=hit.ip_address,
+                os=user_agent.os,
+                user_agent=hit.user_agent[:user_agent_length],
+                is_bot=is_bot,
+            )
+        )
+        headers.append(hit.headers)
+    for row, digest in zip(rows, header_sets.resolve(headers)):
+        row.header_set_id = digest
+    return rows
+
+
+_create_redirect_logs = django_bulk_create(RedirectLinkTrackerLog)
+_create_badge_logs = django_bulk_create(BadgePixelTrackerLogs)
+
+
+def persist_redirect_hits(items: list[tuple[int, Hit]]) -> None:
+    """Store a batch of ``(tracker_id, hit)`` redirect tracker hits."""
+    rollups = RollupBatch()
+    owners = tracker_owners(RedirectLinkTracker, [pk for pk, _ in items])
+    _create_redirect_logs(
+        build_tracker_logs(
+            RedirectLinkTrackerLog,
+            "redirect_id",
+            REDIRECT,
+            CLICKS,
+            items,
+            owners,
+            rollups,
+        )
+    )
+    rollups.write()
+
+
+def persist_badge_hits(items: list[tuple[str, Hit]]) -> None:
+    """
+    Store a batch of ``(tracker_uid, hit)`` badge pixel hits. The pixel is
+    served without a lookup, so uids are resolved here, one query per batch.
+    """
+    trackers = {
+        uid: (pk, user_id)
+        for uid, pk, user_id in BadgePixelTracker.objects.filter(
+            uid__in={uid for uid, _ in items}
+        ).values_list("uid", "pk", "user_id")
+    }
+    items = [(trackers[uid][0], hit) for uid, hit in items if uid in trackers]
+    owners = dict(trackers.values())
+    rollups = RollupBatch()
+    _create_badge_logs(
+        build_tracker_logs(
+            BadgePixelTrackerLogs, "badge_id", BADGE, OPENS, items, owners, rollups
+        )
+    )
+    rollups.write()
+
+
+def _buffer(name, flush) -> WriteBehindBuffer:
+    return WriteBehindBuffer(
+        flush,
+        name=name,
+        max_size=settings.TRACKING_BUFFER_MAX_SIZE,
+        batch_size=settings.TRACKING_BUFFER_BATCH_SIZE,
+        flush_interval=settings.TRACKING_BUFFER_FLUSH_INTERVAL,
+        overflow=settings.TRACKING_BUFFER_OVERFLOW,
+    )
+
+
+# Pixel/redirect hits on mail events: published to the Redis stream and
+# written to MongoDB by the ``consume_tracking_stream`` task, or written
+# directly from the web worker when the stream backend is disabled.
+recorder = (
+    _buffer("tracking-stream", publish_hits)
+    if settings.TRACKING_INGEST_BACKEND == "stream"
+    else _buffer("mail-event-logs", persist_hits)
+)
+# Hits on badge and redirect trackers, written to Postgres.
+badge_log_buffer = _buffer("badge-pixel-tracker-logs", persist_badge_hits)
+redirect_log_buffer = _buffer("redirect-link-tracker-logs", persist_redirect_hits)
+
+BUFFERS = (recorder, badge_log_buffer, redirect_log_buffer)
+
+
+def shutdown() -> None:
+    """Flush every buffer, called when a worker process exits."""
+    for buffer in BUFFERS:
+        buffer.close()
@@ -0,0 +1,130 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import time
+
+import ulid
+from django.conf import settings
+from django.core.cache import caches
+
+from common_library.cache import LRUCache
+from mailer.models import RedirectLinkTracker
+
+
+class RedirectTargetCache:
+    """
+    Two-tier cache mapping ``RedirectLinkTracker.uid`` to ``(pk, redirect_to)``.
+
+    Lookups try a per-process LRU first, then the shared Redis cache and
+    only then Postgres; whatever is found is written back to the tiers
+    above it. Unknown uids are remembered in the local tier too, so a flood
+    of bogus links does not reach the database, except uids minted in the
+    last ``FRESH_SECONDS``: their tracker may just not be committed yet.
+
+    Saving or deleting a tracker refreshes the shared tier and this
+    process's local tier once committed; other processes pick the change up
+    when their local entry expires, so ``local_ttl`` bounds how stale a
+    redirect can be.
+    """
+
+    KEY_PREFIX = "redirect-target:"
+    FRESH_SECONDS = 5 * 60
+
+    def __init__(self, maxsize: int, local_ttl: float, shared_ttl: int):
+        self.local = LRUCache(maxsize=maxsize, ttl=local_ttl)
+        self.shared_ttl = shared_ttl
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[settings.TRACKING_REDIRECT_CACHE_ALIAS]
+
+    def _remember(self, uid: str, target: tuple[int, str] | None) -> None:
+        if target is None and self._is_fresh(uid):
+            return
+        self.local.set(uid, target or ())
+
+    def _is_fresh(self, uid: str) -> bool:
+        try:
+            minted = ulid.from_str(uid).timestamp().timestamp
+        except ValueError:
+            return False
+        return time.time() - minted < self.FRESH_SECONDS
+
+    @staticmethod
+    def _queryset(uid: str):
+        return RedirectLinkTracker.objects.filter(uid=uid).values_list(
+            "pk", "redirect_to"
+        )
+
+    def get(self, uid: str) -> tuple[int, str] | None:
+        target = self.local.get(uid)
+        if target is not None:
+            return target or None
+
+        target = self.shared.get(self.KEY_PREFIX + uid)
+        if target is not None:
+            self.shared_hits += 1
+            target = tuple(target)
+        else:
+            self.misses += 1
+            target = self._queryset(uid).first()
+            if target is not None:
+                self.shared.set(self.KEY_PREFIX + uid, target, self.shared_ttl)
+
+        self._remember(uid, target)
+        return target
+
+    async def aget(self, uid: str) -> tuple[int, str] | None:
+        target = self.local.get(uid)
+        if target is not None:
+            return target or None
+
+        target = await self.shared.aget(self.KEY_PREFIX + uid)
+        if target is not None:
+            self.shared_hits += 1
+            target = tuple(target)
+        else:
+            self.misses += 1
+            target = await self._queryset(uid).afirst()
+            if target is not None:
+                await self.shared.aset(self.KEY_PREFIX + uid, target, self.shared_ttl)
+
+        self._remember(uid, target)
+        return target
+
+    def warm(self, *trackers: RedirectLinkTracker) -> None:
+        targets = {
+            tracker.uid: (tracker.pk, tracker.redirect_to) for tracker in trackers
+        }
+        self.shared.set_many(
+            {self.KEY_PREFIX + uid: target for uid, target in targets.items()},
+            self.shared_ttl,
+        )
+        for uid, target in targets.items():
+            self.local.set(uid, target)
+
+    def invalidate(self, uid: str) -> None:
+        self.shared.delete(self.KEY_PREFIX + uid)
+        self.local.delete(uid)
+
+    def stats(self) -> dict:
+        return {
+            "local": self.local.stats(),
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+        }
+
+
+redirect_cache = RedirectTargetCache(
+    maxsize=settings.TRACKING_REDIRECT_CACHE_SIZE,
+    local_ttl=settings.TRACKING_REDIRECT_CACHE_LOCAL_TTL,
+    shared_ttl=settings.TRACKING_REDIRECT_CACHE_SHARED_TTL,
+)
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mailer.models import RedirectLinkTracker
+from tracking.redirects import redirect_cache
+
+
+@receiver(post_save, sender=RedirectLinkTracker)
+def warm_redirect_target(sender, instance, **kwargs):
+    # new trackers are about to be clicked, updated ones must not serve the
+    # old destination: both cases write the current target to the cache,
+    # once other processes can read it from the database too.
+    transaction.on_commit(lambda: redirect_cache.warm(instance))
+
+
+@receiver(post_delete, sender=RedirectLinkTracker)
+def invalidate_redirect_target(sender, instance, **kwargs):
+    redirect_cache.invalidate(instance.uid)
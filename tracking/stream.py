@@ -0,0 +1,159 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import datetime
+import json
+
+import redis
+from bson import ObjectId
+from django.conf import settings
+
+from common_library.redis import get_redis
+from tracking.hits import Hit
+
+
+def encode_hit(hit: Hit) -> dict:
+    return {
+        "event_key": hit.event_key,
+        "ip_address": hit.ip_address,
+        "user_agent": hit.user_agent,
+        "referrer": hit.referrer,
+        "headers": json.dumps(hit.headers, separators=(",", ":")),
+        "created_time": hit.created_time.timestamp(),
+    }
+
+
+def decode_hit(fields: dict) -> Hit:
+    return Hit(
+        event_key=fields[b"event_key"].decode(),
+        ip_address=fields[b"ip_address"].decode(),
+        user_agent=fields[b"user_agent"].decode(),
+        referrer=fields[b"referrer"].decode(),
+        headers=json.loads(fields[b"headers"]),
+        created_time=datetime.datetime.fromtimestamp(
+            float(fields[b"created_time"]), datetime.UTC
+        ),
+    )
+
+
+def entry_object_id(entry_id: str) -> ObjectId:
+    """
+    ObjectId of the document stored for stream entry ``entry_id``
+    (``<milliseconds>-<sequence>``): the same for every delivery of the
+    entry, and timestamped when it was published, so ``_id`` order and age
+    stay meaningful (see tracking.archive).
+    """
+    milliseconds, sequence = (int(part) for part in entry_id.split("-"))
+    return ObjectId(
+        (milliseconds // 1000).to_bytes(4, "big")
+        + (milliseconds % 1000).to_bytes(2, "big")
+        + sequence.to_bytes(6, "big")
+    )
+
+
+def publish_hits(hits: list[Hit]) -> None:
+    """Append a batch of hits to the tracking stream in one pipelined round trip."""
+    pipe = get_redis().pipeline(transaction=False)
+    for hit in hits:
+        pipe.xadd(
+            settings.TRACKING_STREAM_NAME,
+            encode_hit(hit),
+            maxlen=settings.TRACKING_STREAM_MAX_LENGTH,
+            approximate=True,
+        )
+    pipe.execute()
+
+
+def ensure_group(client: redis.Redis) -> None:
+    try:
+        client.xgroup_create(
+            settings.TRACKING_STREAM_NAME,
+            settings.TRACKING_STREAM_GROUP,
+            id="0",
+            mkstream=True,
+        )
+    except redis.ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+def read_batch(client: redis.Redis, consumer: str, block_ms: int | None = None):
+    """
+    Read the next batch for ``consumer``, reclaiming entries that another
+    consumer read but never acknowledged (e.g. a worker that died mid-batch)
+    before taking new ones.
+
+    Returns a list of ``(entry_id, fields)`` tuples.
+    """
+    _, entries, *_ = client.xautoclaim(
+        settings.TRACKING_STREAM_NAME,
+        settings.TRACKING_STREAM_GROUP,
+        consumer,
+        min_idle_time=settings.TRACKING_STREAM_CLAIM_IDLE_MS,
+        count=settings.TRACKING_STREAM_BATCH_SIZE,
+    )
+    entries = [entry for entry in entries if entry[1] is not None]
+    if entries:
+        return entries
+
+    response = client.xreadgroup(
+        settings.TRACKING_STREAM_GROUP,
+        consumer,
+        {settings.TRACKING_STREAM_NAME: ">"},
+        count=settings.TRACKING_STREAM_BATCH_SIZE,
+        block=block_ms,
+    )
+    return response[0][1] if response else []
+
+
+def ack(client: redis.Redis, entry_ids: list) -> None:
+    if entry_ids:
+        client.xack(
+            settings.TRACKING_STREAM_NAME, settings.TRACKING_STREAM_GROUP, *entry_ids
+        )
+
+
+def delivery_counts(client: redis.Redis, entry_ids: list) -> dict:
+    """How many times each of the pending ``entry_ids`` has been delivered."""
+    pipe = client.pipeline(transaction=False)
+    for entry_id in entry_ids:
+        pipe.xpending_range(
+            settings.TRACKING_STREAM_NAME,
+            settings.TRACKING_STREAM_GROUP,
+            min=entry_id,
+            max=entry_id,
+            count=1,
+        )
+    return {
+        pending[0]["message_id"]: pending[0]["times_delivered"]
+        for pending in pipe.execute()
+        if pending
+    }
+
+
+def dead_letter(client: redis.Redis, entries: list, reason: str) -> None:
+    """
+    Move ``(entry_id, fields)`` entries that cannot be processed to the
+    dead-letter stream, with their id and ``reason``, and acknowledge them
+    so they no longer hold up the ones behind them.
+    """
+    pipe = client.pipeline(transaction=False)
+    for entry_id, fields in entries:
+        pipe.xadd(
+            settings.TRACKING_STREAM_DEAD_LETTER_NAME,
+            {**fields, "entry_id": entry_id, "reason": reason},
+            maxlen=settings.TRACKING_STREAM_MAX_LENGTH,
+            approximate=True,
+        )
+    pipe.xack(
+        settings.TRACKING_STREAM_NAME,
+        settings.TRACKING_STREAM_GROUP,
+        *[entry_id for entry_id, _ in entries],
+    )
+    pipe.execute()
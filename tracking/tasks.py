@@ -0,0 +1,173 @@
+import datetime
+import logging
+import os
+import socket
+import time
+
+from celery import shared_task
+from django.conf import settings
+from django.db import connection
+
+from common_library.db.partitions import RangePartitioner
+from common_library.redis import get_redis
+from mailer.models import BadgePixelTrackerLogs, RedirectLinkTrackerLog
+from mailer.mongodb_models import EVENT_LOG_TTL
+from tracking import archive, stream
+from tracking.recorder import persist_hits
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def consume_tracking_stream():
+    """
+    Drain the tracking stream as a member of the ingest consumer group.
+
+    Each batch of up to ``TRACKING_STREAM_BATCH_SIZE`` entries is decoded,
+    enriched and filtered for bots, written with one ``insert_many`` and
+    only then acknowledged, so a worker that dies mid-batch leaves its
+    entries pending for another consumer to reclaim. Several of these tasks
+    may run at once; the consumer group hands each entry to exactly one.
+
+    One bad entry must not hold up the stream: entries that do not decode
+    go to the dead-letter stream at once, and a batch that fails to persist
+    is retried entry by entry, see persist_entries.
+
+    Runs until the stream is empty or the time budget is spent, whichever
+    comes first, and returns the number of entries processed.
+    """
+    client = get_redis()
+    stream.ensure_group(client)
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    deadline = time.monotonic() + settings.TRACKING_STREAM_CONSUME_BUDGET
+    processed = 0
+
+    while time.monotonic() < deadline:
+        entries = stream.read_batch(client, consumer)
+        if not entries:
+            break
+        decoded, undecodable = [], []
+        for entry_id, fields in entries:
+            try:
+                decoded.append((entry_id, fields, stream.decode_hit(fields)))
+            except (KeyError, ValueError, UnicodeDecodeError):
+                logger.exception("undecodable tracking stream entry %s", entry_id)
+                undecodable.append((entry_id, fields))
+        if undecodable:
+            stream.dead_letter(client, undecodable, "undecodable")
+        if decoded:
+            try:
+                persist_hits(
+                    [hit for _, _, hit in decoded],
+                    [entry_id.decode() for entry_id, _, _ in decoded],
+                )
+            except Exception:
+                logger.exception(
+                    "failed to persist %d tracking hits, retrying them one by one",
+                    len(decoded),
+                )
+                persist_entries(client, decoded)
+            else:
+                stream.ack(client, [entry_id for entry_id, _, _ in decoded])
+        processed += len(entries)
+
+    return processed
+
+
+def persist_entries(client, decoded: list) -> None:
+    """
+    Persist ``(entry_id, fields, hit)`` entries of a failed batch one at a
+    time and acknowledge those written. The others stay pending, to be
+    reclaimed and tried again, until they have been delivered
+    ``TRACKING_STREAM_MAX_DELIVERIES`` times; then they are moved to the
+    dead-letter stream. When every entry of a batch fails the cause is
+    not in the entries (e.g. MongoDB is down): nothing is dead-lettered and
+    the error propagates, unless the batch is a single entry.
+    """
+    written, failed = [], []
+    for entry_id, fields, hit in decoded:
+        try:
+            persist_hits([hit], [entry_id.decode()])
+        except Exception as exc:
+            failed.append((entry_id, fields, exc))
+        else:
+            written.append(entry_id)
+    stream.ack(client, written)
+    if not failed:
+        return
+    if not written and len(decoded) > 1:
+        raise failed[0][2]
+
+    deliveries = stream.delivery_counts(client, [entry_id for entry_id, _, _ in failed])
+    poison = []
+    for entry_id, fields, exc in failed:
+        logger.error("failed to persist tracking stream entry %s: %r", entry_id, exc)
+        if deliveries.get(entry_id, 0) >= settings.TRACKING_STREAM_MAX_DELIVERIES:
+            poison.append((entry_id, fields))
+    if poison:
+        stream.dead_letter(client, poison, "persist failed")
+
+
+@shared_task(ignore_result=True)
+def archive_event_logs():
+    """
+    Export the MailEventLog documents older than
+    ``TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS`` not archived yet, run hourly
+    by beat, see tracking.archive. Returns the files written.
+
+    Logs an error when the oldest document not archived yet is about to be
+    deleted by the TTL index, whether archiving failed or fell behind.
+    """
+    if not settings.TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS:
+        return []
+    try:
+        return archive.archive(
+            datetime.datetime.now(datetime.UTC)
+            - datetime.timedelta(days=settings.TRACKING_EVENT_LOG_ARCHIVE_AFTER_DAYS)
+        )
+    except archive.ArchiveInProgress:
+        return []
+    finally:
+        if EVENT_LOG_TTL:
+            lag = archive.archive_lag()
+            ttl = datetime.timedelta(seconds=EVENT_LOG_TTL)
+            if lag is not None and lag > ttl - archive.LAG_ALERT_MARGIN:
+                logger.error(
+                    "event log archive is %s behind: unarchived documents are "
+                    "deleted by the TTL index after %s",
+                    lag,
+                    ttl,
+                )
+
+
+LOG_PARTITIONERS = [
+    RangePartitioner(
+        model._meta.db_table, "created_time", settings.TRACKING_LOG_PARTITION_INTERVAL
+    )
+    for model in (BadgePixelTrackerLogs, RedirectLinkTrackerLog)
+]
+
+
+@shared_task(ignore_result=True)
+def maintain_log_partitions():
+    """
+    Create the upcoming partitions of the tracker log tables and expire the
+    ones past ``TRACKING_LOG_RETENTION_DAYS``, run hourly by beat. Tables
+    not converted yet (``manage.py partition_tracker_logs``) are skipped.
+    Returns the partitions created and expired, by table.
+    """
+    if connection.vendor != "postgresql":
+        return {}
+    changes = {}
+    for partitioner in LOG_PARTITIONERS:
+        if not partitioner.is_partitioned():
+            continue
+        created = partitioner.create_ahead(settings.TRACKING_LOG_PARTITIONS_AHEAD)
+        expired = []
+        if settings.TRACKING_LOG_RETENTION_DAYS:
+            expired = partitioner.expire(
+                datetime.timedelta(days=settings.TRACKING_LOG_RETENTION_DAYS),
+                drop=settings.TRACKING_LOG_RETENTION_ACTION != "detach",
+            )
+        changes[partitioner.table] = {"created": created, "expired": expired}
+    return changes
@@ -1,3 +1,217 @@
-from django.test import TestCase
+import base64
+import datetime
+import uuid
+from unittest import mock
 
-# Create your tests here.
+import ulid
+from bson import ObjectId
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from common_library.redis import get_redis
+from analytics.mongodb_models import CountedEntry, EventRollup
+from mailer.mongodb_models import MailEvent, MailEventLog
+from tracking import recorder, stream
+from tracking.hits import Hit
+from tracking.tasks import consume_tracking_stream
+from tracking.tokens import (
+    InvalidEventKey,
+    check_signing_keys,
+    read_event_key,
+    sign_event,
+    sign_event_key,
+)
+
+BOT_USER_AGENT = "Googlebot/2.1 (+http://www.google.com/bot.html)"
+
+
+def make_hit(event_key: str, user_agent: str = "Mozilla/5.0") -> Hit:
+    return Hit(
+        event_key=event_key,
+        ip_address="203.0.113.7",
+        user_agent=user_agent,
+        referrer="",
+        headers={},
+        created_time=datetime.datetime.now(datetime.UTC),
+    )
+
+
+class ConsumeTrackingStreamTests(SimpleTestCase):
+    """A bad entry is dead-lettered instead of stalling the stream."""
+
+    def setUp(self):
+        name = f"test:tracking:{uuid.uuid4().hex}"
+        settings = override_settings(
+            TRACKING_STREAM_NAME=name,
+            TRACKING_STREAM_DEAD_LETTER_NAME=f"{name}:dead",
+            TRACKING_STREAM_BATCH_SIZE=10,
+            # pending entries are reclaimed at once, so one run redelivers
+            # them until they are written or dead-lettered
+            TRACKING_STREAM_CLAIM_IDLE_MS=0,
+            TRACKING_STREAM_MAX_DELIVERIES=3,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = get_redis()
+        self.addCleanup(self.client.delete, name, f"{name}:dead")
+        self.name = name
+
+    def consume(self, persist_hits) -> list:
+        """Run the consumer, returning the event keys persisted."""
+        persisted = []
+
+        def persist(hits, entry_ids=None):
+            persist_hits(hits)
+            persisted.extend(hit.event_key for hit in hits)
+
+        with mock.patch("tracking.tasks.persist_hits", persist):
+            consume_tracking_stream()
+        return persisted
+
+    def dead_letters(self) -> list[bytes]:
+        return [
+            fields[b"reason"] for _, fields in self.client.xrange(f"{self.name}:dead")
+        ]
+
+    def pending(self) -> int:
+        return self.client.xpending(self.name, "tracking-ingest")["pending"]
+
+    def test_undecodable_entry_is_dead_lettered(self):
+        stream.publish_hits([make_hit("a")])
+        self.client.xadd(self.name, {"event_key": "b"})  # no other fields
+        stream.publish_hits([make_hit("c")])
+
+        self.assertEqual(self.consume(lambda hits: None), ["a", "c"])
+        self.assertEqual(self.dead_letters(), [b"undecodable"])
+        self.assertEqual(self.pending(), 0)
+
+    def test_failing_entry_is_dead_lettered_after_max_deliveries(self):
+        stream.publish_hits([make_hit("a"), make_hit("poison"), make_hit("c")])
+
+        def persist_hits(hits):
+            if any(hit.event_key == "poison" for hit in hits):
+                raise ValueError("bad row")
+
+        self.assertEqual(self.consume(persist_hits), ["a", "c"])
+        self.assertEqual(self.dead_letters(), [b"persist failed"])
+        self.assertEqual(self.pending(), 0)
+
+    def test_outage_dead_letters_nothing(self):
+        stream.publish_hits([make_hit("a"), make_hit("b")])
+
+        def persist_hits(hits):
+            raise ConnectionError("mongodb is down")
+
+        with self.assertRaises(ConnectionError):
+            self.consume(persist_hits)
+        self.assertEqual(self.dead_letters(), [])
+        self.assertEqual(self.pending(), 2)
+
+    @override_settings(TRACKING_BOT_POLICY="aggregate")
+    def test_batch_failing_after_insert_is_stored_once(self):
+        mail_id = uuid.uuid4().int % 2**31
+        event = MailEvent(sql_mail_id=mail_id, event_type=MailEvent.OPEN).save()
+        self.addCleanup(MailEventLog.objects(event=event).delete)
+        self.addCleanup(EventRollup.objects(scope_id=mail_id).delete)
+        self.addCleanup(event.delete)
+        key = sign_event(event)
+        stream.publish_hits(
+            [make_hit(key), make_hit(key), make_hit(key, user_agent=BOT_USER_AGENT)]
+        )
+        entry_ids = [entry_id.decode() for entry_id, _ in self.client.xrange(self.name)]
+        self.addCleanup(CountedEntry.objects(id__in=entry_ids).delete)
+
+        insert_event_logs = recorder.insert_event_logs
+        failures = [ConnectionError]
+
+        def insert_then_fail(documents):
+            insert_event_logs(documents)
+            if failures:
+                raise failures.pop()
+
+        # the batch fails once its logs are written, then every entry is
+        # written again on its own
+        with mock.patch("tracking.recorder.insert_event_logs", insert_then_fail):
+            consume_tracking_stream()
+
+        self.assertEqual(MailEventLog.objects(event=event).count(), 2)
+        self.assertEqual(event.reload().bot_hits, 1)
+        self.assertEqual(
+            EventRollup.objects.get(scope_id=mail_id, granularity="hour").bot_hits,
+            1,
+        )
+        self.assertEqual(self.pending(), 0)
+
+
+@override_settings(TRACKING_SIGNING_KEYS={1: "first"}, TRACKING_SIGNING_KEY_ID=1)
+class EventKeyTests(SimpleTestCase):
+    event_id = ObjectId()
+
+    def sign(self, **kwargs) -> str:
+        return sign_event_key(self.event_id, 42, MailEvent.OPEN, **kwargs)
+
+    def test_round_trip(self):
+        key = read_event_key(self.sign())
+
+        self.assertEqual(key.event_id, self.event_id)
+        self.assertEqual(key.mail_id, 42)
+        self.assertEqual(key.event_type, MailEvent.OPEN)
+        self.assertIsNone(key.redirect_uid)
+
+    def test_round_trip_with_redirect(self):
+        redirect_uid = ulid.new().str
+        key = read_event_key(
+            sign_event_key(
+                self.event_id, 7, MailEvent.LINK_CLICK, redirect_uid=redirect_uid
+            )
+        )
+
+        self.assertEqual(key.event_type, MailEvent.LINK_CLICK)
+        self.assertEqual(key.redirect_uid, redirect_uid)
+
+    def test_tampered_key_is_rejected(self):
+        token = bytearray(base64.urlsafe_b64decode(self.sign() + "=="))
+        for position in (3, len(token) - 1):  # event id, signature
+            tampered = token.copy()
+            tampered[position] ^= 1
+            with self.assertRaises(InvalidEventKey):
+                read_event_key(base64.urlsafe_b64encode(tampered).decode())
+
+    def test_malformed_key_is_rejected(self):
+        for key in ("", "not a key", self.sign()[:-4]):
+            with self.assertRaises(InvalidEventKey):
+                read_event_key(key)
+
+    def test_unknown_signing_key_is_rejected(self):
+        key = self.sign()
+        with override_settings(TRACKING_SIGNING_KEYS={2: "second"}):
+            with self.assertRaises(InvalidEventKey):
+                read_event_key(key)
+
+    def test_key_rotation(self):
+        old = self.sign()
+        with override_settings(
+            TRACKING_SIGNING_KEYS={1: "first", 2: "second"}, TRACKING_SIGNING_KEY_ID=2
+        ):
+            new = self.sign()
+            # keys still listed keep verifying
+            self.assertEqual(read_event_key(old).mail_id, 42)
+            self.assertEqual(read_event_key(new).mail_id, 42)
+        with override_settings(
+            TRACKING_SIGNING_KEYS={2: "second"}, TRACKING_SIGNING_KEY_ID=2
+        ):
+            self.assertEqual(read_event_key(new).mail_id, 42)
+            with self.assertRaises(InvalidEventKey):
+                read_event_key(old)
+
+    def test_key_ids_must_fit_a_byte(self):
+        with override_settings(
+            TRACKING_SIGNING_KEYS={256: "too big"}, TRACKING_SIGNING_KEY_ID=256
+        ):
+            with self.assertRaises(ImproperlyConfigured):
+                check_signing_keys()
+
+    def test_current_key_must_be_listed(self):
+        with override_settings(TRACKING_SIGNING_KEY_ID=2):
+            with self.assertRaises(ImproperlyConfigured):
+                check_signing_keys()
@@ -0,0 +1,146 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+Signed, self-contained event keys.
+
+An event key carries everything a tracking hit needs to be recorded, so the
+pixel and redirect endpoints can trust it after a single HMAC check instead
+of looking the event up. Layout before base64url encoding::
+
+    version     1 byte
+    key id      1 byte   index into settings.TRACKING_SIGNING_KEYS
+    event type  1 byte
+    event id   12 bytes  MailEvent ObjectId
+    mail id     8 bytes  Mail primary key, big endian
+    redirect   16 bytes  optional, RedirectLinkTracker.uid as a binary ULID
+    signature  16 bytes  truncated HMAC-SHA256 over everything above
+
+Keys are rotated by adding a new id to ``TRACKING_SIGNING_KEYS`` and making
+it the current one; keys that are still listed keep verifying old tokens.
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import struct
+import typing
+
+import ulid
+from bson import ObjectId
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from mailer.mongodb_models import MailEvent
+
+VERSION = 1
+SIGNATURE_SIZE = 16
+
+_HEADER = struct.Struct(">BBB12sQ")
+_REDIRECT_SIZE = 16
+# the key id is one byte of the header
+MAX_KEY_ID = 255
+
+EVENT_TYPE_CODES = {MailEvent.OPEN: 1, MailEvent.LINK_CLICK: 2}
+EVENT_TYPES = {code: event_type for event_type, code in EVENT_TYPE_CODES.items()}
+
+
+class InvalidEventKey(ValueError):
+    """Raised when an event key is malformed, unsigned or signed with an unknown key."""
+
+
+class EventKey(typing.NamedTuple):
+    event_id: ObjectId
+    mail_id: int
+    event_type: str
+    redirect_uid: str | None = None
+
+
+def check_signing_keys() -> None:
+    """Fail at startup, rather than on every send, on unusable key settings."""
+    keys, current = settings.TRACKING_SIGNING_KEYS, settings.TRACKING_SIGNING_KEY_ID
+    if invalid := [key_id for key_id in keys if not 0 <= key_id <= MAX_KEY_ID]:
+        raise ImproperlyConfigured(
+            f"TRACKING_SIGNING_KEYS ids must be within 0-{MAX_KEY_ID}, not {invalid}"
+        )
+    if current not in keys:
+        raise ImproperlyConfigured(
+            f"TRACKING_SIGNING_KEY_ID {current} is not in TRACKING_SIGNING_KEYS"
+        )
+
+
+check_signing_keys()
+
+
+def _signing_key(key_id: int) -> bytes:
+    try:
+        return settings.TRACKING_SIGNING_KEYS[key_id].encode()
+    except KeyError:
+        raise InvalidEventKey(f"unknown signing key {key_id}")
+
+
+def _sign(key_id: int, payload: bytes) -> bytes:
+    return hmac.new(_signing_key(key_id), payload, hashlib.sha256).digest()[
+        :SIGNATURE_SIZE
+    ]
+
+
+def sign_event_key(
+    event_id: ObjectId,
+    mail_id: int,
+    event_type: str,
+    redirect_uid: str | None = None,
+) -> str:
+    """Build a signed event key with the current signing key."""
+    key_id = settings.TRACKING_SIGNING_KEY_ID
+    payload = _HEADER.pack(
+        VERSION,
+        key_id,
+        EVENT_TYPE_CODES[event_type],
+        ObjectId(event_id).binary,
+        mail_id,
+    )
+    if redirect_uid:
+        payload += ulid.from_str(redirect_uid).bytes
+    token = payload + _sign(key_id, payload)
+    return base64.urlsafe_b64encode(token).rstrip(b"=").decode()
+
+
+def sign_event(event: MailEvent, redirect_uid: str | None = None) -> str:
+    return sign_event_key(event.id, event.sql_mail_id, event.event_type, redirect_uid)
+
+
+def read_event_key(key: str) -> EventKey:
+    """
+    Verify and decode an event key.
+
+    Raises:
+        InvalidEventKey: if the key is malformed or its signature does not match.
+    """
+    try:
+        token = base64.urlsafe_b64decode(key + "=" * (-len(key) % 4))
+    except (binascii.Error, ValueError):
+        raise InvalidEventKey("malformed event key")
+
+    payload, signature = token[:-SIGNATURE_SIZE], token[-SIGNATURE_SIZE:]
+    if len(payload) not in (_HEADER.size, _HEADER.size + _REDIRECT_SIZE):
+        raise InvalidEventKey("malformed event key")
+
+    version, key_id, type_code, event_id, mail_id = _HEADER.unpack_from(payload)
+    if version != VERSION or type_code not in EVENT_TYPES:
+        raise InvalidEventKey("malformed event key")
+    if not hmac.compare_digest(signature, _sign(key_id, payload)):
+        raise InvalidEventKey("bad signature")
+
+    redirect = payload[_HEADER.size :]
+    return EventKey(
+        event_id=ObjectId(event_id),
+        mail_id=mail_id,
+        event_type=EVENT_TYPES[type_code],
+        redirect_uid=ulid.from_bytes(redirect).str if redirect else None,
+    )
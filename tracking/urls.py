@@ -1,6 +1,18 @@
-from django.urls import path
+from django.urls import path, register_converter
+
+from common_library.converters import UlidConverter
 from . import views
 
+register_converter(UlidConverter, "ulid")
+
 urlpatterns = [
+    path("metrics/", views.TrackingMetricsAPIView.as_view(), name="tracking-metrics"),
+    path("click/<str:event_key>", views.LinkClickView.as_view(), name="link-click"),
+    path("badge/<ulid:uid>", views.BadgePixelView.as_view(), name="badge-pixel"),
+    path(
+        "redirect/<ulid:uid>",
+        views.RedirectTrackerView.as_view(),
+        name="redirect-tracker",
+    ),
     path("<str:event_key>", views.WebHockAPIView.as_view(), name="web-hock"),
 ]
@@ -0,0 +1,103 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+
+User-agent classification for tracking hits.
+
+Mail clients and image proxies send a small set of distinct user-agent
+strings, so results are memoized on the raw string and almost every lookup
+is a dictionary hit. All matchers are compiled once at import time and are
+tried in order: the first match wins, which is why more specific products
+(Edge, Opera, Samsung Internet) come before the engines they embed.
+"""
+
+import functools
+import re
+import typing
+
+CACHE_SIZE = 8192
+
+
+class UserAgent(typing.NamedTuple):
+    browser: str
+    os: str
+    device_type: str  # "desktop", "mobile", "tablet" or "bot"
+    is_bot: bool
+
+
+UNKNOWN = "unknown"
+
+_BOT = re.compile(
+    r"bot\b|bot/|crawl|spider|slurp|preview|monitor|scanner|headless|"
+    r"python-requests|python-urllib|aiohttp|go-http-client|okhttp|curl/|wget/|"
+    r"libwww|java/|httpclient|facebookexternalhit|phantomjs",
+    re.IGNORECASE,
+)
+
+_BROWSERS = tuple(
+    (name, re.compile(pattern, re.IGNORECASE))
+    for name, pattern in (
+        ("Outlook", r"microsoft outlook|\boutlook-|ms-office|\bmsoffice"),
+        ("Thunderbird", r"thunderbird/"),
+        ("Edge", r"edg(?:e|a|ios)?/"),
+        ("Opera", r"opr/|opera"),
+        ("Samsung Internet", r"samsungbrowser/"),
+        ("Yandex", r"yabrowser/"),
+        ("Chrome", r"chrome/|crios/"),
+        ("Firefox", r"firefox/|fxios/"),
+        ("Safari", r"version/[\d.]+.*safari/"),
+        ("Apple Mail", r"applewebkit/(?!.*safari/)"),
+        ("Internet Explorer", r"msie |trident/"),
+    )
+)
+
+_OPERATING_SYSTEMS = tuple(
+    (name, re.compile(pattern, re.IGNORECASE))
+    for name, pattern in (
+        ("Windows Phone", r"windows phone"),
+        ("Windows", r"windows"),
+        ("iOS", r"iphone|ipad|ipod"),
+        ("Mac OS", r"mac os x|macintosh"),
+        ("Android", r"android"),
+        ("Chrome OS", r"cros "),
+        ("Linux", r"linux|x11"),
+    )
+)
+
+_TABLET = re.compile(r"ipad|tablet|kindle|silk/|android(?!.*mobile)", re.IGNORECASE)
+_MOBILE = re.compile(r"mobi|iphone|ipod|android|windows phone", re.IGNORECASE)
+
+
+def _first_match(matchers, user_agent: str) -> str:
+    for name, pattern in matchers:
+        if pattern.search(user_agent):
+            return name
+    return UNKNOWN
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse_user_agent(user_agent: str) -> UserAgent:
+    """Classify a raw user-agent string. Results are memoized per string."""
+    if not user_agent:
+        return UserAgent(UNKNOWN, UNKNOWN, UNKNOWN, False)
+
+    is_bot = _BOT.search(user_agent) is not None
+    if is_bot:
+        device_type = "bot"
+    elif _TABLET.search(user_agent):
+        device_type = "tablet"
+    elif _MOBILE.search(user_agent):
+        device_type = "mobile"
+    else:
+        device_type = "desktop"
+
+    return UserAgent(
+        browser=_first_match(_BROWSERS, user_agent),
+        os=_first_match(_OPERATING_SYSTEMS, user_agent),
+        device_type=device_type,
+        is_bot=is_bot,
+    )
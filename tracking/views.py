@@ -1,10 +1,147 @@
+"""
+* mail-tracker-drf
+* author: github.com/alisharify7
+* email: alisharifyofficial@gmail.com
+* license: see LICENSE for more details.
+* Copyright (c) 2025 - ali sharifi
+* https://github.com/alisharify7/mail-tracker-drf
+"""
+
+import base64
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.views import View
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 from rest_framework.views import APIView
+
 from mailer.mongodb_models import MailEvent
-from mailer.models import Mail
+from tracking.headers import header_sets
+from tracking.hits import Hit
+from tracking.recorder import (
+    BUFFERS,
+    badge_log_buffer,
+    recorder,
+    redirect_log_buffer,
+)
+from tracking.redirects import redirect_cache
+from tracking.tokens import EventKey, InvalidEventKey, read_event_key
+
+# 1x1 transparent GIF, decoded once at import time.
+PIXEL_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+PIXEL_HEADERS = {
+    "Content-Type": "image/gif",
+    "Content-Length": str(len(PIXEL_GIF)),
+    "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
+
+class WebHockAPIView(View):
+    """
+    Tracking pixel endpoint.
+
+    This is a plain async Django view rather than a DRF APIView: it runs on
+    the ASGI event loop, skips DRF's authentication/content negotiation and
+    never touches a database. The event key is verified with a single HMAC
+    check, the hit is queued for the background recorder and the
+    precomputed pixel is returned immediately. Clients always get the
+    pixel, even for keys that do not verify.
+    """
 
+    http_method_names = ["get"]
 
-class WebHockAPIView(APIView):
-    def get(self, request, event_key: str):
+    async def get(self, request, event_key: str):
         """render pixel for tracking"""
-        print(event_key)
-        pass
+        try:
+            key = read_event_key(event_key)
+        except InvalidEventKey:
+            key = None
+        if key is not None and key.event_type == MailEvent.OPEN:
+            await recorder.aput(Hit.from_request(request, event_key))
+        return HttpResponse(PIXEL_GIF, headers=PIXEL_HEADERS)
+
+
+async def resolve_redirect(key: EventKey) -> str | None:
+    """Destination of a link-click event key."""
+    if key.redirect_uid:
+        target = await redirect_cache.aget(key.redirect_uid)
+        return target[1] if target else None
+    event = await sync_to_async(
+        MailEvent.objects(id=key.event_id).only("redirect_to").first
+    )()
+    return event.redirect_to if event else None
+
+
+class LinkClickView(View):
+    """
+    Link-click endpoint: verifies the event key, queues the hit and
+    redirects to the link's destination.
+    """
+
+    http_method_names = ["get"]
+
+    async def get(self, request, event_key: str):
+        try:
+            key = read_event_key(event_key)
+        except InvalidEventKey:
+            raise Http404
+        if key.event_type != MailEvent.LINK_CLICK:
+            raise Http404
+
+        redirect_to = await resolve_redirect(key)
+        if not redirect_to:
+            raise Http404
+        await recorder.aput(Hit.from_request(request, event_key))
+        return HttpResponseRedirect(redirect_to)
+
+
+class BadgePixelView(View):
+    """
+    Pixel endpoint of a BadgePixelTracker. Like the mail pixel it answers
+    without touching a database; the tracker uid is resolved when the
+    buffered hits are written.
+    """
+
+    http_method_names = ["get"]
+
+    async def get(self, request, uid: str):
+        await badge_log_buffer.aput((uid, Hit.from_request(request, uid)))
+        return HttpResponse(PIXEL_GIF, headers=PIXEL_HEADERS)
+
+
+class RedirectTrackerView(View):
+    """
+    Redirect endpoint of a RedirectLinkTracker. The destination normally
+    comes straight from the in-process redirect cache; the access log row
+    is written behind the response.
+    """
+
+    http_method_names = ["get"]
+
+    async def get(self, request, uid: str):
+        target = await redirect_cache.aget(uid)
+        if target is None:
+            raise Http404
+        tracker_id, redirect_to = target
+        await redirect_log_buffer.aput((tracker_id, Hit.from_request(request, uid)))
+        return HttpResponseRedirect(redirect_to)
+
+
+class TrackingMetricsAPIView(APIView):
+    """Counters of this worker process's tracking ingest buffers and caches."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "buffers": {buffer.name: buffer.stats() for buffer in BUFFERS},
+                "caches": {
+                    "redirect-targets": redirect_cache.stats(),
+                    "header-sets": header_sets.stats(),
+                },
+            }
+        )